@@ -1,6 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import UpdateOne
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 
+from DebugTools.helpers import season_engine
+
 
 class StatChange:
     def __init__(self, player_name, stat_name, old, new):
@@ -32,138 +37,137 @@ def display_all_changes(stat_changes: list[StatChange]):
         display_change(change)
 
 
-def get_matchlist_changes_that_will_be_made(matchlist):
-    from DebugTools.helpers.stat_getters import (
-        get_losses_from_matchlist,
-        get_wins_from_matchlist,
-        get_combat_score_from_matchlist,
-        get_deaths_from_matchlist,
-        get_kills_from_matchlist,
-        get_total_rounds_played_from_matchlist,
-        get_winning_team_id,
-    )
-
-    changes: list[StatChange] = []
-    winning_teams = []
-    losing_teams = []
-    for match in matchlist:
-        winning_team_id = get_winning_team_id(match)
+class PlayerDiff:
+    """One player's consolidated change: the stored document and its final fields."""
 
-        winning_team = []
-        losing_team = []
-
-        for player in match["players"]:
-            if player["team_id"] == winning_team_id:
-                winning_team.append(player)
-            else:
-                losing_team.append(player)
-
-        winning_teams.append(winning_team)
-        losing_teams.append(losing_team)
+    def __init__(self, player_id, name, old: dict | None, new: dict):
+        self.player_id = player_id
+        self.name = name
+        self.old = old
+        self.new = new
 
-    # Use stat getters to calculate other stats
-    mmr = get_mmr_values_multiple_teams(winning_teams, losing_teams)
-    losses: dict = get_losses_from_matchlist(matchlist)
-    wins: dict = get_wins_from_matchlist(matchlist)
-    total_combat_score: dict = get_combat_score_from_matchlist(matchlist)
-    total_deaths: dict = get_deaths_from_matchlist(matchlist)
-    total_kills: dict = get_kills_from_matchlist(matchlist)
-    total_rounds_played: dict = get_total_rounds_played_from_matchlist(matchlist)
-    matches_played: dict = {}
+    @property
+    def changed(self) -> dict:
+        """{field: (old, new)} for every field the update would change."""
+        old = self.old or {}
+        return {
+            field: (old.get(field), value)
+            for field, value in self.new.items()
+            if field not in old or old[field] != value
+        }
+
+
+def _linked_players(matchlist) -> dict[str, str]:
+    """Riot name -> discord id, from lean records and the users collection."""
+    linked = {}
+    for user in users.find({}, {"discord_id": 1, "name": 1, "tag": 1}):
+        if user.get("discord_id") and user.get("name") and user.get("tag"):
+            name = (user["name"] + "#" + user["tag"]).lower()
+            linked[name] = str(user["discord_id"])
     for match in matchlist:
-        # Increment matches_played for all players in the match
         for player in match["players"]:
-            player_name = (player["name"] + "#" + player["tag"]).lower()
-            matches_played[player_name] = matches_played.get(player_name, 0) + 1
+            if player.get("player_id"):
+                linked[season_engine.riot_name(player)] = str(player["player_id"])
+    return linked
 
-    for stat_name, stat_data in zip(
-        [
-            "matches_played",
-            "losses",
-            "wins",
-            "mmr",
-            "total_combat_score",
-            "total_deaths",
-            "total_kills",
-            "total_rounds_played",
-            "average_combat_score",
-            "kill_death_ratio",
-        ],
-        [
-            matches_played,
-            losses,
-            wins,
-            mmr,
-            total_combat_score,
-            total_deaths,
-            total_kills,
-            total_rounds_played,
-            total_rounds_played,
-            total_rounds_played,
-        ],
-    ):
-        for player_name, new_value in stat_data.items():
-            existing_data = mmr_collection.find_one({"name": player_name})
-            if existing_data:
-                old_value = existing_data.get(stat_name, 0)
-                new_value = new_value
-                if stat_name == "average_combat_score":
-                    old_combat_score = existing_data.get("total_combat_score", 0)
-                    new_combat_score = (
-                        old_combat_score + total_combat_score[player_name]
-                    )
-
-                    old_total_rounds_played = existing_data.get(
-                        "total_rounds_played", 0
-                    )
-                    new_total_rounds_played = (
-                        old_total_rounds_played + total_rounds_played[player_name]
-                    )
 
-                    old_average_combat_score = existing_data.get(
-                        "average_combat_score", 0
-                    )
-                    new_average_combat_score = round(
-                        new_combat_score / new_total_rounds_played, 2
-                    )
-
-                    change = StatChange(
-                        player_name=player_name,
-                        stat_name=stat_name,
-                        old=old_average_combat_score,
-                        new=new_average_combat_score,
-                    )
-                    changes.append(change)
-                elif stat_name == "kill_death_ratio":
-                    old_kills = existing_data.get("total_kills", 0)
-                    new_kills = old_kills + total_kills[player_name]
+def get_matchlist_changes_that_will_be_made(guild_id, matchlist) -> list[PlayerDiff]:
+    """
+    Plan the stats every player of guild `guild_id` should have after
+    `matchlist`, as one final document per player compared against what the
+    guild has stored now.
 
-                    old_deaths = existing_data.get("total_deaths", 0)
-                    new_deaths = old_deaths + total_deaths[player_name]
+    Stats are recomputed with the bot's MMR formula (see season_engine), and
+    the stored documents are read in a single query. Nothing is written.
+    """
+    season = season_engine.recompute_season(matchlist)
+    linked = _linked_players(matchlist)
+
+    unlinked = sorted(name for name in season if name not in linked)
+    if unlinked:
+        print(f"Skipping {len(unlinked)} unlinked players: {', '.join(unlinked)}")
+
+    player_ids = [linked[name] for name in season if name in linked]
+    stored = {
+        doc["player_id"]: doc
+        for doc in mmr_collection.find(
+            {"guild_id": str(guild_id), "player_id": {"$in": player_ids}}
+        )
+    }
+
+    diffs = []
+    for name, stats in season.items():
+        player_id = linked.get(name)
+        if player_id is None:
+            continue
+        old = stored.get(player_id)
+        new = {**stats, "name": old["name"] if old else name}
+        diffs.append(PlayerDiff(player_id, name, old, new))
+    diffs.sort(key=lambda diff: -diff.new["mmr"])
+    return diffs
+
+
+def display_diff_summary(diffs: list[PlayerDiff]):
+    created = [diff for diff in diffs if diff.old is None]
+    changed = [diff for diff in diffs if diff.old is not None and diff.changed]
+    print(
+        f"{len(diffs)} players: {len(created)} new, {len(changed)} changed, "
+        f"{len(diffs) - len(created) - len(changed)} unchanged"
+    )
+    for diff in created:
+        print(
+            f"  + {diff.name}: mmr={diff.new['mmr']} matches={diff.new['matches_played']}"
+        )
+    for diff in changed:
+        fields = ", ".join(
+            f"{field} {old}->{new}" for field, (old, new) in diff.changed.items()
+        )
+        print(f"  ~ {diff.name}: {fields}")
+
+
+def apply_diffs(
+    guild_id, diffs: list[PlayerDiff], chunk_size: int = 500, workers: int = 4
+):
+    """Upsert the guild's changed players, in unordered bulk writes run side by side."""
+    ops = [
+        UpdateOne(
+            {"guild_id": str(guild_id), "player_id": diff.player_id},
+            {"$set": diff.new},
+            upsert=True,
+        )
+        for diff in diffs
+        if diff.changed
+    ]
+    chunks = [ops[i : i + chunk_size] for i in range(0, len(ops), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(
+            pool.map(
+                lambda chunk: mmr_collection.bulk_write(chunk, ordered=False), chunks
+            )
+        )
+    print(
+        f"Applied {len(ops)} player updates in {len(chunks)} bulk writes "
+        f"(modified={sum(r.modified_count for r in results)}, "
+        f"upserted={sum(r.upserted_count for r in results)})."
+    )
 
-                    old_kd = existing_data.get("kill_death_ratio", 0)
-                    new_kd = round(new_kills / new_deaths, 2)
 
-                    change = StatChange(
-                        player_name=player_name,
-                        stat_name=stat_name,
-                        old=old_kd,
-                        new=new_kd,
-                    )
-                    changes.append(change)
-                else:
-                    change = StatChange(
-                        player_name=player_name,
-                        stat_name=stat_name,
-                        old=old_value,
-                        new=new_value,
-                    )
-                    changes.append(change)
+def confirm_diffs(guild_id, diffs: list[PlayerDiff]) -> bool:
+    print("The following changes will be made:")
+    display_diff_summary(diffs)
 
-    return changes
+    confirmation = (
+        input("Do you want to proceed with these changes? (Y/n): ").strip().lower()
+    )
+    if confirmation == "y":
+        apply_diffs(guild_id, diffs)
+        return True
+    else:
+        print("No changes have been applied.")
+        return False
 
 
-def get_changes_that_will_be_made(match):
+def get_changes_that_will_be_made(guild_id, match):
     from DebugTools.helpers.stat_getters import (
         get_losses_from_match,
         get_wins_from_match,
@@ -187,7 +191,7 @@ def get_changes_that_will_be_made(match):
         else:
             losing_team.append(player)
 
-    mmr_changes = get_mmr_changes(winning_team, losing_team)
+    mmr_changes = get_mmr_changes(guild_id, winning_team, losing_team)
     changes.extend(mmr_changes)
 
     # Use stat getters to calculate other stats
@@ -221,7 +225,9 @@ def get_changes_that_will_be_made(match):
         ],
     ):
         for player_name, new_value in stat_data.items():
-            existing_data = mmr_collection.find_one({"name": player_name})
+            existing_data = mmr_collection.find_one(
+                {"guild_id": str(guild_id), "name": player_name}
+            )
             if existing_data:
                 old_value = existing_data.get(stat_name, 0)
                 new_value = old_value + new_value
@@ -281,7 +287,9 @@ def get_changes_that_will_be_made(match):
     # Increment matches_played for all players in the match
     for player in match["players"]:
         player_name = (player["name"] + "#" + player["tag"]).lower()
-        existing_data = mmr_collection.find_one({"name": player_name})
+        existing_data = mmr_collection.find_one(
+            {"guild_id": str(guild_id), "name": player_name}
+        )
         if existing_data:
             old_matches_played = existing_data.get("matches_played", 0)
             new_matches_played = old_matches_played + 1
@@ -296,29 +304,35 @@ def get_changes_that_will_be_made(match):
     return changes
 
 
-def make_changes(changes: list[StatChange], match=None):
+def make_changes(guild_id, changes: list[StatChange], match=None):
+    # One $set per player holding all of their changed stats
+    updates: dict[str, dict] = {}
     for change in changes:
-        # Add old value to the new value for cumulative stats, replace for calculated stats
-        if change.stat_name in ["average_combat_score", "kill_death_ratio"]:
-            mmr_collection.update_one(
-                {"name": change.player_name}, {"$set": {change.stat_name: change.new}}
-            )
-        else:
-            mmr_collection.update_one(
-                {"name": change.player_name}, {"$set": {change.stat_name: change.new}}
-            )
+        updates.setdefault(change.player_name, {})[change.stat_name] = change.new
+
+    if updates:
+        mmr_collection.bulk_write(
+            [
+                UpdateOne(
+                    {"guild_id": str(guild_id), "name": player_name}, {"$set": fields}
+                )
+                for player_name, fields in updates.items()
+            ],
+            ordered=False,
+        )
 
     print("Changes have been successfully applied to the database.")
 
     if match:
-        all_matches.insert_one(match)
+        all_matches.insert_one({**match, "guild_id": str(guild_id)})
 
 
-def confirm_changes(changes: list[StatChange], match=None):
+def confirm_changes(guild_id, changes: list[StatChange], match=None):
     """
     Confirm with the user if they want to proceed with applying the changes.
 
     Args:
+        guild_id (str): Discord id of the guild whose stats are changed.
         changes (list[StatChange]): List of changes to be confirmed.
 
     Returns:
@@ -331,7 +345,7 @@ def confirm_changes(changes: list[StatChange], match=None):
         input("Do you want to proceed with these changes? (Y/n): ").strip().lower()
     )
     if confirmation == "y":
-        make_changes(changes, match)
+        make_changes(guild_id, changes, match)
         return True
     else:
         print("No changes have been applied.")
@@ -343,7 +357,7 @@ def display_changes(changes: list[StatChange]):
         print(f"{change.player_name} {change.stat_name}: {change.old} -> {change.new}")
 
 
-def get_mmr_changes(winning_team, losing_team) -> list[StatChange]:
+def get_mmr_changes(guild_id, winning_team, losing_team) -> list[StatChange]:
     mmr_changes = []
     MMR_CONSTANT = 32
 
@@ -351,7 +365,9 @@ def get_mmr_changes(winning_team, losing_team) -> list[StatChange]:
 
     for player in winning_team + losing_team:
         riot_name = (player["name"] + "#" + player["tag"]).lower()
-        player_data = mmr_collection.find_one({"name": riot_name})
+        player_data = mmr_collection.find_one(
+            {"guild_id": str(guild_id), "name": riot_name}
+        )
 
         if not player_data:
             # Initialize missing player data in the database
@@ -360,6 +376,7 @@ def get_mmr_changes(winning_team, losing_team) -> list[StatChange]:
                 {"name": player["name"].lower(), "tag": player["tag"].lower()}
             ).get("discord_id", 0)
             player_data = {
+                "guild_id": str(guild_id),
                 "player_id": discord_id,
                 "name": riot_name,
                 "mmr": default_mmr,
@@ -412,72 +429,3 @@ def get_mmr_changes(winning_team, losing_team) -> list[StatChange]:
         mmr_changes.append(mmr_change)
 
     return mmr_changes
-
-
-def get_mmr_values_multiple_teams(winning_teams, losing_teams) -> dict:
-    MMR_CONSTANT = 32
-
-    player_mmr_data = {}
-    for winning_team, losing_team in zip(winning_teams, losing_teams):
-        for player in winning_team + losing_team:
-            riot_name = (player["name"] + "#" + player["tag"]).lower()
-            player_data = mmr_collection.find_one({"name": riot_name})
-
-            if not player_data:
-                # Initialize missing player data in the database
-                default_mmr = 1000
-                discord_id = users.find_one(
-                    {"name": player["name"].lower(), "tag": player["tag"].lower()}
-                ).get("discord_id", 0)
-                player_data = {
-                    "player_id": discord_id,
-                    "name": riot_name,
-                    "mmr": default_mmr,
-                    "wins": 0,
-                    "losses": 0,
-                    "total_combat_score": 0,
-                    "total_kills": 0,
-                    "total_deaths": 0,
-                    "matches_played": 0,
-                    "total_rounds_played": 0,
-                    "average_combat_score": 0,
-                    "kill_death_ratio": 0,
-                }
-                mmr_collection.insert_one(player_data)
-
-            if riot_name not in player_mmr_data:
-                player_mmr_data[riot_name] = player_data["mmr"]
-
-        # Calculate average MMR for winning and losing teams
-        winning_team_mmr = sum(
-            player_mmr_data[(player["name"] + "#" + player["tag"]).lower()]
-            for player in winning_team
-        ) / len(winning_team)
-        losing_team_mmr = sum(
-            player_mmr_data[(player["name"] + "#" + player["tag"]).lower()]
-            for player in losing_team
-        ) / len(losing_team)
-
-        # Calculate expected results
-        expected_win = 1 / (1 + 10 ** ((losing_team_mmr - winning_team_mmr) / 400))
-        expected_loss = 1 / (1 + 10 ** ((winning_team_mmr - losing_team_mmr) / 400))
-
-        # Adjust MMR for winning team
-        for player in winning_team:
-            riot_name = (player["name"] + "#" + player["tag"]).lower()
-            current_mmr = player_mmr_data[riot_name]
-            new_mmr = current_mmr + MMR_CONSTANT * (1 - expected_win)
-            new_mmr = round(new_mmr)
-
-            player_mmr_data[riot_name] = new_mmr
-
-        # Adjust MMR for losing team
-        for player in losing_team:
-            riot_name = (player["name"] + "#" + player["tag"]).lower()
-            current_mmr = player_mmr_data[riot_name]
-            new_mmr = current_mmr + MMR_CONSTANT * (0 - expected_loss)
-            new_mmr = round(new_mmr)
-
-            player_mmr_data[riot_name] = new_mmr
-
-    return player_mmr_data
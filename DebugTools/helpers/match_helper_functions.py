@@ -119,12 +119,13 @@ def convert_to_central_time(utc_timestamp):
     return central_time.isoformat()
 
 
-def get_matches_from_season(start_time, end_time=""):
-    # Construct the query
+def get_matches_from_season(guild_id, start_time, end_time=""):
+    # Construct the query; matches carry the guild they were reported in
     if end_time:
-        query = {"metadata.started_at": {"$gte": start_time, "$lte": end_time}}
+        started_at = {"$gte": start_time, "$lte": end_time}
     else:
-        query = {"metadata.started_at": {"$gte": start_time}}
+        started_at = {"$gte": start_time}
+    query = {"guild_id": str(guild_id), "metadata.started_at": started_at}
     unique_matches_dict = {}
     # Execute the query and return the results
     matches = all_matches.find(query)
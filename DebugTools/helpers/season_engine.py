@@ -0,0 +1,234 @@
+"""
+Single-pass, NumPy-backed recomputation of a season's stats.
+
+The matchlist is read once into columnar arrays with one entry per player
+appearance; every aggregate is then one `np.bincount` per stat. MMR is evolved
+with the bot's own formula (`stats_helper._calc_mmr_delta`) in match order,
+except that matches sharing no player with an earlier unprocessed match are
+independent, so they are grouped into waves and each wave is one vectorised
+step. Works on raw v4 payloads and lean match records.
+"""
+
+import numpy as np
+
+from match_archive import rounds_played
+
+BASE_MMR = 1000
+
+# Stats read from every player appearance
+_APPEARANCE_STATS = ("score", "kills", "deaths", "assists")
+
+# Columns of SeasonArrays' appearance rows
+_COLUMNS = ("player", "match", "team", "won", *_APPEARANCE_STATS)
+
+# Upper bounds of the round difference steps in _calc_mmr_delta (<4, <7, ...)
+_ROUND_DIFF_STEPS = np.array([4, 7, 10, 13])
+
+
+def riot_name(player) -> str:
+    return ((player.get("name") or "") + "#" + (player.get("tag") or "")).lower()
+
+
+def _team_rounds_won(team) -> int:
+    # Team rounds are an int or {"won": n, "lost": m} across payload versions
+    rounds = team.get("rounds_won", team.get("rounds"))
+    if isinstance(rounds, dict):
+        rounds = rounds.get("won")
+    return int(rounds or 0)
+
+
+class SeasonArrays:
+    """
+    A season as flat arrays with one entry per player appearance.
+
+    `player` indexes into `players`, `match` is the match's position in the
+    matchlist, `team` is 0 or 1 and `won` marks the winning side (a draw has
+    no winner). `wave[match]` is the MMR evaluation wave of each match.
+    """
+
+    def __init__(self, matchlist):
+        self.players: list[str] = []
+        self.index: dict[str, int] = {}
+        index, players_seen = self.index, self.players
+        # One flat row of _COLUMNS per appearance, converted to arrays once
+        rows: list[int] = []
+        rounds, round_diff, wave = [], [], []
+        last_wave: dict[int, int] = {}
+
+        for m, match in enumerate(matchlist):
+            players = match.get("players") or []
+            rounds_won = {
+                t.get("team_id"): _team_rounds_won(t) for t in match.get("teams") or []
+            }
+            team_ids = sorted(
+                set(rounds_won) | {p.get("team_id") for p in players}, key=str
+            )
+            winner, diff = None, 0
+            if len(team_ids) == 2:
+                a, b = (rounds_won.get(t, 0) for t in team_ids)
+                winner = team_ids[0] if a > b else team_ids[1] if b > a else None
+                diff = abs(a - b)
+            rounds.append(rounds_played(match))
+            round_diff.append(diff)
+
+            first_team = team_ids[0]
+            match_wave = 0
+            ids = []
+            for p in players:
+                name = ((p.get("name") or "") + "#" + (p.get("tag") or "")).lower()
+                i = index.get(name)
+                if i is None:
+                    i = index[name] = len(players_seen)
+                    players_seen.append(name)
+                ids.append(i)
+                # One wave after the latest match any of these players was in
+                seen = last_wave.get(i, -1) + 1
+                if seen > match_wave:
+                    match_wave = seen
+                team_id = p.get("team_id")
+                p_stats = p.get("stats") or {}
+                rows += (
+                    i,
+                    m,
+                    team_id != first_team,
+                    team_id == winner,
+                    p_stats.get("score") or 0,
+                    p_stats.get("kills") or 0,
+                    p_stats.get("deaths") or 0,
+                    p_stats.get("assists") or 0,
+                )
+            last_wave.update(dict.fromkeys(ids, match_wave))
+            wave.append(match_wave)
+
+        columns = np.array(rows, dtype=np.int64).reshape(-1, len(_COLUMNS)).T
+        self.player, self.match, self.team, won, *stats = columns
+        self.won = won.astype(bool)
+        self.stats = dict(zip(_APPEARANCE_STATS, stats))
+        self.rounds = np.array(rounds, dtype=np.int64)
+        self.round_diff = np.array(round_diff, dtype=np.int64)
+        self.wave = np.array(wave, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.rounds)
+
+
+def aggregate(season: SeasonArrays) -> dict[str, np.ndarray]:
+    """Per-player season totals and averages, as arrays indexed like `players`."""
+    n = len(season.players)
+
+    def total(values=None):
+        sums = np.bincount(season.player, weights=values, minlength=n)
+        return np.rint(sums).astype(np.int64)
+
+    totals = {
+        "matches_played": total(),
+        "wins": total(season.won),
+        "total_combat_score": total(season.stats["score"]),
+        "total_kills": total(season.stats["kills"]),
+        "total_deaths": total(season.stats["deaths"]),
+        "total_assists": total(season.stats["assists"]),
+        "total_rounds_played": total(season.rounds[season.match]),
+    }
+    totals["losses"] = totals["matches_played"] - totals["wins"]
+
+    rounds = totals["total_rounds_played"]
+    kills, deaths = totals["total_kills"], totals["total_deaths"]
+    totals["average_combat_score"] = np.divide(
+        totals["total_combat_score"], rounds, out=np.zeros(n), where=rounds > 0
+    )
+    totals["kill_death_ratio"] = np.divide(
+        kills, deaths, out=kills.astype(float), where=deaths > 0
+    )
+    return totals
+
+
+def mmr_evolution(season: SeasonArrays, start_mmr=None):
+    """
+    Replay MMR through the season, with the same result as reporting every
+    match in order.
+
+    Returns (final MMR per player, MMR delta per appearance).
+    `start_mmr` maps riot names to their MMR before the first match.
+    """
+    mmr = np.full(len(season.players), float(BASE_MMR))
+    for name, value in (start_mmr or {}).items():
+        if name in season.index:
+            mmr[season.index[name]] = value
+    if not len(season.player):
+        return mmr, np.zeros(0, dtype=np.int64)
+
+    # Appearances ordered by wave; each (match, team) side gets a dense id, so
+    # the team sums of a wave are one bincount over a contiguous id range
+    order = np.lexsort((season.team, season.match, season.wave[season.match]))
+    player, match = season.player[order], season.match[order]
+    side_key = match * 2 + season.team[order]
+    new_side = np.r_[True, side_key[1:] != side_key[:-1]]
+    side = np.cumsum(new_side) - 1
+    side_of = dict(zip(side_key[new_side].tolist(), side[new_side].tolist()))
+    opp_side = np.array([side_of.get(k ^ 1, -1) for k in side_key.tolist()])
+
+    # Everything that doesn't depend on the running MMR is computed up front
+    rounds = season.rounds[match]
+    acs = np.divide(
+        season.stats["score"][order], rounds, out=np.zeros(len(order)), where=rounds > 0
+    )
+    won = season.won[order]
+    sign = np.where(won, 1.0, -1.0)
+    bonus = np.searchsorted(_ROUND_DIFF_STEPS, season.round_diff[match], side="right")
+    waves = season.wave[match]
+    bounds = np.searchsorted(waves, np.arange(waves.max(initial=-1) + 2))
+
+    # Side ids relative to the first side of their wave; a side with no
+    # opponents points one past the wave's last side, where the sum is 0
+    first_side = side[np.minimum(bounds[:-1], len(side) - 1)]
+    side_count = np.diff(np.r_[first_side, side[-1:] + 1])
+    own_rel = side - first_side[waves]
+    opp_rel = np.where(opp_side >= 0, opp_side - first_side[waves], side_count[waves])
+
+    deltas = np.zeros(len(order), dtype=np.int64)
+    for start, end, count in zip(
+        bounds[:-1].tolist(), bounds[1:].tolist(), (side_count + 1).tolist()
+    ):
+        wave = slice(start, end)
+        idx = player[wave]
+        before = mmr[idx]
+        sums = np.bincount(own_rel[wave], weights=before, minlength=count)
+        own, opp = sums[own_rel[wave]], sums[opp_rel[wave]]
+        valid = (own > 0) & (opp > 0)
+        if not valid.all():
+            own, opp = np.where(valid, own, 1.0), np.where(valid, opp, 1.0)
+
+        ratio = np.where(won[wave], opp / own, own / opp)
+        base = ratio * 16 * sign[wave] + ((ratio * acs[wave]) // 100 - 2)
+        delta = np.floor(base + bonus[wave] * ratio * sign[wave])
+        deltas[wave] = np.where(valid, delta, 0)
+        mmr[idx] = before + deltas[wave]
+
+    appearance_deltas = np.empty_like(deltas)
+    appearance_deltas[order] = deltas
+    return mmr, appearance_deltas
+
+
+def recompute_season(matchlist, start_mmr=None) -> dict[str, dict]:
+    """Season stats per riot name, in the shape of `mmr_data` documents."""
+    season = SeasonArrays(matchlist)
+    totals = aggregate(season)
+    mmr, _ = mmr_evolution(season, start_mmr)
+    fields = (
+        "wins",
+        "losses",
+        "total_combat_score",
+        "total_kills",
+        "total_deaths",
+        "matches_played",
+        "total_rounds_played",
+        "average_combat_score",
+        "kill_death_ratio",
+    )
+    return {
+        name: {
+            "mmr": int(mmr[i]),
+            **{field: totals[field][i].item() for field in fields},
+        }
+        for i, name in enumerate(season.players)
+    }
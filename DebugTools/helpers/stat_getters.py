@@ -1,3 +1,11 @@
+# Rounds played in a lean match record ("metadata.rounds_played") or a raw payload
+def get_rounds_played(match) -> int:
+    rounds_played = match.get("metadata", {}).get("rounds_played")
+    if rounds_played is not None:
+        return rounds_played
+    return len(match["rounds"])
+
+
 # Get total rounds played for each player in the match
 def get_total_rounds_played_from_match(match) -> dict[str, int]:
     # Track all player losses
@@ -8,7 +16,7 @@ def get_total_rounds_played_from_match(match) -> dict[str, int]:
     for player in match["players"]:
         riot_name = (player["name"] + "#" + player["tag"]).lower()
 
-        player_total_rounds_played[riot_name] = len(match["rounds"])
+        player_total_rounds_played[riot_name] = get_rounds_played(match)
 
     return player_total_rounds_played
 
@@ -24,7 +32,7 @@ def get_total_rounds_played_from_matchlist(matchlist) -> dict[str, int]:
 
             player_total_rounds_played[riot_name] = player_total_rounds_played.get(
                 riot_name, 0
-            ) + len(match["rounds"])
+            ) + get_rounds_played(match)
 
     return player_total_rounds_played
 
@@ -0,0 +1,315 @@
+"""
+Independent tool that benchmarks the report pipeline (report_pipeline.py) on
+synthetic HenrikDev v4 matches, against the in-memory storage backend.
+
+A population of linked players with existing stats is created, then every
+report runs the same code as `!report` after the HenrikDev fetch: roster
+match, team detection, update_stats and the MMR ledger, persistence, top
+player detection and the write-behind archive. Latency percentiles and
+database operations are reported per stage. No Discord or database
+connection is used.
+
+Run from the repository root:
+    python -m DebugTools.tools.benchmark_report [--reports N] [--players N] [--seed N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import statistics
+from collections import Counter, defaultdict
+
+# Everything runs against memory_store; must be set before database is imported
+os.environ["storage_backend"] = "memory"
+
+import discord
+
+from bot import CustomBot
+from guild_stats import GuildStats
+from database import client, mmr_collection, users
+from db_indexes import ensure_indexes
+from match_session import MatchSession
+from report_pipeline import run_report
+from timing import StageTimer
+from user_directory import directory
+from write_queue import write_queue
+
+AGENTS = ["Jett", "Sova", "Omen", "Killjoy", "Sage", "Raze", "Cypher", "Skye"]
+WEAPONS = ["Vandal", "Phantom", "Operator", "Sheriff", "Spectre", "Ghost"]
+MAPS = ["Ascent", "Bind", "Haven", "Lotus", "Split", "Sunset", "Icebox"]
+
+# Every synthetic player belongs to one guild's ladder
+GUILD_ID = 1
+
+
+class CountingTimer(StageTimer):
+    """StageTimer that also attributes database operations to each stage."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.ops: dict[str, Counter] = {}
+        self._last_ops = client.op_counts()
+
+    def mark(self, label: str) -> float:
+        elapsed = super().mark(label)
+        now = client.op_counts()
+        self.ops[label] = self.ops.get(label, Counter()) + (now - self._last_ops)
+        self._last_ops = now
+        return elapsed
+
+
+def synthetic_population(size: int, rng: random.Random) -> list[dict]:
+    return [
+        {
+            "discord_id": str(10**17 + i),
+            "name": f"Bench{i}",
+            "tag": f"{rng.randint(1000, 9999)}",
+            "puuid": f"puuid-{i:06d}",
+        }
+        for i in range(size)
+    ]
+
+
+def _existing_stats(user: dict, rng: random.Random) -> dict:
+    matches = rng.randint(0, 60)
+    rounds = matches * rng.randint(18, 24)
+    kills, deaths = matches * rng.randint(10, 22), matches * rng.randint(10, 20)
+    combat_score = rounds * rng.randint(150, 260)
+    return {
+        "guild_id": str(GUILD_ID),
+        "player_id": user["discord_id"],
+        "name": f"{user['name']}#{user['tag']}",
+        "mmr": rng.randint(700, 1400),
+        "wins": matches // 2,
+        "losses": matches - matches // 2,
+        "total_combat_score": combat_score,
+        "total_kills": kills,
+        "total_deaths": deaths,
+        "matches_played": matches,
+        "total_rounds_played": rounds,
+        "average_combat_score": combat_score / rounds if rounds else 0,
+        "kill_death_ratio": kills / deaths if deaths else kills,
+    }
+
+
+def synthetic_v4_match(n: int, red: list, blue: list, rng: random.Random) -> dict:
+    """
+    A HenrikDev v4 match payload between two teams of linked users, with the
+    per-round player stats and kill feed that make real payloads large.
+    """
+    red_won = rng.random() < 0.5
+    loser_rounds = rng.randint(0, 11)
+    total = 13 + loser_rounds
+    red_rounds = 13 if red_won else loser_rounds
+    roster = [(user, "Red") for user in red] + [(user, "Blue") for user in blue]
+
+    def player_ref(user, team):
+        return {
+            "puuid": user["puuid"],
+            "name": user["name"],
+            "tag": user["tag"],
+            "team": team,
+        }
+
+    rounds, kills = [], []
+    totals = defaultdict(Counter)
+    winners = ["Red"] * red_rounds + ["Blue"] * (total - red_rounds)
+    rng.shuffle(winners)
+    for r, winner in enumerate(winners):
+        round_stats = []
+        for user, team in roster:
+            round_kills = rng.choice([0, 0, 0, 1, 1, 2, 3])
+            score = rng.randint(0, 120) + 150 * round_kills
+            totals[user["puuid"]].update(
+                score=score, kills=round_kills, headshots=rng.randint(0, round_kills)
+            )
+            round_stats.append(
+                {
+                    "player": player_ref(user, team),
+                    "ability_casts": {"grenade": 1, "ability1": 0, "ability2": 1},
+                    "stats": {
+                        "score": score,
+                        "kills": round_kills,
+                        "headshots": 0,
+                        "bodyshots": round_kills * 3,
+                        "legshots": 0,
+                    },
+                    "economy": {
+                        "loadout_value": rng.randint(800, 5000),
+                        "remaining": rng.randint(0, 3000),
+                        "weapon": {"name": rng.choice(WEAPONS)},
+                        "armor": {"name": "Heavy Shields"},
+                    },
+                    "was_afk": False,
+                    "received_penalty": False,
+                    "stayed_in_spawn": False,
+                }
+            )
+            for _ in range(round_kills):
+                victim, victim_team = rng.choice(roster)
+                kills.append(
+                    {
+                        "round": r,
+                        "time_in_round_in_ms": rng.randint(5_000, 100_000),
+                        "killer": player_ref(user, team),
+                        "victim": player_ref(victim, victim_team),
+                        "weapon": {"name": rng.choice(WEAPONS)},
+                        "location": {
+                            "x": rng.randint(0, 9000),
+                            "y": rng.randint(0, 9000),
+                        },
+                    }
+                )
+                totals[victim["puuid"]].update(deaths=1)
+        rounds.append(
+            {
+                "id": r,
+                "result": "Elimination",
+                "ceremony": "CeremonyDefault",
+                "winning_team": winner,
+                "stats": round_stats,
+            }
+        )
+
+    players = []
+    for user, team in roster:
+        stats = totals[user["puuid"]]
+        players.append(
+            {
+                "puuid": user["puuid"],
+                "name": user["name"],
+                "tag": user["tag"],
+                "team_id": team,
+                "agent": {"id": "agent", "name": rng.choice(AGENTS)},
+                "stats": {
+                    "score": stats["score"],
+                    "kills": stats["kills"],
+                    "deaths": stats["deaths"],
+                    "assists": rng.randint(0, 10),
+                    "headshots": stats["headshots"],
+                    "bodyshots": stats["kills"] * 3,
+                    "legshots": 0,
+                    "damage": {"dealt": stats["score"] // 2, "received": 2500},
+                },
+                "ability_casts": {"grenade": total, "ability1": total},
+                "economy": {"spent": {"overall": 60_000}},
+            }
+        )
+
+    map_name = rng.choice(MAPS)
+    return {
+        "metadata": {
+            "match_id": f"bench-{n:08d}",
+            "map": {"id": map_name.lower(), "name": map_name},
+            "game_version": "release-10.00",
+            "game_length_in_ms": total * 100_000,
+            "started_at": "2025-01-01T00:00:00.000Z",
+            "is_completed": True,
+            "queue": {"id": "custom", "name": "Custom Game"},
+            "region": "na",
+            "cluster": "US Central",
+        },
+        "players": players,
+        "teams": [
+            {
+                "team_id": "Red",
+                "won": red_won,
+                "rounds": {"won": red_rounds, "lost": total - red_rounds},
+            },
+            {
+                "team_id": "Blue",
+                "won": not red_won,
+                "rounds": {"won": total - red_rounds, "lost": red_rounds},
+            },
+        ],
+        "rounds": rounds,
+        "kills": kills,
+    }
+
+
+async def setup_guild(population: list[dict], rng: random.Random) -> GuildStats:
+    await users.insert_many([dict(user) for user in population])
+    await mmr_collection.insert_many(
+        [_existing_stats(user, rng) for user in population]
+    )
+    bot = CustomBot(command_prefix="!", intents=discord.Intents.default())
+    await directory.load()
+    await ensure_indexes()
+    return await bot.stats_for(GUILD_ID)
+
+
+def percentile(values: list[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+async def benchmark_report(reports: int = 200, players: int = 1000, seed: int = 10):
+    rng = random.Random(seed)
+    population = synthetic_population(players, rng)
+    guild_stats = await setup_guild(population, rng)
+    print(f"Reporting {reports} synthetic matches over {players} linked players")
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    ops: dict[str, Counter] = defaultdict(Counter)
+    for n in range(reports):
+        picked = rng.sample(population, 10)
+        red, blue = picked[:5], picked[5:]
+        session = MatchSession(f"bench-{n}", guild_stats)
+        session.team1 = [{"id": u["discord_id"], "name": u["name"]} for u in red]
+        session.team2 = [{"id": u["discord_id"], "name": u["name"]} for u in blue]
+        session.queue = session.team1 + session.team2
+        match = synthetic_v4_match(n, red, blue, rng)
+
+        timer = CountingTimer("report")
+        with contextlib.redirect_stdout(io.StringIO()):
+            await run_report(session, match, timer)
+            # Writes queued by the record stage, applied in the background
+            await write_queue.flush()
+            timer.mark("write-behind")
+
+        for label, secs in timer.stages.items():
+            latencies[label].append(secs * 1000)
+        latencies["total"].append(timer.total * 1000)
+        for label, counter in timer.ops.items():
+            ops[label].update(counter)
+
+    print(
+        f"\n{'stage':<14}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  db ops"
+    )
+    for label, values in latencies.items():
+        per_report = ops.get(label, Counter())
+        described = ", ".join(
+            f"{op.split('.', 1)[1]}={count / reports:g}"
+            for op, count in sorted(per_report.items())
+        )
+        print(
+            f"{label:<14}{percentile(values, 50):9.2f}{percentile(values, 95):9.2f}"
+            f"{percentile(values, 99):9.2f}{max(values):9.2f}  {described or '-'}"
+        )
+    total_ops = sum(sum(counter.values()) for counter in ops.values())
+    print(f"\n{total_ops / reports:g} database operations per report")
+    await write_queue.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the report pipeline on synthetic matches."
+    )
+    parser.add_argument(
+        "--reports", type=int, default=200, help="matches to report (default: 200)"
+    )
+    parser.add_argument(
+        "--players",
+        type=int,
+        default=1000,
+        help="linked players to draw teams from (default: 1000)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=10, help="random seed (default: 10)"
+    )
+    args = parser.parse_args()
+    asyncio.run(benchmark_report(args.reports, args.players, args.seed))
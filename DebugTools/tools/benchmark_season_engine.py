@@ -0,0 +1,206 @@
+"""
+Independent tool that benchmarks the NumPy season engine (see
+DebugTools/helpers/season_engine.py) against the per-stat matchlist helpers
+and the bot's own sequential `update_stats`, on a synthetic season. Every
+result is checked against the existing code before timings are reported;
+each timing is the best of several runs. No database is used.
+
+Reading the match dicts is one Python pass either way, and it dominates the
+aggregates: the engine's aggregates are only about as fast as the helpers.
+The gain is in MMR evolution.
+
+Run from the repository root:
+    python -m DebugTools.tools.benchmark_season_engine [--matches N] [--players N]
+        [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import time
+
+# update_stats is only handed dicts, keep the storage module off the network
+os.environ.setdefault("storage_backend", "memory")
+
+from DebugTools.helpers import stat_getters
+from DebugTools.helpers.season_engine import (
+    SeasonArrays,
+    aggregate,
+    mmr_evolution,
+    riot_name,
+)
+from stats_helper import update_stats
+
+
+def synthetic_match(n: int, roster: list[str], rng: random.Random) -> dict:
+    """A v4-shaped match payload between two random teams of five."""
+    picked = rng.sample(roster, 10)
+    winner_rounds = 13
+    loser_rounds = rng.randint(0, 11)
+    red_won = rng.random() < 0.5
+    total = winner_rounds + loser_rounds
+    red, blue = (
+        (winner_rounds, loser_rounds) if red_won else (loser_rounds, winner_rounds)
+    )
+    players = []
+    for i, riot_id in enumerate(picked):
+        name, tag = riot_id.split("#")
+        kills = rng.randint(2, 35)
+        players.append(
+            {
+                "puuid": f"puuid-{riot_id}",
+                "name": name,
+                "tag": tag,
+                "team_id": "Red" if i < 5 else "Blue",
+                "agent": {"name": "Jett"},
+                "stats": {
+                    "score": rng.randint(80, 350) * total,
+                    "kills": kills,
+                    "deaths": rng.randint(5, 25),
+                    "assists": rng.randint(0, 15),
+                    "headshots": rng.randint(0, kills),
+                },
+            }
+        )
+    return {
+        "metadata": {
+            "match_id": f"synthetic-{n}",
+            "map": {"id": "ascent", "name": "Ascent"},
+            "queue": {"id": "custom"},
+            "started_at": f"2025-01-01T00:00:{n % 60:02d}.000Z",
+        },
+        "teams": [
+            {"team_id": "Red", "won": red_won, "rounds": {"won": red, "lost": blue}},
+            {
+                "team_id": "Blue",
+                "won": not red_won,
+                "rounds": {"won": blue, "lost": red},
+            },
+        ],
+        "players": players,
+        "rounds": [{} for _ in range(total)],
+    }
+
+
+def synthetic_season(matches: int, players: int, seed: int = 10) -> list[dict]:
+    rng = random.Random(seed)
+    roster = [f"Player{i}#NA{i % 7}" for i in range(players)]
+    return [synthetic_match(n, roster, rng) for n in range(matches)]
+
+
+def sequential_mmr(matchlist) -> dict:
+    """MMR the way the report applies it: one update_stats call per player."""
+    player_mmr, player_names = {}, {}
+    for match in matchlist:
+        rounds = stat_getters.get_rounds_played(match)
+        winner = stat_getters.get_winning_team_id(match)
+        rounds_won = {t["team_id"]: t["rounds"]["won"] for t in match["teams"]}
+        round_diff = abs(rounds_won["Red"] - rounds_won["Blue"])
+        sums = {"Red": 0, "Blue": 0}
+        for player in match["players"]:
+            before = player_mmr.get(riot_name(player), {}).get("mmr", 1000)
+            sums[player["team_id"]] += int(before)
+        for player in match["players"]:
+            team = player["team_id"]
+            update_stats(
+                player,
+                rounds,
+                player_mmr,
+                player_names,
+                team_sum_mmr=sums[team],
+                opp_sum_mmr=sums["Blue" if team == "Red" else "Red"],
+                team_won=team == winner,
+                round_diff=round_diff,
+                discord_id=riot_name(player),
+            )
+    return {name: stats["mmr"] for name, stats in player_mmr.items()}
+
+
+def timed(label: str, fn, *args, repeat: int = 1):
+    """Result of `fn(*args)` and its best time over `repeat` runs."""
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    print(f"  {label:<38} {elapsed * 1000:9.1f} ms")
+    return result, elapsed
+
+
+def helper_aggregates(matchlist) -> dict:
+    return {
+        "wins": stat_getters.get_wins_from_matchlist(matchlist),
+        "total_combat_score": stat_getters.get_combat_score_from_matchlist(matchlist),
+        "total_kills": stat_getters.get_kills_from_matchlist(matchlist),
+        "total_deaths": stat_getters.get_deaths_from_matchlist(matchlist),
+        "total_rounds_played": stat_getters.get_total_rounds_played_from_matchlist(
+            matchlist
+        ),
+    }
+
+
+def check(name: str, expected: dict, season: SeasonArrays, values):
+    got = {player: values[i].item() for i, player in enumerate(season.players)}
+    if got != expected:
+        wrong = [p for p in expected if expected[p] != got.get(p)]
+        raise AssertionError(f"{name} differs for {len(wrong)} players: {wrong[:5]}")
+
+
+def benchmark_season_engine(matches: int = 5000, players: int = 150, repeat: int = 5):
+    print(f"Building a synthetic season of {matches} matches, {players} players")
+    matchlist = synthetic_season(matches, players)
+
+    print("Aggregates:")
+    expected, helper_time = timed(
+        "stat_getters (one pass per stat)", helper_aggregates, matchlist, repeat=repeat
+    )
+    season, load_time = timed(
+        "engine load (columnar arrays)", SeasonArrays, matchlist, repeat=repeat
+    )
+    totals, aggregate_time = timed("engine aggregate", aggregate, season, repeat=repeat)
+    engine_time = load_time + aggregate_time
+    for name, values in expected.items():
+        check(name, values, season, totals[name])
+
+    print("MMR evolution:")
+    expected_mmr, sequential_time = timed(
+        "update_stats (per player, per match)",
+        sequential_mmr,
+        matchlist,
+        repeat=repeat,
+    )
+    (mmr, _), evolution_time = timed(
+        "engine mmr_evolution", mmr_evolution, season, repeat=repeat
+    )
+    check("mmr", expected_mmr, season, mmr.astype(int))
+
+    print("All engine results match the existing helpers.")
+    print(
+        f"Aggregates (load included): {helper_time / engine_time:.2f}x, "
+        f"MMR: {sequential_time / evolution_time:.1f}x, "
+        f"whole season: "
+        f"{(helper_time + sequential_time) / (engine_time + evolution_time):.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the season engine on a synthetic season."
+    )
+    parser.add_argument(
+        "--matches",
+        type=int,
+        default=5000,
+        help="matches in the season (default: 5000)",
+    )
+    parser.add_argument(
+        "--players", type=int, default=150, help="players in the season (default: 150)"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="runs per timing, the best is reported (default: 5)",
+    )
+    args = parser.parse_args()
+    benchmark_season_engine(args.matches, args.players, args.repeat)
@@ -113,8 +113,9 @@ def lower_names():
 
 def reset_collection_to_defaults():
     """
-    Reset all documents in the MMR collection to their default values.
+    Reset one guild's documents in the MMR collection to their default values.
     """
+    guild_id = input("Discord id of the guild to reset: ").strip()
     default_values = {
         "mmr": 1000,
         "wins": 0,
@@ -136,7 +137,9 @@ def reset_collection_to_defaults():
         .lower()
     )
     if confirmation == "y":
-        result = mmr_collection.update_many({}, {"$set": default_values})
+        result = mmr_collection.update_many(
+            {"guild_id": guild_id}, {"$set": default_values}
+        )
         print(f"Reset {result.modified_count} documents to default values.")
     else:
         print("No changes have been applied.")
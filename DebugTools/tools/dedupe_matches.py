@@ -0,0 +1,52 @@
+"""
+Independent tool that removes duplicate match documents (the same
+`metadata.match_id` reported more than once), keeping the earliest copy. Once
+a collection has no duplicates left, the bot's startup index provisioning can
+build the unique match id index that blocks new ones.
+"""
+
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+
+from globals import URI_KEY
+
+client = MongoClient(URI_KEY, server_api=ServerApi("1"))
+
+# Initialize MongoDB Collections
+db = client["valorant"]
+match_collections = [db["matches"], db["tdm_matches"]]
+
+
+def find_duplicate_ids(collection) -> list:
+    """_ids of every copy after the first, per match id."""
+    pipeline = [
+        {"$match": {"metadata.match_id": {"$type": "string"}}},
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$metadata.match_id", "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ]
+    duplicate_ids = []
+    for group in collection.aggregate(pipeline, allowDiskUse=True):
+        duplicate_ids.extend(group["ids"][1:])
+    return duplicate_ids
+
+
+def dedupe_matches():
+    for collection in match_collections:
+        duplicate_ids = find_duplicate_ids(collection)
+        if not duplicate_ids:
+            print(f"{collection.name}: no duplicate matches.")
+            continue
+
+        confirm = input(
+            f"{collection.name}: delete {len(duplicate_ids)} duplicate match documents? (Y/n): "
+        )
+        if confirm.lower() != "y":
+            print("Skipped.")
+            continue
+        result = collection.delete_many({"_id": {"$in": duplicate_ids}})
+        print(f"{collection.name}: deleted {result.deleted_count} duplicates.")
+
+
+if __name__ == "__main__":
+    dedupe_matches()
@@ -10,7 +10,7 @@ from DebugTools.helpers.change_helper_functions import (
 )
 
 
-def get_match_to_upload(matchlist):
+def get_match_to_upload(guild_id, matchlist):
     while True:
         print(f"Select match to upload (0-{len(matchlist) - 1})")
 
@@ -29,7 +29,8 @@ def get_match_to_upload(matchlist):
         ).lower()
         if confirm_match == "y":
             confirm_changes(
-                get_changes_that_will_be_made(matchlist[match_index]),
+                guild_id,
+                get_changes_that_will_be_made(guild_id, matchlist[match_index]),
                 matchlist[match_index],
             )
             return matchlist[match_index]
@@ -39,4 +40,5 @@ def get_match_to_upload(matchlist):
 if __name__ == "__main__":
     recent_matches = get_custom_matchlist("duck", "mst")
 
-    get_match_to_upload(recent_matches)
+    guild_id = input("Discord id of the guild the match was played in: ").strip()
+    get_match_to_upload(guild_id, recent_matches)
@@ -0,0 +1,82 @@
+"""
+Independent tool that rewrites raw HenrikDev payloads in `matches` as lean match
+records (see match_archive.py), optionally keeping the compressed raw payload in
+`matches_raw` first. Documents already in the lean format are skipped, so the
+tool can be re-run safely.
+"""
+
+from pymongo import ReplaceOne
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+
+from globals import URI_KEY
+from match_archive import lean_match, raw_archive_doc
+
+client = MongoClient(URI_KEY, server_api=ServerApi("1"))
+
+# Initialize MongoDB Collections
+db = client["valorant"]
+users = db["users"]
+all_matches = db["matches"]
+raw_matches = db["matches_raw"]
+
+BATCH_SIZE = 50
+
+
+def get_discord_ids() -> dict[tuple[str, str], str]:
+    discord_ids = {}
+    for user in users.find({}, {"discord_id": 1, "name": 1, "tag": 1}):
+        name = (user.get("name") or "").lower()
+        tag = (user.get("tag") or "").lower()
+        if name and tag and user.get("discord_id"):
+            discord_ids[(name, tag)] = str(user["discord_id"])
+    return discord_ids
+
+
+def flush(hot_ops: list, cold_ops: list):
+    # Cold copies go first so a payload is never dropped before it is archived
+    if cold_ops:
+        raw_matches.bulk_write(cold_ops, ordered=False)
+    if hot_ops:
+        all_matches.bulk_write(hot_ops, ordered=False)
+    hot_ops.clear()
+    cold_ops.clear()
+
+
+def migrate_match_archive():
+    total = all_matches.count_documents({"format": {"$exists": False}})
+    if not total:
+        print("Every match is already in the lean format.")
+        return
+
+    confirm = input(
+        f"{total} raw match documents will be rewritten as lean records. Continue? (Y/n): "
+    )
+    if confirm.lower() != "y":
+        print("Canceled.")
+        return
+    keep_raw = input("Keep a compressed copy in 'matches_raw'? (Y/n): ").lower() == "y"
+
+    discord_ids = get_discord_ids()
+    hot_ops, cold_ops = [], []
+    migrated = 0
+    for match in all_matches.find({"format": {"$exists": False}}):
+        if keep_raw:
+            raw_doc = raw_archive_doc(match)
+            if raw_doc["_id"]:
+                cold_ops.append(
+                    ReplaceOne({"_id": raw_doc["_id"]}, raw_doc, upsert=True)
+                )
+        hot_ops.append(
+            ReplaceOne({"_id": match["_id"]}, lean_match(match, discord_ids))
+        )
+        migrated += 1
+        if len(hot_ops) >= BATCH_SIZE:
+            flush(hot_ops, cold_ops)
+            print(f"Migrated {migrated}/{total} matches...")
+    flush(hot_ops, cold_ops)
+    print(f"Done. Migrated {migrated} matches.")
+
+
+if __name__ == "__main__":
+    migrate_match_archive()
@@ -0,0 +1,94 @@
+"""
+Independent tool that rebuilds player stats from the MMR ledger (see
+mmr_ledger.py) as of any point in time, without wiping anything. The rebuilt
+state of one guild can be inspected, and optionally written back to
+mmr_data/tdm_mmr_data.
+This replaces re-running every season match through
+set_data_from_stored_matches.py.
+"""
+
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+
+from globals import URI_KEY
+from mmr_ledger import replay
+
+client = MongoClient(URI_KEY, server_api=ServerApi("1"))
+
+# Initialize MongoDB Collections
+db = client["valorant"]
+mmr_collection = db["mmr_data"]
+tdm_mmr_collection = db["tdm_mmr_data"]
+mmr_ledger = db["mmr_ledger"]
+mmr_snapshots = db["mmr_snapshots"]
+
+
+def rebuild(guild_id: str, at: datetime, player_id: str = "") -> dict:
+    snapshot = mmr_snapshots.find_one(
+        {"guild_id": guild_id, "taken_at": {"$lte": at}}, sort=[("taken_at", -1)]
+    )
+    if snapshot is None:
+        raise LookupError(f"No ledger snapshot at or before {at.isoformat()}")
+    print(f"Starting from the {snapshot['reason']} snapshot of {snapshot['taken_at']}")
+
+    players = snapshot["players"]
+    query = {"guild_id": guild_id, "recorded_at": {"$lte": at}}
+    if snapshot["last_entry_id"] is not None:
+        query["_id"] = {"$gt": snapshot["last_entry_id"]}
+    if player_id:
+        players = {player_id: players.get(player_id, {})}
+        query["player_id"] = player_id
+
+    entries = list(mmr_ledger.find(query).sort("_id", 1))
+    print(f"Replaying {len(entries)} ledger entries")
+    return replay(players, entries)
+
+
+def write_back(guild_id: str, states: dict):
+    mmr_ops, tdm_ops = [], []
+    for player_id, stats in states.items():
+        key = {"guild_id": guild_id, "player_id": player_id}
+        mmr_fields = {k: v for k, v in stats.items() if "tdm_" not in k}
+        tdm_fields = {k: v for k, v in stats.items() if "tdm_" in k}
+        if mmr_fields:
+            mmr_ops.append(UpdateOne(key, {"$set": mmr_fields}))
+        if tdm_fields:
+            tdm_ops.append(UpdateOne(key, {"$set": tdm_fields}))
+    if mmr_ops:
+        mmr_collection.bulk_write(mmr_ops, ordered=False)
+    if tdm_ops:
+        tdm_mmr_collection.bulk_write(tdm_ops, ordered=False)
+    print(f"Wrote {len(mmr_ops)} mmr_data and {len(tdm_ops)} tdm_mmr_data players.")
+
+
+def rebuild_from_ledger():
+    guild_id = input("Discord id of the guild to rebuild: ").strip()
+    when = input("Rebuild as of (ISO time, UTC; blank for now): ").strip()
+    at = datetime.fromisoformat(when) if when else datetime.now(timezone.utc)
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    player_id = input("Discord id of one player (blank for everyone): ").strip()
+
+    states = rebuild(guild_id, at, player_id)
+    ranked = sorted(states.items(), key=lambda item: -(item[1].get("mmr") or 0))
+    for player_id, stats in ranked[:10]:
+        print(
+            f"  {player_id}: mmr={stats.get('mmr')} wins={stats.get('wins')} "
+            f"losses={stats.get('losses')} tdm_mmr={stats.get('tdm_mmr')}"
+        )
+
+    confirm = input(
+        f"Write the rebuilt stats of {len(states)} players to the database? "
+        "Restart the bot afterwards. (Y/n): "
+    )
+    if confirm.lower() != "y":
+        print("Nothing written.")
+        return
+    write_back(guild_id, states)
+
+
+if __name__ == "__main__":
+    rebuild_from_ledger()
@@ -4,7 +4,7 @@ from globals import SEASON_2_START_DATE
 from DebugTools.helpers.match_helper_functions import get_matches_from_season
 from DebugTools.helpers.change_helper_functions import (
     get_matchlist_changes_that_will_be_made,
-    confirm_changes,
+    confirm_diffs,
 )
 
 # MongoDB Connection
@@ -18,20 +18,27 @@ all_matches = db["matches"]
 
 
 def set_data_from_stored_matches():
-    season_matches = get_matches_from_season(SEASON_2_START_DATE)
+    # Stats and matches are kept per guild; only this guild's are touched
+    guild_id = input("Discord id of the guild to rebuild: ").strip()
+    season_matches = get_matches_from_season(guild_id, SEASON_2_START_DATE)
 
-    confirm = input(
-        "WARNING. All user stat data will be cleared first. Are you sure you want to continue? (Y/n): "
-    )
-    if confirm.lower() != "y":
-        print("Canceled.")
-        return
-
-    mmr_collection.delete_many({})
+    # Dry run first: one consolidated diff per player against the stored stats
+    diffs = get_matchlist_changes_that_will_be_made(guild_id, season_matches)
+    season_ids = [diff.player_id for diff in diffs]
+    stale_query = {"guild_id": guild_id, "player_id": {"$nin": season_ids}}
+    stale = mmr_collection.count_documents(stale_query)
 
-    changes = get_matchlist_changes_that_will_be_made(season_matches)
+    if not confirm_diffs(guild_id, diffs):
+        return
 
-    confirm_changes(changes)
+    if stale:
+        confirm = input(
+            f"Remove the stats of {stale} players with no matches this season? (Y/n): "
+        )
+        if confirm.lower() == "y":
+            result = mmr_collection.delete_many(stale_query)
+            print(f"Removed {result.deleted_count} players.")
+    print("Restart the bot to load the new stats.")
 
 
 if __name__ == "__main__":
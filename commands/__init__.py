@@ -33,36 +33,23 @@ class BotCommands(commands.Cog):
         self.leaderboard_view_acs = None
         self.refresh_task_acs = None
 
-        self.bot.chosen_mode = None
-        self.bot.selected_map = None
-        self.bot.match_not_reported = False
-        self.bot.match_ongoing = False
-        self.bot.player_names = {}
-        self.bot.signup_active = False
-        self.bot.queue = []
-        self.bot.captain1 = None
-        self.bot.captain2 = None
-        self.bot.team1 = []
-        self.bot.team2 = []
-
-        # For TDM Commands
-        self.tdm_signup_active = False
-        self.tdm_match_ongoing = False
-        self.tdm_queue = []
-        self.tdm_team1 = []
-        self.tdm_team2 = []
-        self.tdm_match_channel = None
-        self.tdm_match_role = None
-        self.tdm_current_message = None
-
+    async def cog_load(self):
         print(
-            "[DEBUG] Checking the last match document in 'matches' DB for total rounds via 'rounds' array:"
+            "[DEBUG] Checking the last match document in 'matches' DB for total rounds:"
+        )
+        # Only the round count is read, so a legacy raw payload isn't pulled in whole
+        last_match_doc = await all_matches.find_one(
+            sort=[("_id", -1)], projection={"format": 1, "metadata.rounds_played": 1}
         )
-        last_match_doc = all_matches.find_one(sort=[("_id", -1)])
-        if last_match_doc:
-            rounds_array = last_match_doc.get("rounds", [])
+        if last_match_doc and "format" in last_match_doc:
+            rounds_played = last_match_doc["metadata"].get("rounds_played")
+            print(
+                f"  [DEBUG DB] The last match in 'matches' had {rounds_played} rounds."
+            )
+        elif last_match_doc:
             print(
-                f"  [DEBUG DB] The last match in 'matches' had {len(rounds_array)} rounds (via last_match_doc['rounds'])."
+                "  [DEBUG DB] The last match in 'matches' is a raw payload, "
+                "run DebugTools/tools/migrate_match_archive.py to compact it."
             )
         else:
             print("  [DEBUG DB] No matches found in the 'matches' collection.")
@@ -5,8 +5,9 @@ from discord.ext import commands
 
 from commands import BotCommands
 from commands.report import cleanup_match_resources
-from database import mmr_collection
-from views.signup_view import SignupView
+from match_session import MatchSession
+from database import db, mmr_collection
+from query_stats import is_unindexed, profiler
 from views.mode_vote_view import ModeVoteView
 from views.captains_drafting_view import CaptainsDraftingView
 
@@ -30,11 +31,15 @@ class AdminCommands(BotCommands):
             reset = False
 
         # Determine winner info
-        winner_doc = mmr_collection.find_one(
-            {"matches_played": {"$gt": 0}}, sort=[("mmr", -1)]
+        guild_stats = await self.bot.stats_for(ctx.guild)
+        winner_doc = await mmr_collection.find_one(
+            {"guild_id": guild_stats.guild_id, "matches_played": {"$gt": 0}},
+            sort=[("mmr", -1)],
         )
 
-        doc = self.bot.create_new_season(reset_player_stats=reset, winner=winner_doc)
+        doc = await guild_stats.create_new_season(
+            reset_player_stats=reset, winner=winner_doc
+        )
 
         # Assign SSR Rank to winner
         ssr_role = await ctx.guild.create_role(
@@ -65,44 +70,87 @@ class AdminCommands(BotCommands):
     @commands.command()
     @commands.has_role("Owner")
     async def initialize_rounds(self, ctx):
-        result = mmr_collection.update_many({}, {"$set": {"total_rounds_played": 0}})
+        result = await mmr_collection.update_many(
+            {"guild_id": str(ctx.guild.id)}, {"$set": {"total_rounds_played": 0}}
+        )
         await ctx.send(
             f"Initialized total_rounds_played for {result.modified_count} players."
         )
 
+    @commands.command()
+    @commands.has_role("Owner")
+    async def queryreport(self, ctx, limit: int = 10):
+        """
+        Lists the database queries with the most total time since startup,
+        flagging slow ones and those whose plan is a full collection scan.
+        Usage: !queryreport [limit]
+        """
+        entries = profiler.report(limit)
+        if not entries:
+            await ctx.send("No database queries recorded yet.")
+            return
+
+        lines = []
+        for entry in entries:
+            flags = []
+            if entry.slow:
+                flags.append(f"{entry.slow} slow")
+            try:
+                if await is_unindexed(db[entry.collection], entry.sample):
+                    flags.append("COLLSCAN")
+            except Exception as e:
+                print(f"[DEBUG] Could not explain {entry.collection} query: {e}")
+            lines.append(
+                f"{entry.collection}.{entry.command} {entry.shape}\n"
+                f"  n={entry.count} avg={entry.avg_ms:.1f}ms max={entry.max_ms:.0f}ms"
+                + (f" [{', '.join(flags)}]" if flags else "")
+            )
+        report = "\n".join(lines)[:1900]
+        await ctx.send(
+            f"**Query report** (slow >= {profiler.slow_ms:.0f}ms)\n```{report}```"
+        )
+
     @commands.command()
     async def simulate_queue(self, ctx):
-        if self.bot.signup_view is None:
-            self.bot.signup_view = SignupView(ctx, self.bot)
-        if self.bot.signup_active:
+        session = self.bot.sessions.for_channel(ctx.channel)
+        if session is not None:
             await ctx.send(
                 "A signup is already in progress. Resetting queue for simulation."
             )
-            self.bot.queue.clear()
+            self.bot.sessions.remove(session)
+            for view in (session.signup_view, session.active_view):
+                if view is not None:
+                    view.stop()
+
+        # Simulated lobbies are played from the current channel
+        guild_stats = await self.bot.stats_for(ctx.guild)
+        session = MatchSession("simulated-match", guild_stats)
+        self.bot.sessions.add(session, ctx.channel)
 
         # Add 10 dummy players to the queue
         queue = [{"id": i, "name": f"Player{i}"} for i in range(1, 11)]
+        session.queue = queue
 
         # Assign default MMR to the dummy players and map IDs to names
         for player in queue:
-            if player["id"] not in self.bot.player_mmr:
-                self.bot.player_mmr[player["id"]] = {
+            if player["id"] not in guild_stats.player_mmr:
+                guild_stats.player_mmr[player["id"]] = {
                     "mmr": 1000,
                     "wins": 0,
                     "losses": 0,
                 }
-            self.bot.player_names[player["id"]] = player["name"]
+            guild_stats.player_names[player["id"]] = player["name"]
 
-        self.bot.save_mmr_data()
+        await guild_stats.save_mmr_data()
 
-        self.bot.signup_active = True
+        session.signup_active = False
         await ctx.send(
             f"Simulated full queue: {', '.join([player['name'] for player in queue])}"
         )
 
         await ctx.send("The queue is now full! Proceeding with match setup...")
 
-        mode_vote = ModeVoteView(ctx, self.bot)
+        mode_vote = ModeVoteView(ctx, self.bot, session)
         await mode_vote.send_view()
 
     # Set the bot to development mode
@@ -135,36 +183,23 @@ class AdminCommands(BotCommands):
     @commands.command()
     @commands.has_role("Owner")
     async def cancel(self, ctx):
-        if self.bot.signup_active:
-            if self.bot.signup_view:
-                self.bot.signup_view.cleanup()
-                self.bot.signup_view = None
-
-            self.bot.queue = []
-            self.bot.current_signup_message = None
-            self.bot.signup_active = False
+        session = self.bot.sessions.for_context(ctx)
+        if session is None:
+            await ctx.send("No active signup or match to cancel.")
+            return
 
+        # Reply before the match channel, which may be this one, is deleted
+        if session.signup_active:
             await ctx.send(
                 "Canceled active signup. Feel free to start a new one with `!signup`."
             )
-            print("Cancelling signup...")
-
-            try:
-                await self.bot.match_channel.delete()
-                await self.bot.match_role.delete()
-            except discord.NotFound:
-                pass
-        elif self.bot.match_ongoing and self.bot.selected_map:
-            # Logic to cancel the current match and clear info from memory
-            self.bot.match_not_reported = False
-            self.bot.match_ongoing = False
-            await cleanup_match_resources(self.bot)
+            print(f"Cancelling signup {session.match_name}...")
+        else:
             await ctx.send(
                 "Cancelled active match. Feel free to start a new one with `!signup`."
             )
-            print("Cancelling active match...")
-        else:
-            await ctx.send("No active signup or match to cancel.")
+            print(f"Cancelling active match {session.match_name}...")
+        await cleanup_match_resources(self.bot, session)
 
     @commands.command()
     @commands.has_role("Owner")
@@ -179,7 +214,11 @@ class AdminCommands(BotCommands):
             {"name": "Player9", "id": 7},
             {"name": "Player10", "id": 8},
         ]
+        session = self.bot.sessions.for_context(ctx)
+        if session is None:
+            await ctx.send("No active lobby to draft in.")
+            return
         for bot in bot_queue:
-            self.bot.queue.append(bot)
-        draft = CaptainsDraftingView(ctx, self.bot, True)
+            session.queue.append(bot)
+        draft = CaptainsDraftingView(ctx, self.bot, session, True)
         await draft.send_current_draft_view()
@@ -35,10 +35,11 @@ class InterestCommand(BotCommands):
 
         if time.strip().lower() in {"list", "ls"}:
             now_utc = datetime.now(timezone.utc)
-            upcoming = list(
-                interests.find({"scheduled_at_utc": {"$gte": now_utc}})
+            upcoming = (
+                await interests.find({"scheduled_at_utc": {"$gte": now_utc}})
                 .sort("scheduled_at_utc", 1)
                 .limit(8)
+                .to_list()
             )
             if not upcoming:
                 await ctx.send(
@@ -69,7 +70,7 @@ class InterestCommand(BotCommands):
         rounded = rounded.replace(minute=minute)
 
         # Ensure the doc exists
-        doc = interests.find_one_and_update(
+        doc = await interests.find_one_and_update(
             {"scheduled_at_utc": rounded},
             {
                 "$setOnInsert": {
@@ -3,7 +3,6 @@
 from discord.ext import commands
 
 from commands import BotCommands
-from database import mmr_collection
 from views.leaderboard_view import (
     LeaderboardView,
 )
@@ -15,7 +14,8 @@ async def setup(bot):
 
 class LeaderboardCommand(BotCommands):
     @staticmethod
-    def generate_leaderboard(bot, ctx=None, sort_by: str = "mmr"):
+    async def generate_leaderboard(bot, ctx=None, sort_by: str = "mmr", guild=None):
+        guild = guild or ctx.guild
         valid_sort_map = {
             "mmr": "mmr",
             "acs": "average_combat_score",
@@ -29,28 +29,23 @@ class LeaderboardCommand(BotCommands):
             return None, "Invalid leaderboard type.", None
 
         sort_by_internal = valid_sort_map[sort_by]
-        cursor = mmr_collection.find()
-        sorted_data = list(cursor)
-        sorted_data.sort(key=lambda x: x.get(sort_by_internal, 0), reverse=True)
-
         leaderboard_view = LeaderboardView(
             ctx,
             bot,
-            sorted_data,
             sort_by_internal,
             players_per_page=10,
             timeout=None,
             mode="normal",
+            guild_id=guild.id,
         )
-        content = leaderboard_view.make_content(
-            sorted_data, "normal", leaderboard_view.total_pages
-        )
+        content = await leaderboard_view.make_content()
         return leaderboard_view, content, None
 
     @commands.command()
+    @commands.guild_only()
     async def leaderboard(self, ctx, sort_by: str = "mmr"):
-        leaderboard_view, content, error = LeaderboardCommand.generate_leaderboard(
-            self.bot, ctx, sort_by
+        leaderboard_view, content, error = (
+            await LeaderboardCommand.generate_leaderboard(self.bot, ctx, sort_by)
         )
         if error:
             await ctx.send(error)
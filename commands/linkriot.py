@@ -1,12 +1,14 @@
 "Link your Riot account to your Discord account."
 
-import requests
 import discord
 from discord.ext import commands
 
 from commands import BotCommands
-from database import users, mmr_collection, tdm_mmr_collection
+from database import mmr_collection, tdm_mmr_collection
 from globals import API_KEY
+from riot_api import HENRIK_NETWORK_ERRORS, normalize_account_payload, account_url
+from user_directory import directory
+from views.leaderboard_view import invalidate_leaderboards
 
 
 async def setup(bot):
@@ -27,67 +29,71 @@ class LinkRiotCommand(BotCommands):
             await ctx.send("API key is not configured")
             return
 
-        from urllib.parse import quote
-
-        q_name = quote(riot_name, safe="")
-        q_tag = quote(riot_tag, safe="")
+        # Forget cached verifications for both the old and the new link
+        accounts = self.bot.henrik.accounts
+        accounts.invalidate(name=riot_name, tag=riot_tag)
+        old_link = directory.get(ctx.author.id)
+        if old_link:
+            accounts.invalidate(
+                name=old_link.get("name"),
+                tag=old_link.get("tag"),
+                puuid=old_link.get("puuid"),
+            )
 
-        url = f"https://api.henrikdev.xyz/valorant/v2/account/{q_name}/{q_tag}"
         try:
-            resp = requests.get(url, headers={"Authorization": API_KEY}, timeout=30)
-        except requests.RequestException as e:
+            resp = await self.bot.henrik.get(
+                account_url(riot_name, riot_tag), timeout=30
+            )
+        except HENRIK_NETWORK_ERRORS as e:
             await ctx.send(f"Network error reaching HenrikDev API: {e}")
             return
 
         # fully document API outcomes
-        if resp.status_code == 401:
+        if resp.status == 401:
             await ctx.send(
                 "HenrikDev API rejected the request (401). Check that your API key is valid."
             )
             return
-        if resp.status_code == 429:
+        if resp.status == 429:
             await ctx.send("Rate limit hit (429). Try again in a bit.")
             return
-        if resp.status_code == 503:
+        if resp.status == 503:
             await ctx.send(
                 "Riot/HenrikDev upstream is temporarily unavailable (503). Try again later."
             )
             return
-        if resp.status_code == 404:
+        if resp.status == 404:
             await ctx.send(
                 "Could not find that Riot account. Double-check the name and tag."
             )
             return
-        if resp.status_code != 200:
-            await ctx.send(f"Unexpected error from API ({resp.status_code}).")
+        if resp.status != 200:
+            await ctx.send(f"Unexpected error from API ({resp.status}).")
             return
 
-        data = resp.json()
-        if "data" not in data:
+        data = resp.data
+        if not isinstance(data, dict) or "data" not in data:
             await ctx.send(
                 "Could not find your Riot account. Please check the name and tag."
             )
             return
+        account = normalize_account_payload(data)
+        accounts.store(account, name=riot_name, tag=riot_tag)
 
         discord_id = str(ctx.author.id)
-        users.update_one(
-            {"discord_id": discord_id},
-            {
-                "$set": {
-                    "discord_id": discord_id,
-                    "name": riot_name.lower().strip(),
-                    "tag": riot_tag.lower().strip(),
-                }
-            },
-            upsert=True,
-        )
+        link = {"name": riot_name.lower().strip(), "tag": riot_tag.lower().strip()}
+        if account.get("puuid"):
+            link["puuid"] = account["puuid"]
+        await directory.upsert(discord_id, **link)
 
+        # The player may have stats in several guilds
         full_name = f"{riot_name}#{riot_tag}"
-        mmr_collection.update_one(
-            {"player_id": discord_id}, {"$set": {"name": full_name}}, upsert=False
+        await mmr_collection.update_many(
+            {"player_id": discord_id}, {"$set": {"name": full_name}}
         )
-        tdm_mmr_collection.update_one(
-            {"player_id": discord_id}, {"$set": {"name": full_name}}, upsert=False
+        await tdm_mmr_collection.update_many(
+            {"player_id": discord_id}, {"$set": {"name": full_name}}
         )
+        invalidate_leaderboards()
 
         await ctx.send(f"Successfully linked {full_name} to your Discord account.")
@@ -9,6 +9,7 @@ from discord.ext import commands
 from commands import BotCommands
 from views.signup_view import SignupView
 from identity import ensure_current_riot_identity
+from match_session import MatchSession
 
 
 async def setup(bot):
@@ -24,79 +25,75 @@ class SignupCommand(BotCommands):
             if not await ensure_perms(ctx):
                 return
 
-            if self.bot.signup_active:
-                await ctx.send("A signup is already in progress.")
-                return
-
-            if self.bot.match_not_reported:
-                await ctx.send("Report the last match before starting another one.")
-                return
-
-            ok, msg, _db_user = await ensure_current_riot_identity(ctx.author.id)
+            ok, msg, _db_user = await ensure_current_riot_identity(
+                ctx.author.id, self.bot.henrik
+            )
             if not ok:
                 await ctx.send(msg)
                 return
 
-            self.bot.load_mmr_data()
-            print("[DEBUG] Reloaded MMR data at start of signup")
-
-            # Clear any existing signup view
-            if self.bot.signup_view is not None:
-                self.bot.signup_view = None
-
-        # Reset all match related states
-        self.bot.signup_active = True
-        self.bot.queue = []
-        self.bot.captain1 = None
-        self.bot.captain2 = None
-        self.bot.team1 = []
-        self.bot.team2 = []
-        self.bot.chosen_mode = None
-        self.bot.selected_map = None
-
-        self.bot.match_name = f"match-{random.randrange(1, 10**4):04}"
-
-        try:
-            self.bot.match_role = await ctx.guild.create_role(
-                name=self.bot.match_name, hoist=True
-            )
-            await ctx.guild.edit_role_positions(positions={self.bot.match_role: 5})
-
-            match_channel_permissions = {
-                ctx.guild.default_role: discord.PermissionOverwrite(
-                    send_messages=False
-                ),
-                self.bot.match_role: discord.PermissionOverwrite(send_messages=True),
-            }
-
-            self.bot.match_channel = await ctx.guild.create_text_channel(
-                name=self.bot.match_name,
-                category=ctx.channel.category,
-                position=0,
-                overwrites=match_channel_permissions,
-            )
-
-            self.bot.signup_view = SignupView(ctx, self.bot)
-
-            self.bot.current_signup_message = await self.bot.match_channel.send(
-                embed=self.bot.signup_view.get_signup_embed(), view=self.bot.signup_view
-            )
-
-            await ctx.send(f"Queue started! Signup: <#{self.bot.match_channel.id}>")
-        except Exception as e:
-            # Cleanup
-            self.bot.signup_active = False
-            if hasattr(self.bot, "match_role") and self.bot.match_role:
-                try:
-                    await self.bot.match_role.delete()
-                except:
-                    pass
-            if hasattr(self.bot, "match_channel") and self.bot.match_channel:
-                try:
-                    await self.bot.match_channel.delete()
-                except:
-                    pass
-            await ctx.send(f"Error setting up queue: {str(e)}")
+            # Pick up external stat fixes, unless another lobby's report could be
+            # mid-flight on the guild's in-memory stats
+            guild_stats = await self.bot.stats_for(ctx.guild)
+            if not self.bot.sessions.in_guild(ctx.guild):
+                await guild_stats.load_mmr_data()
+                print("[DEBUG] Reloaded MMR data at start of signup")
+
+            # Each lobby gets its own session, so matches can run side by side
+            taken = self.bot.sessions.names()
+            match_name = f"match-{random.randrange(1, 10**4):04}"
+            while match_name in taken:
+                match_name = f"match-{random.randrange(1, 10**4):04}"
+            session = MatchSession(match_name, guild_stats)
+
+            # Registered before the lock is released, so the next signup sees
+            # this lobby's name as taken
+            try:
+                session.match_role = await ctx.guild.create_role(
+                    name=session.match_name, hoist=True
+                )
+                await ctx.guild.edit_role_positions(positions={session.match_role: 5})
+
+                match_channel_permissions = {
+                    ctx.guild.default_role: discord.PermissionOverwrite(
+                        send_messages=False
+                    ),
+                    session.match_role: discord.PermissionOverwrite(send_messages=True),
+                }
+
+                session.match_channel = await ctx.guild.create_text_channel(
+                    name=session.match_name,
+                    category=ctx.channel.category,
+                    position=0,
+                    overwrites=match_channel_permissions,
+                )
+                self.bot.sessions.add(session, session.match_channel)
+
+                session.signup_view = SignupView(ctx, self.bot, session)
+
+                session.current_signup_message = await session.match_channel.send(
+                    embed=session.signup_view.get_signup_embed(),
+                    view=session.signup_view,
+                )
+
+                await ctx.send(f"Queue started! Signup: <#{session.match_channel.id}>")
+            except Exception as e:
+                # Cleanup
+                self.bot.sessions.remove(session)
+                session.signup_active = False
+                if session.signup_view:
+                    session.signup_view.stop()
+                if session.match_role:
+                    try:
+                        await session.match_role.delete()
+                    except:
+                        pass
+                if session.match_channel:
+                    try:
+                        await session.match_channel.delete()
+                    except:
+                        pass
+                await ctx.send(f"Error setting up queue: {str(e)}")
 
 
 async def ensure_perms(ctx) -> bool:
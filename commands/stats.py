@@ -2,7 +2,7 @@
 
 from discord.ext import commands
 from commands import BotCommands
-from database import users
+from user_directory import directory
 
 
 async def setup(bot):
@@ -11,6 +11,7 @@ async def setup(bot):
 
 class StatsCommand(BotCommands):
     @commands.command()
+    @commands.guild_only()
     async def stats(self, ctx, *, riot_input=None):
         # Allows players to lookup the stats of other players
         if riot_input is not None:
@@ -19,9 +20,7 @@ class StatsCommand(BotCommands):
             except ValueError:
                 await ctx.send("Please provide your Riot ID in the format: `Name#Tag`")
                 return
-            player_data = users.find_one(
-                {"name": str(riot_name).lower(), "tag": str(riot_tag).lower()}
-            )
+            player_data = await directory.fetch_by_riot(riot_name, riot_tag)
             if player_data:
                 player_id = str(player_data.get("discord_id"))
             else:
@@ -32,8 +31,10 @@ class StatsCommand(BotCommands):
         else:
             player_id = str(ctx.author.id)
 
-        if player_id in self.bot.player_mmr:
-            stats_data = self.bot.player_mmr[player_id]
+        # Stats of this guild's ladder
+        guild_stats = await self.bot.stats_for(ctx.guild)
+        if player_id in guild_stats.player_mmr:
+            stats_data = guild_stats.player_mmr[player_id]
             mmr_value = stats_data.get("mmr", 1000)
             wins = stats_data.get("wins", 0)
             losses = stats_data.get("losses", 0)
@@ -44,7 +45,7 @@ class StatsCommand(BotCommands):
             win_percent = (wins / matches_played) * 100 if matches_played > 0 else 0
 
             # Get riot name and tag
-            user_data = users.find_one({"discord_id": str(player_id)})
+            user_data = directory.get(player_id)
             if user_data:
                 riot_name = user_data.get("name", "Unknown")
                 riot_tag = user_data.get("tag", "Unknown")
@@ -52,22 +53,9 @@ class StatsCommand(BotCommands):
             else:
                 player_name = ctx.author.name
 
-            total_players = len(self.bot.player_mmr)
-            sorted_mmr = sorted(
-                [
-                    (pid, stats)
-                    for pid, stats in self.bot.player_mmr.items()
-                    if "mmr" in stats
-                ],
-                key=lambda x: x[1]["mmr"],
-                reverse=True,
-            )
-            position = None
+            total_players = len(guild_stats.player_mmr)
+            position = guild_stats.rankings.rated("mmr").rank(player_id)
             slash = "/"
-            for idx, (pid, _) in enumerate(sorted_mmr, start=1):
-                if pid == player_id:
-                    position = idx
-                    break
 
             # Rank 1 tag
             if position == 1:
@@ -4,14 +4,16 @@ import random
 
 import discord
 from discord.ext import commands
-import requests
 
 from commands import BotCommands
+from views import safe_reply
+from views.serialized_view import SerializedView
 from views.tdm_map_vote_view import TDMMapVoteView
-from globals import API_KEY
+from riot_api import get_recent_matches
 
 
-from database import users, tdm_matches, tdm_mmr_collection
+from match_ingest import claim_match, is_match_processed, match_id_of, release_match
+from user_directory import directory
 
 
 async def setup(bot):
@@ -21,63 +23,73 @@ async def setup(bot):
 class TDMCommands(BotCommands):
     @commands.command()
     async def tdm(self, ctx):
+        # TDM runs one lobby per guild, rated on the guild's own stats
+        tdm = self.bot.tdm_lobby(ctx.guild)
+        guild_stats = await self.bot.stats_for(ctx.guild)
+
         # Check if any match is in progress
-        if self.tdm_signup_active:
+        if tdm.signup_active:
             await ctx.send("❌ A TDM signup is already in progress.")
             return
 
-        if self.bot.match_not_reported or self.tdm_match_ongoing:
+        if (
+            any(
+                session.match_not_reported
+                for session in self.bot.sessions.in_guild(ctx.guild)
+            )
+            or tdm.match_ongoing
+        ):
             await ctx.send(
                 "❌ A match is still in progress. Report it before starting another one."
             )
             return
 
         # Initialize TDM state
-        self.tdm_signup_active = True
-        self.tdm_queue = []
-        self.tdm_team1 = []
-        self.tdm_team2 = []
+        tdm.signup_active = True
+        tdm.queue = []
+        tdm.team1 = []
+        tdm.team2 = []
 
         # Create match channel
-        self.tdm_match_name = f"tdm-{random.randrange(1, 10**4):04}"
+        tdm.match_name = f"tdm-{random.randrange(1, 10**4):04}"
 
         try:
             # Create and position role
-            self.tdm_match_role = await ctx.guild.create_role(
-                name=self.tdm_match_name, hoist=True, reason="TDM Match Role"
+            tdm.match_role = await ctx.guild.create_role(
+                name=tdm.match_name, hoist=True, reason="TDM Match Role"
             )
-            await ctx.guild.edit_role_positions(positions={self.tdm_match_role: 5})
+            await ctx.guild.edit_role_positions(positions={tdm.match_role: 5})
 
             # Set up channel permissions
             match_channel_permissions = {
                 ctx.guild.default_role: discord.PermissionOverwrite(
                     send_messages=False
                 ),
-                self.tdm_match_role: discord.PermissionOverwrite(send_messages=True),
+                tdm.match_role: discord.PermissionOverwrite(send_messages=True),
                 ctx.guild.me: discord.PermissionOverwrite(
                     send_messages=True, manage_messages=True
                 ),
             }
 
             # Create channel
-            self.tdm_match_channel = await ctx.guild.create_text_channel(
-                name=self.tdm_match_name,
+            tdm.match_channel = await ctx.guild.create_text_channel(
+                name=tdm.match_name,
                 category=ctx.channel.category,
                 position=0,
                 overwrites=match_channel_permissions,
                 reason="TDM Match Channel",
             )
         except discord.Forbidden:
-            self.tdm_signup_active = False
+            tdm.signup_active = False
             await ctx.send("❌ I don't have permission to create channels or roles!")
             return
         except discord.HTTPException as e:
-            self.tdm_signup_active = False
+            tdm.signup_active = False
             await ctx.send(f"❌ Failed to create match channel: {str(e)}")
             return
 
-        # Create signup view
-        view = discord.ui.View(timeout=None)
+        # Create signup view; clicks are handled one at a time
+        view = SerializedView(timeout=None)
         signup_button = discord.ui.Button(
             label="Sign Up (0/6)", style=discord.ButtonStyle.green, emoji="✅"
         )
@@ -86,43 +98,45 @@ class TDMCommands(BotCommands):
         )
 
         async def signup_callback(interaction):
-            if len(self.tdm_queue) >= 6:
-                await interaction.response.send_message(
-                    "❌ Queue is full!", ephemeral=True
-                )
-                return
-
-            existing_user = users.find_one({"discord_id": str(interaction.user.id)})
+            existing_user = await directory.fetch(interaction.user.id)
             if not existing_user:
-                await interaction.response.send_message(
+                await safe_reply(
+                    interaction,
                     "❌ You must link your Riot account first using `!linkriot Name#Tag`",
                     ephemeral=True,
                 )
                 return
 
-            if str(interaction.user.id) not in [p["id"] for p in self.tdm_queue]:
-                self.tdm_queue.append(
+            # Checked after the fetch so the queue is read as it is now
+            if len(tdm.queue) >= 6:
+                await safe_reply(interaction, "❌ Queue is full!", ephemeral=True)
+                return
+
+            if str(interaction.user.id) not in [p["id"] for p in tdm.queue]:
+                tdm.queue.append(
                     {"id": str(interaction.user.id), "name": interaction.user.name}
                 )
-                signup_button.label = f"Sign Up ({len(self.tdm_queue)}/6)"
+                signup_button.label = f"Sign Up ({len(tdm.queue)}/6)"
 
                 # Ensure TDM MMR exists
-                self.bot.ensure_tdm_player_mmr(str(interaction.user.id))
+                guild_stats.ensure_tdm_player_mmr(str(interaction.user.id))
                 try:
                     # Add role
                     member = interaction.guild.get_member(
                         interaction.user.id
                     ) or await interaction.guild.fetch_member(interaction.user.id)
-                    await member.add_roles(self.tdm_match_role)
+                    await member.add_roles(tdm.match_role)
                 except discord.Forbidden:
-                    await interaction.response.send_message(
-                        "⚠️ Could not assign role due to permissions.", ephemeral=True
+                    await safe_reply(
+                        interaction,
+                        "⚠️ Could not assign role due to permissions.",
+                        ephemeral=True,
                     )
 
                 # Get all queued players' Riot names
                 riot_names = []
-                for player in self.tdm_queue:
-                    user_data = users.find_one({"discord_id": player["id"]})
+                for player in tdm.queue:
+                    user_data = directory.get(player["id"])
                     if user_data:
                         riot_name = f"{user_data.get('name')}#{user_data.get('tag')}"
                         riot_names.append(riot_name)
@@ -136,7 +150,7 @@ class TDMCommands(BotCommands):
                     color=discord.Color.blue(),
                 )
                 embed.add_field(
-                    name=f"Current Queue ({len(self.tdm_queue)}/6)",
+                    name=f"Current Queue ({len(tdm.queue)}/6)",
                     value=(
                         "\n".join(riot_names) if riot_names else "No players in queue"
                     ),
@@ -149,16 +163,20 @@ class TDMCommands(BotCommands):
                 )
 
                 await interaction.message.edit(embed=embed, view=view)
-                await interaction.response.send_message(
-                    f"✅ You have successfully joined the queue as **{existing_user.get('name')}#{existing_user.get('tag')}**! ({len(self.tdm_queue)}/6)",
+                await safe_reply(
+                    interaction,
+                    f"✅ You have successfully joined the queue as **{existing_user.get('name')}#{existing_user.get('tag')}**! ({len(tdm.queue)}/6)",
                     ephemeral=True,
                 )
 
-                if len(self.tdm_queue) == 6:
+                if len(tdm.queue) >= 6:
+                    # No click queued behind this one may join or start again
+                    view.stop()
+
                     # Delete the signup message
-                    if self.tdm_current_message:
+                    if tdm.current_message:
                         try:
-                            await self.tdm_current_message.delete()
+                            await tdm.current_message.delete()
                         except discord.NotFound:
                             pass
 
@@ -166,38 +184,36 @@ class TDMCommands(BotCommands):
                         "Queue is full! Starting map vote..."
                     )
 
-                    # Make sure the bot's tdm_queue is up to date
-                    self.bot.tdm_queue = self.tdm_queue
-                    print(
-                        f"[DEBUG] Queue before creating map vote: {self.bot.tdm_queue}"
-                    )
+                    print(f"[DEBUG] Queue before creating map vote: {tdm.queue}")
 
-                    map_vote = TDMMapVoteView(interaction.channel, self.bot)
+                    map_vote = TDMMapVoteView(interaction.channel, self.bot, tdm)
                     await map_vote.setup()
                     await map_vote.send_vote_view()
 
         async def leave_callback(interaction):
-            if str(interaction.user.id) in [p["id"] for p in self.tdm_queue]:
-                self.tdm_queue = [
-                    p for p in self.tdm_queue if p["id"] != str(interaction.user.id)
+            if str(interaction.user.id) in [p["id"] for p in tdm.queue]:
+                tdm.queue = [
+                    p for p in tdm.queue if p["id"] != str(interaction.user.id)
                 ]
-                signup_button.label = f"Sign Up ({len(self.tdm_queue)}/6)"
+                signup_button.label = f"Sign Up ({len(tdm.queue)}/6)"
 
                 try:
                     # Remove role
                     member = interaction.guild.get_member(
                         interaction.user.id
                     ) or await interaction.guild.fetch_member(interaction.user.id)
-                    await member.remove_roles(self.tdm_match_role)
+                    await member.remove_roles(tdm.match_role)
                 except discord.Forbidden:
-                    await interaction.response.send_message(
-                        "⚠️ Could not remove role due to permissions.", ephemeral=True
+                    await safe_reply(
+                        interaction,
+                        "⚠️ Could not remove role due to permissions.",
+                        ephemeral=True,
                     )
 
                 # Update queue display with remaining players
                 riot_names = []
-                for player in self.tdm_queue:
-                    user_data = users.find_one({"discord_id": player["id"]})
+                for player in tdm.queue:
+                    user_data = directory.get(player["id"])
                     if user_data:
                         riot_name = f"{user_data.get('name')}#{user_data.get('tag')}"
                         riot_names.append(riot_name)
@@ -210,7 +226,7 @@ class TDMCommands(BotCommands):
                     color=discord.Color.blue(),
                 )
                 embed.add_field(
-                    name=f"Current Queue ({len(self.tdm_queue)}/6)",
+                    name=f"Current Queue ({len(tdm.queue)}/6)",
                     value=(
                         "\n".join(riot_names) if riot_names else "No players in queue"
                     ),
@@ -223,13 +239,20 @@ class TDMCommands(BotCommands):
                 )
 
                 await interaction.message.edit(embed=embed, view=view)
-                await interaction.response.send_message(
-                    f"❌ You have left the queue. ({len(self.tdm_queue)}/6)",
+                await safe_reply(
+                    interaction,
+                    f"❌ You have left the queue. ({len(tdm.queue)}/6)",
                     ephemeral=True,
                 )
 
-        signup_button.callback = signup_callback
-        leave_button.callback = leave_callback
+        async def on_signup(interaction):
+            await view.serialize(interaction, signup_callback)
+
+        async def on_leave(interaction):
+            await view.serialize(interaction, leave_callback)
+
+        signup_button.callback = on_signup
+        leave_button.callback = on_leave
 
         view.add_item(signup_button)
         view.add_item(leave_button)
@@ -249,27 +272,25 @@ class TDMCommands(BotCommands):
             inline=False,
         )
 
-        self.tdm_current_message = await self.tdm_match_channel.send(
-            embed=embed, view=view
-        )
-        await ctx.send(
-            f"✅ TDM Queue started! Join here: <#{self.tdm_match_channel.id}>"
-        )
+        tdm.current_message = await tdm.match_channel.send(embed=embed, view=view)
+        await ctx.send(f"✅ TDM Queue started! Join here: <#{tdm.match_channel.id}>")
 
     async def make_tdm_teams(self, channel):
-        players = self.tdm_queue[:]
+        tdm = self.bot.tdm_lobby(channel.guild)
+        guild_stats = await self.bot.stats_for(channel.guild)
+        players = tdm.queue[:]
         print(f"[DEBUG] Forming teams from {len(players)} players")
 
         # Initialize TDM MMR for any players who don't have it
         for player in players:
-            self.bot.ensure_tdm_player_mmr(player["id"])
+            guild_stats.ensure_tdm_player_mmr(player["id"])
             print(
-                f"[DEBUG] Player {player['id']} TDM MMR: {self.bot.player_mmr[player['id']].get('tdm_mmr', 1000)}"
+                f"[DEBUG] Player {player['id']} TDM MMR: {guild_stats.player_mmr[player['id']].get('tdm_mmr', 1000)}"
             )
 
         # Sort players by TDM MMR (highest to lowest)
         players.sort(
-            key=lambda p: self.bot.player_mmr[p["id"]].get("tdm_mmr", 1000),
+            key=lambda p: guild_stats.player_mmr[p["id"]].get("tdm_mmr", 1000),
             reverse=True,
         )
 
@@ -287,11 +308,11 @@ class TDMCommands(BotCommands):
 
             # Calculate team MMRs using TDM MMR
             team1_mmr = (
-                sum(self.bot.player_mmr[p["id"]].get("tdm_mmr", 1000) for p in team1)
+                sum(guild_stats.player_mmr[p["id"]].get("tdm_mmr", 1000) for p in team1)
                 / 3
             )
             team2_mmr = (
-                sum(self.bot.player_mmr[p["id"]].get("tdm_mmr", 1000) for p in team2)
+                sum(guild_stats.player_mmr[p["id"]].get("tdm_mmr", 1000) for p in team2)
                 / 3
             )
 
@@ -304,8 +325,8 @@ class TDMCommands(BotCommands):
                 best_team2 = team2
 
         # Set the teams
-        self.tdm_team1 = best_team1
-        self.tdm_team2 = best_team2
+        tdm.team1 = best_team1
+        tdm.team2 = best_team2
 
         # Create teams display embed
         embed = discord.Embed(
@@ -315,17 +336,18 @@ class TDMCommands(BotCommands):
         )
 
         # Format team displays
-        for team_num, team in [(1, self.tdm_team1), (2, self.tdm_team2)]:
+        for team_num, team in [(1, tdm.team1), (2, tdm.team2)]:
             team_mmr = (
-                sum(self.bot.player_mmr[p["id"]].get("tdm_mmr", 1000) for p in team) / 3
+                sum(guild_stats.player_mmr[p["id"]].get("tdm_mmr", 1000) for p in team)
+                / 3
             )
             team_text = []
 
             for player in team:
-                user_data = users.find_one({"discord_id": player["id"]})
+                user_data = directory.get(player["id"])
                 if user_data:
                     name = f"{user_data.get('name')}#{user_data.get('tag')}"
-                    mmr = self.bot.player_mmr[player["id"]].get("tdm_mmr", 1000)
+                    mmr = guild_stats.player_mmr[player["id"]].get("tdm_mmr", 1000)
                     team_text.append(f"{name} (MMR: {mmr})")
 
             embed.add_field(
@@ -346,23 +368,25 @@ class TDMCommands(BotCommands):
         )
 
         # Update match status
-        self.tdm_match_ongoing = True
-        self.tdm_signup_active = False
+        tdm.match_ongoing = True
+        tdm.signup_active = False
 
         # Clean up signup message if it exists
-        if self.tdm_current_message:
+        if tdm.current_message:
             try:
-                await self.tdm_current_message.delete()
+                await tdm.current_message.delete()
             except discord.NotFound:
                 pass
 
     @commands.command()
     async def tdmreport(self, ctx):
-        if not self.tdm_match_ongoing:
+        tdm = self.bot.tdm_lobby(ctx.guild)
+        if not tdm.match_ongoing:
             await ctx.send("No TDM match is currently active.")
             return
+        guild_stats = await self.bot.stats_for(ctx.guild)
 
-        current_user = users.find_one({"discord_id": str(ctx.author.id)})
+        current_user = await directory.fetch(ctx.author.id)
         if not current_user:
             await ctx.send(
                 "You need to link your Riot account first using `!linkriot Name#Tag`"
@@ -371,20 +395,24 @@ class TDMCommands(BotCommands):
 
         name = current_user.get("name", "").lower()
         tag = current_user.get("tag", "").lower()
-        region = "na"
-        platform = "pc"
 
         # Get match data from API
-        url = f"https://api.henrikdev.xyz/valorant/v4/matches/{region}/{platform}/{name}/{tag}"
         try:
-            response = requests.get(url, headers={"Authorization": API_KEY}, timeout=30)
-            match_data = response.json()
-
-            if "data" not in match_data or not match_data["data"]:
+            response = await get_recent_matches(self.bot.henrik, name, tag)
+            match_data = response.data
+
+            if (
+                not isinstance(match_data, dict)
+                or "data" not in match_data
+                or not match_data["data"]
+            ):
                 await ctx.send("Could not retrieve match data.")
                 return
 
             match = match_data["data"][0]
+            if await is_match_processed(match_id_of(match), mode="tdm"):
+                await ctx.send("This match has already been reported.")
+                return
 
             # Get the match players and their stats
             match_players = match.get("players", [])
@@ -392,10 +420,16 @@ class TDMCommands(BotCommands):
                 await ctx.send("No player data found in match.")
                 return
 
+            # Pick up links made outside this process for the lookups below
+            await directory.fetch_many(p["id"] for p in tdm.queue)
+            await directory.fetch_many_by_riot(
+                (p.get("name"), p.get("tag")) for p in match_players
+            )
+
             # Verify queue players are in the match
             queue_riot_ids = set()
-            for player in self.tdm_queue:
-                user_data = users.find_one({"discord_id": str(player["id"])})
+            for player in tdm.queue:
+                user_data = directory.get(player["id"])
                 if user_data:
                     player_name = user_data.get("name", "").lower()
                     player_tag = user_data.get("tag", "").lower()
@@ -415,62 +449,53 @@ class TDMCommands(BotCommands):
             team1_kills = sum(
                 player.get("stats", {}).get("kills", 0)
                 for player in match_players
-                if self._is_player_in_team(player, self.tdm_team1)
+                if self._is_player_in_team(player, tdm.team1)
             )
 
             team2_kills = sum(
                 player.get("stats", {}).get("kills", 0)
                 for player in match_players
-                if self._is_player_in_team(player, self.tdm_team2)
+                if self._is_player_in_team(player, tdm.team2)
             )
 
-            winning_team = (
-                self.tdm_team1 if team1_kills > team2_kills else self.tdm_team2
-            )
-            losing_team = (
-                self.tdm_team2 if team1_kills > team2_kills else self.tdm_team1
-            )
+            winning_team = tdm.team1 if team1_kills > team2_kills else tdm.team2
+            losing_team = tdm.team2 if team1_kills > team2_kills else tdm.team1
 
-            # Update player stats
-            for player_stats in match_players:
-                self._update_tdm_stats(player_stats)
-
-            # Adjust MMR
-            self.bot.adjust_tdm_mmr(winning_team, losing_team)
-
-            # Save both MMR data and stats
-            self.bot.save_tdm_mmr_data()
-
-            for player in winning_team + losing_team:
-                player_id = player["id"]
-                if player_id in self.bot.player_mmr:
-                    stats = self.bot.player_mmr[player_id]
-                    user_data = users.find_one({"discord_id": str(player_id)})
-                    name = (
-                        f"{user_data.get('name', 'Unknown')}#{user_data.get('tag', 'Unknown')}"
-                        if user_data
-                        else "Unknown"
-                    )
+            # Record the match before any MMR changes, so it can only be applied once
+            if not await claim_match(match, mode="tdm", guild_id=guild_stats.guild_id):
+                await ctx.send("This match has already been reported.")
+                return
 
-                    tdm_mmr_collection.update_one(
-                        {"player_id": player_id},
-                        {
-                            "$set": {
-                                "tdm_mmr": stats.get("tdm_mmr", 1000),
-                                "tdm_wins": stats.get("tdm_wins", 0),
-                                "tdm_losses": stats.get("tdm_losses", 0),
-                                "name": name,
-                                "tdm_total_kills": stats.get("tdm_total_kills", 0),
-                                "tdm_total_deaths": stats.get("tdm_total_deaths", 0),
-                                "tdm_matches_played": stats.get(
-                                    "tdm_matches_played", 0
-                                ),
-                                "tdm_avg_kills": stats.get("tdm_avg_kills", 0),
-                                "tdm_kd_ratio": stats.get("tdm_kd_ratio", 0),
-                            }
-                        },
-                        upsert=True,
-                    )
+            # Every linked player in the match may be touched by the update
+            linked = (
+                directory.by_riot(p.get("name"), p.get("tag")) for p in match_players
+            )
+            touched = [player["id"] for player in winning_team + losing_team]
+            touched += [user["discord_id"] for user in linked if user]
+            pre_update = guild_stats.player_mmr.snapshot(touched)
+            try:
+                # Update player stats
+                for player_stats in match_players:
+                    self._update_tdm_stats(guild_stats, player_stats)
+
+                # Adjust MMR
+                guild_stats.adjust_tdm_mmr(winning_team, losing_team)
+                await guild_stats.ledger.record(
+                    match_id_of(match),
+                    "tdm",
+                    pre_update,
+                    guild_stats.player_mmr,
+                    touched,
+                )
+            except Exception:
+                guild_stats.player_mmr.rollback(pre_update)
+                await release_match(match, mode="tdm")
+                raise
+
+            # Save both MMR data and stats for this match's players
+            await guild_stats.save_tdm_mmr_data(
+                [player["id"] for player in winning_team + losing_team]
+            )
 
             # Create results embed
             embed = discord.Embed(
@@ -483,7 +508,7 @@ class TDMCommands(BotCommands):
             for team_num, team in enumerate([winning_team, losing_team], 1):
                 team_stats = []
                 for player in team:
-                    user_data = users.find_one({"discord_id": str(player["id"])})
+                    user_data = directory.get(player["id"])
                     if user_data:
                         player_name = f"{user_data.get('name')}#{user_data.get('tag')}"
                         player_stats = next(
@@ -502,7 +527,7 @@ class TDMCommands(BotCommands):
                                 if deaths > 0
                                 else f"{kills}/0 (∞)"
                             )
-                            mmr_change = self.bot.player_mmr[player["id"]].get(
+                            mmr_change = guild_stats.player_mmr[player["id"]].get(
                                 "latest_tdm_mmr_change", 0
                             )
                             team_stats.append(
@@ -518,19 +543,16 @@ class TDMCommands(BotCommands):
             await ctx.send(embed=embed)
             await ctx.send("Match recorded! MMR has been updated.")
 
-            # Save match to database
-            tdm_matches.insert_one(match)
-
             # Cleanup
-            if self.tdm_match_channel:
-                await self.tdm_match_channel.delete()
-            if self.tdm_match_role:
-                await self.tdm_match_role.delete()
+            if tdm.match_channel:
+                await tdm.match_channel.delete()
+            if tdm.match_role:
+                await tdm.match_role.delete()
 
-            self.tdm_match_ongoing = False
-            self.tdm_queue = []
-            self.tdm_team1 = []
-            self.tdm_team2 = []
+            tdm.match_ongoing = False
+            tdm.queue = []
+            tdm.team1 = []
+            tdm.team2 = []
 
         except Exception as e:
             await ctx.send(f"An error occurred while processing the match: {str(e)}")
@@ -541,7 +563,7 @@ class TDMCommands(BotCommands):
         player_tag = player_stats.get("tag", "").lower()
 
         for team_player in team:
-            user_data = users.find_one({"discord_id": str(team_player["id"])})
+            user_data = directory.get(team_player["id"])
             if user_data:
                 if (
                     user_data.get("name", "").lower() == player_name
@@ -550,11 +572,11 @@ class TDMCommands(BotCommands):
                     return True
         return False
 
-    def _update_tdm_stats(self, player_stats):
+    def _update_tdm_stats(self, guild_stats, player_stats):
         name = player_stats.get("name", "").lower()
         tag = player_stats.get("tag", "").lower()
 
-        user_entry = users.find_one({"name": name, "tag": tag})
+        user_entry = directory.by_riot(name, tag)
         if not user_entry:
             return
 
@@ -563,10 +585,10 @@ class TDMCommands(BotCommands):
         kills = stats.get("kills", 0)
         deaths = stats.get("deaths", 0)
 
-        self.bot.ensure_tdm_player_mmr(discord_id)
+        guild_stats.ensure_tdm_player_mmr(discord_id)
 
         # Update stats
-        player_data = self.bot.player_mmr[discord_id]
+        player_data = guild_stats.player_mmr[discord_id]
         total_matches = player_data.get("tdm_matches_played", 0) + 1
         total_kills = player_data.get("tdm_total_kills", 0) + kills
         total_deaths = player_data.get("tdm_total_deaths", 0) + deaths
@@ -589,30 +611,32 @@ class TDMCommands(BotCommands):
     @commands.command()
     @commands.has_role("Owner")
     async def canceltdm(self, ctx):
-        if not self.tdm_signup_active:
+        tdm = self.bot.tdm_lobby(ctx.guild)
+        if not tdm.signup_active:
             await ctx.send("No TDM signup is active to cancel.")
             return
 
-        self.tdm_signup_active = False
-        self.tdm_queue = []
+        tdm.signup_active = False
+        tdm.queue = []
 
         await ctx.send("TDM signup cancelled.")
 
-        if self.tdm_match_channel:
+        if tdm.match_channel:
             try:
-                await self.tdm_match_channel.delete()
+                await tdm.match_channel.delete()
             except discord.NotFound:
                 pass
-            self.tdm_match_channel = None
+            tdm.match_channel = None
 
-        if self.tdm_match_role:
+        if tdm.match_role:
             try:
-                await self.tdm_match_role.delete()
+                await tdm.match_role.delete()
             except discord.NotFound:
                 pass
-            self.tdm_match_role = None
+            tdm.match_role = None
 
     @commands.command()
+    @commands.guild_only()
     async def tdmstats(self, ctx, *, riot_input=None):
         """Check TDM stats for a player"""
         # Handle looking up other players if riot_input is provided
@@ -623,7 +647,7 @@ class TDMCommands(BotCommands):
                 await ctx.send("Please provide your Riot ID in the format: `Name#Tag`")
                 return
 
-            player_data = users.find_one({"name": str(riot_name), "tag": str(riot_tag)})
+            player_data = await directory.fetch_by_riot(str(riot_name), str(riot_tag))
             if player_data:
                 player_id = str(player_data.get("discord_id"))
             else:
@@ -634,9 +658,10 @@ class TDMCommands(BotCommands):
         else:
             player_id = str(ctx.author.id)
 
-        # Get TDM stats for the player
-        if player_id in self.bot.player_mmr:
-            stats_data = self.bot.player_mmr[player_id]
+        # Get TDM stats for the player, from this guild's ladder
+        guild_stats = await self.bot.stats_for(ctx.guild)
+        if player_id in guild_stats.player_mmr:
+            stats_data = guild_stats.player_mmr[player_id]
 
             # Initialize stats with default values
             tdm_mmr = stats_data.get("tdm_mmr", 1000)
@@ -656,7 +681,7 @@ class TDMCommands(BotCommands):
             )
 
             # Get Riot name and tag
-            user_data = users.find_one({"discord_id": str(player_id)})
+            user_data = directory.get(player_id)
             if user_data:
                 riot_name = user_data.get("name", "Unknown")
                 riot_tag = user_data.get("tag", "Unknown")
@@ -665,24 +690,10 @@ class TDMCommands(BotCommands):
                 player_name = ctx.author.name
 
             # Find leaderboard position
-            total_players = len(
-                [p for p in self.bot.player_mmr.values() if "tdm_mmr" in p]
-            )
-            sorted_mmr = sorted(
-                [
-                    (pid, stats)
-                    for pid, stats in self.bot.player_mmr.items()
-                    if "tdm_mmr" in stats
-                ],
-                key=lambda x: x[1]["tdm_mmr"],
-                reverse=True,
-            )
-            position = None
+            tdm_ranking = guild_stats.rankings.rated("tdm_mmr")
+            total_players = len(tdm_ranking)
+            position = tdm_ranking.rank(player_id)
             slash = "/"
-            for idx, (pid, _) in enumerate(sorted_mmr, start=1):
-                if pid == player_id:
-                    position = idx
-                    break
 
             # Create and send embed
             embed = discord.Embed(
@@ -1,16 +1,38 @@
 # database.py
-from pymongo.mongo_client import MongoClient
+from pymongo import AsyncMongoClient
 from pymongo.server_api import ServerApi
 
-from globals import URI_KEY
+from globals import STORAGE_BACKEND, URI_KEY
+from query_stats import profiler
 
-client = MongoClient(URI_KEY, server_api=ServerApi("1"), serverSelectionTimeoutMS=8000)
+if STORAGE_BACKEND == "memory":
+    # Offline backend for local runs, benchmarks and load tests
+    from memory_store import MemoryClient
+
+    client = MemoryClient()
+elif STORAGE_BACKEND == "mongo":
+    # Async client: every call must be awaited so database I/O never blocks the bot
+    client = AsyncMongoClient(
+        URI_KEY,
+        server_api=ServerApi("1"),
+        serverSelectionTimeoutMS=8000,
+        event_listeners=[profiler],
+    )
+else:
+    raise SystemExit(f"[DB] Unknown storage_backend: {STORAGE_BACKEND!r}")
+
+
+async def ping():
+    """Fail fast at startup if Atlas is unreachable."""
+    if STORAGE_BACKEND == "memory":
+        print("[DB] Using in-memory storage backend (nothing is persisted)")
+        return
+    try:
+        await client.admin.command("ping")
+        print("[DB] Mongo ping OK")
+    except Exception as e:
+        raise SystemExit(f"[DB] Mongo connection failed: {e}")
 
-try:
-    client.admin.command("ping")
-    print("[DB] Mongo ping OK")
-except Exception as e:
-    raise SystemExit(f"[DB] Mongo connection failed: {e}")
 
 # Models
 db = client["valorant"]
@@ -18,6 +40,9 @@ users = db["users"]
 mmr_collection = db["mmr_data"]
 tdm_mmr_collection = db["tdm_mmr_data"]
 all_matches = db["matches"]
+raw_matches = db["matches_raw"]  # compressed v4 payloads, see match_archive.py
 tdm_matches = db["tdm_matches"]
 seasons = db["seasons"]
+mmr_ledger = db["mmr_ledger"]  # per-match stat deltas, see mmr_ledger.py
+mmr_snapshots = db["mmr_snapshots"]
 interests = db["interests"]
@@ -0,0 +1,117 @@
+"""Indexes for every collection query pattern, created idempotently at startup."""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from database import (
+    all_matches,
+    interests,
+    mmr_collection,
+    mmr_ledger,
+    mmr_snapshots,
+    tdm_matches,
+    tdm_mmr_collection,
+    users,
+)
+from leaderboard_queries import leaderboard_indexes
+
+# Server error codes for an existing index with the same key or name
+_INDEX_CONFLICT_CODES = {85, 86}
+
+# Matches without an id (e.g. mock data) are left out of the unique index
+_HAS_MATCH_ID = {"metadata.match_id": {"$type": "string"}}
+
+
+def _indexes():
+    # users: directory loads / $lookup by discord_id, DebugTools by name + tag
+    yield users, IndexModel(
+        [("discord_id", ASCENDING)], name="discord_id_unique", unique=True
+    )
+    yield users, IndexModel([("name", ASCENDING), ("tag", ASCENDING)], name="riot_id")
+
+    # Stats: guild loads and upserts by (guild_id, player_id), Riot ID relinks
+    # by player_id, DebugTools lookups by display name
+    for collection in (mmr_collection, tdm_mmr_collection):
+        yield collection, IndexModel(
+            [("guild_id", ASCENDING), ("player_id", ASCENDING)],
+            name="player_id_unique",
+            unique=True,
+        )
+        yield collection, IndexModel(
+            [("player_id", ASCENDING)], name="player_id_all_guilds"
+        )
+    yield mmr_collection, IndexModel([("name", ASCENDING)], name="name")
+    yield from leaderboard_indexes()
+
+    # Match history: one document per match, DebugTools per-guild date ranges
+    for collection in (all_matches, tdm_matches):
+        yield collection, IndexModel(
+            [("metadata.match_id", ASCENDING)],
+            name="match_id_unique",
+            unique=True,
+            partialFilterExpression=_HAS_MATCH_ID,
+        )
+        yield collection, IndexModel(
+            [("guild_id", ASCENDING), ("metadata.started_at", ASCENDING)],
+            name="started_at",
+        )
+
+    # MMR ledger: per-guild entry ranges, per-player history, per-match
+    # lookups, latest snapshot of a guild
+    yield mmr_ledger, IndexModel(
+        [("guild_id", ASCENDING), ("_id", ASCENDING)], name="guild_entries"
+    )
+    yield mmr_ledger, IndexModel(
+        [("guild_id", ASCENDING), ("player_id", ASCENDING), ("_id", ASCENDING)],
+        name="player_history",
+    )
+    yield mmr_ledger, IndexModel([("match_id", ASCENDING)], name="match_id")
+    yield mmr_snapshots, IndexModel(
+        [("guild_id", ASCENDING), ("taken_at", DESCENDING)], name="taken_at"
+    )
+
+    # !interest list / slot lookups
+    yield interests, IndexModel(
+        [("scheduled_at_utc", ASCENDING)], name="scheduled_at_utc"
+    )
+
+
+async def _create_replacing(collection, keys: list, spec: dict):
+    """Create an index, first dropping one with the same name or key if needed."""
+    try:
+        await collection.create_index(keys, **spec)
+        return
+    except OperationFailure as e:
+        if e.code not in _INDEX_CONFLICT_CODES:
+            raise
+    for name, info in (await collection.index_information()).items():
+        if name != "_id_" and (name == spec["name"] or list(info["key"]) == keys):
+            print(f"[DEBUG] {collection.name}: replacing index {name}")
+            await collection.drop_index(name)
+    await collection.create_index(keys, **spec)
+
+
+async def _create(collection, model: IndexModel):
+    spec = dict(model.document)
+    keys = list(spec.pop("key").items())
+    try:
+        await _create_replacing(collection, keys, spec)
+    except DuplicateKeyError:
+        # Existing duplicates: keep lookups indexed until the data is cleaned up
+        print(
+            f"[WARNING] {collection.name}: duplicate values block unique index "
+            f"{spec['name']}, creating it without the constraint"
+        )
+        spec.pop("unique", None)
+        spec.pop("partialFilterExpression", None)
+        spec["name"] = spec["name"].removesuffix("_unique")
+        await _create_replacing(collection, keys, spec)
+
+
+async def ensure_indexes():
+    """Create (or update) every index the bot's queries rely on."""
+    count = 0
+    for collection, model in _indexes():
+        await _create(collection, model)
+        count += 1
+    print(f"[DEBUG] Ensured {count} indexes")
@@ -8,6 +8,25 @@ API_KEY: str | None = os.getenv("api_key")  # For HenrikDev API
 URI_KEY: str | None = os.getenv("uri_key")  # URI for MongoDB
 BOT_TOKEN: str | None = os.getenv("bot_token")  # Discord bot token
 
+# "mongo" (default) or "memory" to run against an in-process stand-in
+STORAGE_BACKEND: str = (os.getenv("storage_backend") or "mongo").lower()
+
+# Guild that stats stored before they were kept per guild belong to
+HOME_GUILD_ID: str | None = os.getenv("home_guild_id")
+
+# Keep a zlib-compressed copy of every raw HenrikDev match payload in matches_raw
+ARCHIVE_RAW_MATCHES: bool = (os.getenv("archive_raw_matches") or "1").lower() not in {
+    "0",
+    "false",
+    "no",
+}
+
+# Database commands slower than this are logged and flagged in !queryreport
+SLOW_QUERY_MS: float = float(os.getenv("slow_query_ms") or 100)
+
+# HenrikDev requests allowed per minute for API_KEY (Basic keys get 30)
+HENRIK_RATE_LIMIT: int = int(os.getenv("henrik_rate_limit") or 30)
+
 TIME_ZONE_CST: ZoneInfo = ZoneInfo("America/Chicago")
 
 # Developer Tools/Settings
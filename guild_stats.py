@@ -0,0 +1,489 @@
+"""
+One guild's ladder: its players' stats, rankings, MMR ledger and seasons.
+
+Every stats, ledger, snapshot and season document carries the id of the guild
+it belongs to, so one bot process can serve several communities. A guild's
+players are only read into memory when the guild first needs them, through
+`bot.stats_for(guild)`.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from database import (
+    all_matches,
+    mmr_collection,
+    mmr_ledger,
+    mmr_snapshots,
+    seasons,
+    tdm_matches,
+    tdm_mmr_collection,
+)
+from mmr_ledger import MmrLedger
+from persistence import save_mmr, save_tdm_mmr
+from player_stats import MMR, TDM, PlayerStatsStore
+from ranking import Rankings
+from user_directory import directory
+from views.leaderboard_view import invalidate_leaderboards
+
+
+def current_season_id(guild_id) -> str:
+    """_id of the guild's current season document."""
+    return f"{guild_id}:current"
+
+
+class GuildStats:
+    def __init__(self, guild_id):
+        # Stored as a string, like player ids
+        self.guild_id = str(guild_id)
+        self.player_mmr = PlayerStatsStore()
+        self.rankings = Rankings(self.player_mmr)
+        self.player_names = {}
+        self.ledger = MmrLedger(self.guild_id)
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def ensure_loaded(self):
+        """Load the guild's stats on first use; concurrent callers wait for it."""
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            await self.load_mmr_data()
+            await self.load_tdm_mmr_data()
+            await self.ledger.load(self.player_mmr)
+            await seasons.update_one(
+                {"_id": current_season_id(self.guild_id)},
+                {
+                    "$setOnInsert": {
+                        "guild_id": self.guild_id,
+                        "matches_played": 0,
+                        "match_ids": [],
+                        "season_number": 0,
+                        "winner_mmr": None,
+                        "winner_name": None,
+                        "winner_player_id": None,
+                        "started_at": datetime.now(timezone.utc),
+                        "ended_at": None,
+                    }
+                },
+                upsert=True,
+            )
+            self.loaded = True
+            print(
+                f"[DEBUG] Loaded stats of guild {self.guild_id} "
+                f"({len(self.player_mmr)} players)"
+            )
+
+    async def create_new_season(
+        self, *, reset_player_stats: bool = True, winner
+    ) -> dict:
+        current_id = current_season_id(self.guild_id)
+        current = await seasons.find_one({"_id": current_id})
+        current_num = int(current.get("season_number", 0))
+        next_num = current_num + 1
+
+        # Save Old Season
+        old_season_obj = {
+            "_id": f"{self.guild_id}:{current_num}",
+            "guild_id": self.guild_id,
+            "matches_played": current.get("matches_played"),
+            "season_number": current_num,
+            "winner_mmr": winner.get("mmr"),
+            "winner_name": winner.get("name"),
+            "winner_player_id": winner.get("player_id"),
+            "started_at": current.get("started_at"),
+            "ended_at": datetime.now(timezone.utc),
+        }
+        await seasons.insert_one(old_season_obj)
+
+        # Create New Season
+
+        new_season_obj = {
+            "matches_played": 0,
+            "season_number": next_num,
+            "winner_mmr": None,
+            "winner_name": None,
+            "winner_player_id": None,
+            "started_at": datetime.now(timezone.utc),
+            "ended_at": None,
+        }
+
+        await seasons.update_one(
+            {"_id": current_id},
+            {"$set": {"guild_id": self.guild_id, "match_ids": [], **new_season_obj}},
+            upsert=True,
+        )
+
+        if reset_player_stats:
+            await self._reset_all_players_for_new_season(next_num)
+
+        return new_season_obj
+
+    async def _reset_all_players_for_new_season(self, season_number: int) -> None:
+        """
+        Hard reset of the guild's per‑season stats and MMR in the correct collections.
+        Also resets in-memory caches so commands reflect the reset immediately.
+        """
+        BASE_MMR = 1000
+
+        # Reset core 10-mans stats in db
+        await mmr_collection.update_many(
+            {"guild_id": self.guild_id},
+            {
+                "$set": {
+                    "mmr": BASE_MMR,
+                    "wins": 0,
+                    "losses": 0,
+                    "total_combat_score": 0,
+                    "total_kills": 0,
+                    "total_deaths": 0,
+                    "matches_played": 0,
+                    "total_rounds_played": 0,
+                    "average_combat_score": 0,
+                    "kill_death_ratio": 0,
+                }
+            },
+        )
+
+        # Reset TDM stats in db
+        await tdm_mmr_collection.update_many(
+            {"guild_id": self.guild_id},
+            {
+                "$set": {
+                    "tdm_mmr": BASE_MMR,
+                    "tdm_wins": 0,
+                    "tdm_losses": 0,
+                    "tdm_total_kills": 0,
+                    "tdm_total_deaths": 0,
+                    "tdm_matches_played": 0,
+                    "tdm_avg_kills": 0.0,
+                    "tdm_kd_ratio": 0.0,
+                }
+            },
+        )
+
+        # 3) Reset in-memory cache
+        for _pid, stats in list(self.player_mmr.items()):
+            # Core 10-mans
+            stats.update(
+                {
+                    "mmr": BASE_MMR,
+                    "wins": 0,
+                    "losses": 0,
+                    "total_combat_score": 0,
+                    "total_kills": 0,
+                    "total_deaths": 0,
+                    "matches_played": 0,
+                    "total_rounds_played": 0,
+                    "average_combat_score": 0,
+                    "kill_death_ratio": 0,
+                }
+            )
+            if "tdm_mmr" in stats:
+                stats.update(
+                    {
+                        "tdm_mmr": BASE_MMR,
+                        "tdm_wins": 0,
+                        "tdm_losses": 0,
+                        "tdm_total_kills": 0,
+                        "tdm_total_deaths": 0,
+                        "tdm_matches_played": 0,
+                        "tdm_avg_kills": 0.0,
+                        "tdm_kd_ratio": 0.0,
+                        "tdm_streak": 0,
+                        "tdm_performance_history": [],
+                    }
+                )
+
+        await self.load_mmr_data()
+        await self.load_tdm_mmr_data()
+        # Rebuilds after this point start from the reset state
+        await self.ledger.snapshot(
+            self.player_mmr, reason=f"season {season_number} reset"
+        )
+        invalidate_leaderboards(self.guild_id)
+
+    async def load_mmr_data(self):
+        # Merged into the existing records, so TDM stats (from tdm_mmr_data)
+        # survive a reload of the 10-mans fields
+        self.player_names.clear()
+
+        async for doc in mmr_collection.find({"guild_id": self.guild_id}):
+            player_id = doc["player_id"]
+            self.player_mmr.load(
+                player_id,
+                {
+                    "mmr": doc.get("mmr", 1000),
+                    "wins": doc.get("wins", 0),
+                    "losses": doc.get("losses", 0),
+                    "total_combat_score": doc.get("total_combat_score", 0),
+                    "total_kills": doc.get("total_kills", 0),
+                    "total_deaths": doc.get("total_deaths", 0),
+                    "matches_played": doc.get("matches_played", 0),
+                    "total_rounds_played": doc.get("total_rounds_played", 0),
+                    "average_combat_score": doc.get("average_combat_score", 0),
+                    "kill_death_ratio": doc.get("kill_death_ratio", 0),
+                },
+            )
+
+    async def _flush_stats(self, save, group, player_ids):
+        if player_ids is None:
+            player_ids = self.player_mmr.take_dirty(group)
+        else:
+            player_ids = [str(pid) for pid in player_ids]
+            self.player_mmr.mark_clean(player_ids, group)
+        try:
+            await save(self.guild_id, self.player_mmr, player_ids)
+        except Exception:
+            # Keep the changes pending so the next save retries them
+            for pid in player_ids:
+                self.player_mmr.mark_dirty(pid, group)
+            raise
+        if player_ids:
+            invalidate_leaderboards(self.guild_id)
+
+    async def save_mmr_data(self, player_ids=None):
+        """Persist 10-mans stats for `player_ids` (default: every changed player)."""
+        await self._flush_stats(save_mmr, MMR, player_ids)
+
+    # adjust MMR and track wins/losses
+    def adjust_mmr(self, winning_team, losing_team):
+        MMR_CONSTANT = 32
+
+        # Calculate average MMR for winning and losing teams
+        winning_team_mmr = sum(
+            self.player_mmr[player["id"]]["mmr"] for player in winning_team
+        ) / len(winning_team)
+        losing_team_mmr = sum(
+            self.player_mmr[player["id"]]["mmr"] for player in losing_team
+        ) / len(losing_team)
+
+        # Calculate expected results
+        expected_win = 1 / (1 + 10 ** ((losing_team_mmr - winning_team_mmr) / 400))
+        expected_loss = 1 / (1 + 10 ** ((winning_team_mmr - losing_team_mmr) / 400))
+
+        # Adjust MMR for winning team
+        for player in winning_team:
+            player_id = player["id"]
+            current_mmr = self.player_mmr[player_id]["mmr"]
+            new_mmr = current_mmr + MMR_CONSTANT * (1 - expected_win)
+            self.player_mmr[player_id]["mmr"] = round(new_mmr)
+            self.player_mmr[player_id]["wins"] += 1
+
+        # Adjust MMR for losing team
+        for player in losing_team:
+            player_id = player["id"]
+            current_mmr = self.player_mmr[player_id]["mmr"]
+            new_mmr = current_mmr + MMR_CONSTANT * (0 - expected_loss)
+            self.player_mmr[player_id]["mmr"] = max(0, round(new_mmr))
+            self.player_mmr[player_id]["losses"] += 1
+
+    def adjust_tdm_mmr(self, winning_team, losing_team):
+
+        BASE_MMR_CHANGE = 25
+        MAX_MMR_CHANGE = 35
+        K_FACTOR = 32
+
+        winning_team_mmr = sum(
+            self.player_mmr[player["id"]].get("tdm_mmr", 1000)
+            for player in winning_team
+        ) / len(winning_team)
+
+        losing_team_mmr = sum(
+            self.player_mmr[player["id"]].get("tdm_mmr", 1000) for player in losing_team
+        ) / len(losing_team)
+
+        expected_win = 1 / (1 + 10 ** ((losing_team_mmr - winning_team_mmr) / 400))
+        expected_loss = 1 / (1 + 10 ** ((winning_team_mmr - losing_team_mmr) / 400))
+        for player in winning_team:
+            player_id = player["id"]
+            self.ensure_tdm_player_mmr(player_id)
+
+            performance_mod = self._calculate_tdm_performance_modifier(player_id)
+
+            uncertainty_mod = self._calculate_tdm_uncertainty_modifier(player_id)
+
+            raw_mmr_change = K_FACTOR * (1 - expected_win)
+            modified_mmr_change = raw_mmr_change * performance_mod * uncertainty_mod
+
+            final_mmr_change = min(
+                MAX_MMR_CHANGE, max(BASE_MMR_CHANGE, modified_mmr_change)
+            )
+
+            # Update player's MMR and record
+            current_mmr = self.player_mmr[player_id].get("tdm_mmr", 1000)
+            self.player_mmr[player_id]["tdm_mmr"] = round(
+                current_mmr + final_mmr_change
+            )
+            self.player_mmr[player_id]["tdm_wins"] = (
+                self.player_mmr[player_id].get("tdm_wins", 0) + 1
+            )
+            self.player_mmr[player_id]["latest_tdm_mmr_change"] = final_mmr_change
+
+        # Process losing team
+        for player in losing_team:
+            player_id = player["id"]
+            self.ensure_tdm_player_mmr(player_id)
+            performance_mod = self._calculate_tdm_performance_modifier(player_id)
+
+            uncertainty_mod = self._calculate_tdm_uncertainty_modifier(player_id)
+
+            raw_mmr_change = K_FACTOR * (0 - expected_loss)
+            modified_mmr_change = raw_mmr_change * performance_mod * uncertainty_mod
+
+            final_mmr_change = max(
+                -MAX_MMR_CHANGE, min(-BASE_MMR_CHANGE, modified_mmr_change)
+            )
+
+            # Update player's MMR and record
+            current_mmr = self.player_mmr[player_id].get("tdm_mmr", 1000)
+            self.player_mmr[player_id]["tdm_mmr"] = max(
+                0, round(current_mmr + final_mmr_change)
+            )
+            self.player_mmr[player_id]["tdm_losses"] = (
+                self.player_mmr[player_id].get("tdm_losses", 0) + 1
+            )
+            self.player_mmr[player_id]["latest_tdm_mmr_change"] = final_mmr_change
+
+    async def save_tdm_mmr_data(self, player_ids=None):
+        """Save TDM MMR data to the database (default: every changed player)"""
+        await self._flush_stats(save_tdm_mmr, TDM, player_ids)
+
+    async def load_tdm_mmr_data(self):
+        async for doc in tdm_mmr_collection.find({"guild_id": self.guild_id}):
+            self.player_mmr.load(
+                doc["player_id"],
+                {
+                    "tdm_mmr": doc.get("tdm_mmr", 1000),
+                    "tdm_wins": doc.get("tdm_wins", 0),
+                    "tdm_losses": doc.get("tdm_losses", 0),
+                    "tdm_total_kills": doc.get("tdm_total_kills", 0),
+                    "tdm_total_deaths": doc.get("tdm_total_deaths", 0),
+                    "tdm_matches_played": doc.get("tdm_matches_played", 0),
+                    "tdm_avg_kills": doc.get("tdm_avg_kills", 0),
+                    "tdm_kd_ratio": doc.get("tdm_kd_ratio", 0),
+                    "tdm_streak": doc.get("tdm_streak", 0),
+                    "tdm_performance_history": doc.get("tdm_performance_history", []),
+                },
+            )
+
+    def ensure_tdm_player_mmr(self, player_id):
+        if player_id not in self.player_mmr:
+            self.player_mmr[player_id] = {}
+
+        # TDM stats were loaded with load_tdm_mmr_data; only new players need defaults
+        player_data = self.player_mmr[player_id]
+        if "tdm_mmr" not in player_data:
+            player_data.update(
+                {
+                    "tdm_mmr": 1000,
+                    "tdm_wins": 0,
+                    "tdm_losses": 0,
+                    "tdm_total_kills": 0,
+                    "tdm_total_deaths": 0,
+                    "tdm_matches_played": 0,
+                    "tdm_avg_kills": 0.0,
+                    "tdm_kd_ratio": 0.0,
+                    "tdm_streak": 0,
+                    "tdm_performance_history": [],
+                }
+            )
+
+    def _calculate_tdm_performance_modifier(self, player_id):
+        player_data = self.player_mmr[player_id]
+        history = player_data.get("tdm_performance_history", [])
+
+        if not history:
+            return 1.0
+
+        avg_recent_kd = sum(history) / len(history)
+
+        modifier = 1.0 + (avg_recent_kd - 1.0) * 0.2
+        return max(0.8, min(1.2, modifier))
+
+    def _calculate_tdm_uncertainty_modifier(self, player_id):
+        player_data = self.player_mmr[player_id]
+        matches_played = player_data.get("tdm_matches_played", 0)
+
+        if matches_played < 10:
+            return 1.5
+        elif matches_played < 20:
+            return 1.25
+        elif matches_played < 30:
+            return 1.1
+        else:
+            return 1.0
+
+    def ensure_player_mmr(self, player_id, player_names):
+        if player_id not in self.player_mmr:
+            self.player_mmr[player_id] = {
+                "mmr": 1000,
+                "wins": 0,
+                "losses": 0,
+                "total_combat_score": 0,
+                "total_kills": 0,
+                "total_deaths": 0,
+                "matches_played": 0,
+                "total_rounds_played": 0,
+                "average_combat_score": 0,
+                "kill_death_ratio": 0,
+            }
+            user_data = directory.get(player_id)
+            if user_data:
+                player_names[player_id] = user_data.get("name", "Unknown")
+            else:
+                player_names[player_id] = "Unknown"
+
+
+async def adopt_legacy_data(home_guild_id):
+    """
+    Assign documents stored before stats were kept per guild to `home_guild_id`.
+
+    Safe to run on every startup: only documents without a guild id are
+    touched. Startup is refused while such documents exist and no home guild
+    is set, since no guild would see them.
+    """
+    legacy = {"guild_id": {"$exists": False}}
+    collections = (
+        mmr_collection,
+        tdm_mmr_collection,
+        mmr_ledger,
+        mmr_snapshots,
+        all_matches,
+        tdm_matches,
+    )
+    if not home_guild_id:
+        unassigned = [
+            c.name
+            for c in (*collections, seasons)
+            if await c.find_one(legacy, projection={"_id": 1})
+        ]
+        if unassigned:
+            raise SystemExit(
+                f"[DB] {', '.join(unassigned)} hold documents without a guild id; "
+                "set home_guild_id to the id of the guild they belong to"
+            )
+        return
+
+    home = str(home_guild_id)
+    for collection in collections:
+        result = await collection.update_many(legacy, {"$set": {"guild_id": home}})
+        if result.modified_count:
+            print(
+                f"[DEBUG] {collection.name}: assigned {result.modified_count} "
+                f"documents to guild {home}"
+            )
+
+    # The current season moves to the guild's own _id; ended seasons keep theirs
+    current = await seasons.find_one({"_id": "current"})
+    if current is not None:
+        current.pop("_id")
+        await seasons.update_one(
+            {"_id": current_season_id(home)},
+            {"$setOnInsert": {**current, "guild_id": home}},
+            upsert=True,
+        )
+        await seasons.delete_one({"_id": "current"})
+    await seasons.update_many(legacy, {"$set": {"guild_id": home}})
@@ -1,11 +1,10 @@
 # identity.py
-import aiohttp
-from database import users
-from riot_api import get_account_by_puuid, get_account_by_riot_id
+from riot_api import HenrikClient, get_account_by_puuid, get_account_by_riot_id
+from user_directory import directory
 
 
-async def ensure_current_riot_identity(discord_id: int):
-    doc = users.find_one({"discord_id": str(discord_id)})
+async def ensure_current_riot_identity(discord_id: int, client: HenrikClient):
+    doc = await directory.fetch(discord_id)
     if not doc:
         return (
             False,
@@ -24,35 +23,35 @@ async def ensure_current_riot_identity(discord_id: int):
             None,
         )
 
-    async with aiohttp.ClientSession() as session:
-        acc = None
-        if puuid:
-            acc = await get_account_by_puuid(session, puuid)
-        if acc is None and name and tag:
-            acc = await get_account_by_riot_id(session, name, tag)
-
-        if acc is None:
-            return (
-                False,
-                "I couldn’t find your Riot account anymore. Re-link with `!linkriot Name#Tag`.",
-                None,
-            )
-
-        new_name = acc["gameName"]
-        new_tag = acc["tagLine"]
-        new_puuid = acc["puuid"]
-
-        updates = {}
-        if new_puuid and new_puuid != puuid:
-            updates["puuid"] = new_puuid
-        if new_name and new_name != name:
-            updates["name"] = new_name.lower().strip()
-        if new_tag and new_tag != tag:
-            updates["tag"] = new_tag.lower().strip()
-
-        print(f"[DEBUG]: Updating database for: {new_name}#{new_tag}")
-        if updates:
-            users.update_one({"_id": doc["_id"]}, {"$set": updates})
-            doc.update(updates)
-
-        return (True, "", doc)
+    acc = None
+    if puuid:
+        acc = await get_account_by_puuid(client, puuid)
+    if acc is None and name and tag:
+        acc = await get_account_by_riot_id(client, name, tag)
+
+    if acc is None:
+        return (
+            False,
+            "I couldn’t find your Riot account anymore. Re-link with `!linkriot Name#Tag`.",
+            None,
+        )
+
+    new_name = acc["gameName"]
+    new_tag = acc["tagLine"]
+    new_puuid = acc["puuid"]
+
+    updates = {}
+    if new_puuid and new_puuid != puuid:
+        updates["puuid"] = new_puuid
+    if new_name and new_name != name:
+        updates["name"] = new_name.lower().strip()
+    if new_tag and new_tag != tag:
+        updates["tag"] = new_tag.lower().strip()
+
+    print(f"[DEBUG]: Updating database for: {new_name}#{new_tag}")
+    if updates:
+        # The directory is updated now; the database write can trail behind
+        directory.upsert_later(discord_id, **updates)
+        doc.update(updates)
+
+    return (True, "", doc)
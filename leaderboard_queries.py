@@ -0,0 +1,83 @@
+"""Server-side leaderboard page queries over one guild's mmr_data / tdm_mmr_data."""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from database import mmr_collection, tdm_mmr_collection, users
+
+# Sort keys per leaderboard mode (10-mans keys match `!leaderboard <type>`)
+LEADERBOARD_KEYS = {
+    "normal": (
+        "mmr",
+        "average_combat_score",
+        "kill_death_ratio",
+        "wins",
+        "losses",
+    ),
+    "tdm": ("tdm_mmr",),
+}
+
+# Only users with at least one match in the mode are listed
+_PLAYED_FILTER = {
+    "normal": {
+        "$or": [
+            {"matches_played": {"$gt": 0}},
+            {
+                "matches_played": {"$exists": False},
+                "$or": [{"wins": {"$gt": 0}}, {"losses": {"$gt": 0}}],
+            },
+        ]
+    },
+    "tdm": {"$or": [{"tdm_wins": {"$gt": 0}}, {"tdm_losses": {"$gt": 0}}]},
+}
+
+
+def _collection(mode: str):
+    return tdm_mmr_collection if mode == "tdm" else mmr_collection
+
+
+def _sort_spec(key: str) -> list:
+    # player_id breaks ties so pages never overlap or skip players
+    return [(key, DESCENDING), ("player_id", ASCENDING)]
+
+
+def _played_filter(mode: str, guild_id: str) -> dict:
+    return {"guild_id": str(guild_id), **_PLAYED_FILTER[mode]}
+
+
+def leaderboard_indexes():
+    """(collection, IndexModel) for the compound index backing every sort."""
+    for mode, keys in LEADERBOARD_KEYS.items():
+        for key in keys:
+            yield _collection(mode), IndexModel(
+                [("guild_id", ASCENDING), *_sort_spec(key)], name=f"leaderboard_{key}"
+            )
+
+
+async def count_leaderboard(guild_id: str, mode: str) -> int:
+    return await _collection(mode).count_documents(_played_filter(mode, guild_id))
+
+
+async def fetch_leaderboard_page(
+    guild_id: str, mode: str, key: str, page: int, per_page: int
+) -> list:
+    """
+    Return one page of the guild's leaderboard rows, each stats document
+    carrying the linked Riot account under "user" (or no "user" when unlinked).
+    """
+    pipeline = [
+        {"$match": _played_filter(mode, guild_id)},
+        {"$sort": dict(_sort_spec(key))},
+        {"$skip": page * per_page},
+        {"$limit": per_page},
+        {
+            "$lookup": {
+                "from": users.name,
+                "localField": "player_id",
+                "foreignField": "discord_id",
+                "as": "user",
+            }
+        },
+        {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}},
+    ]
+    cursor = await _collection(mode).aggregate(pipeline)
+    return await cursor.to_list()
@@ -0,0 +1,126 @@
+"""
+Compact match records for the `matches` collection.
+
+The HenrikDev v4 payload carries every round, kill event and economy snapshot,
+most of which the bot never reads back. `lean_match` keeps what the bot and
+DebugTools do use, under the same field names as the payload (so readers work
+on both old and new documents); the full payload can be kept zlib-compressed
+in a separate cold collection with `raw_archive_doc`.
+"""
+
+import json
+import zlib
+from datetime import datetime, timezone
+
+from bson import Binary
+
+# Bumped whenever the lean record layout changes
+LEAN_FORMAT = 1
+
+_PLAYER_STATS = ("score", "kills", "deaths", "assists", "headshots")
+
+
+def is_lean(match: dict) -> bool:
+    return match.get("format") == LEAN_FORMAT
+
+
+def _round_count(value) -> int:
+    # Team rounds show up as an int or as {"won": n, "lost": m} across versions
+    if isinstance(value, dict):
+        value = value.get("won", 0)
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def rounds_played(match: dict) -> int:
+    """Rounds played in a lean record or a raw payload."""
+    metadata = match.get("metadata") or {}
+    total = metadata.get("rounds_played") or metadata.get("total_rounds")
+    if total:
+        return int(total)
+    if match.get("rounds"):
+        return len(match["rounds"])
+    teams = match.get("teams") or []
+    return sum(_lean_team(team)["rounds"]["won"] for team in teams)
+
+
+def _lean_team(team: dict) -> dict:
+    rounds = team.get("rounds")
+    won = _round_count(team.get("rounds_won", rounds))
+    lost = _round_count(
+        team.get("rounds_lost", rounds.get("lost") if isinstance(rounds, dict) else 0)
+    )
+    return {
+        "team_id": team.get("team_id"),
+        "won": team.get("won"),
+        "rounds": {"won": won, "lost": lost},
+    }
+
+
+def _lean_player(player: dict, discord_ids: dict) -> dict:
+    stats = player.get("stats") or {}
+    agent = player.get("agent")
+    key = ((player.get("name") or "").lower(), (player.get("tag") or "").lower())
+    return {
+        "player_id": discord_ids.get(key),
+        "puuid": player.get("puuid"),
+        "name": player.get("name"),
+        "tag": player.get("tag"),
+        "team_id": player.get("team_id"),
+        "agent": agent.get("name") if isinstance(agent, dict) else agent,
+        "stats": {field: stats.get(field, 0) for field in _PLAYER_STATS},
+    }
+
+
+def lean_match(match: dict, discord_ids: dict | None = None) -> dict:
+    """
+    Build the compact record for a raw v4 match payload.
+
+    `discord_ids` maps lowercased (name, tag) to the linked Discord id, so the
+    stored roster stays attributable after players rename their Riot account.
+    """
+    metadata = match.get("metadata") or {}
+    map_info = metadata.get("map")
+    queue = metadata.get("queue")
+    return {
+        "format": LEAN_FORMAT,
+        "metadata": {
+            "match_id": metadata.get("match_id"),
+            "map": (
+                {"id": map_info.get("id"), "name": map_info.get("name")}
+                if isinstance(map_info, dict)
+                else {"name": map_info}
+            ),
+            "queue": queue.get("id") if isinstance(queue, dict) else queue,
+            "started_at": metadata.get("started_at"),
+            "game_length_in_ms": metadata.get("game_length_in_ms"),
+            "rounds_played": rounds_played(match),
+        },
+        "teams": [_lean_team(team) for team in match.get("teams") or []],
+        "players": [
+            _lean_player(player, discord_ids or {})
+            for player in match.get("players") or []
+        ],
+    }
+
+
+def compress_payload(match: dict) -> Binary:
+    data = json.dumps(match, default=str, separators=(",", ":")).encode()
+    return Binary(zlib.compress(data, 6))
+
+
+def decompress_payload(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+
+def raw_archive_doc(match: dict) -> dict:
+    """Cold-storage document for a raw payload, keyed by match id."""
+    payload = {k: v for k, v in match.items() if k != "_id"}
+    return {
+        "_id": (match.get("metadata") or {}).get("match_id"),
+        "encoding": "zlib+json",
+        "archived_at": datetime.now(timezone.utc),
+        "payload": compress_payload(payload),
+    }
@@ -0,0 +1,61 @@
+"""Idempotent match ingestion keyed by the HenrikDev match id."""
+
+from pymongo.errors import DuplicateKeyError
+
+from database import all_matches, tdm_matches
+
+_COLLECTIONS = {"normal": all_matches, "tdm": tdm_matches}
+
+
+def match_id_of(match: dict) -> str | None:
+    return (match.get("metadata") or {}).get("match_id")
+
+
+async def is_match_processed(match_id: str | None, mode: str = "normal") -> bool:
+    """Indexed lookup: has a match with this id already been recorded?"""
+    if not match_id:
+        return False
+    doc = await _COLLECTIONS[mode].find_one(
+        {"metadata.match_id": match_id}, projection={"_id": 1}
+    )
+    return doc is not None
+
+
+async def claim_match(
+    record: dict, mode: str = "normal", guild_id: str | None = None
+) -> bool:
+    """
+    Store `record` unless its match id is already stored.
+
+    `guild_id` (the guild the match is reported in) is stamped on the record,
+    so DebugTools can recompute one guild's season from its matches.
+    Returns True if this call stored it. Reports call this before applying any
+    MMR, so two concurrent reports of one match can't both go through: the
+    upsert (and the unique match id index behind it) lets only one insert.
+    """
+    collection = _COLLECTIONS[mode]
+    if guild_id is not None:
+        record["guild_id"] = str(guild_id)
+    match_id = match_id_of(record)
+    if not match_id:
+        # No id to de-duplicate on (mock data), always a new match
+        await collection.insert_one(record)
+        return True
+
+    fields = {k: v for k, v in record.items() if k != "_id"}
+    try:
+        result = await collection.update_one(
+            {"metadata.match_id": match_id}, {"$setOnInsert": fields}, upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    if result.upserted_id is None:
+        return False
+    record["_id"] = result.upserted_id
+    return True
+
+
+async def release_match(record: dict, mode: str = "normal"):
+    """Undo `claim_match` when a report fails before its stats were applied."""
+    if "_id" in record:
+        await _COLLECTIONS[mode].delete_one({"_id": record["_id"]})
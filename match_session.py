@@ -0,0 +1,168 @@
+"""
+State of one 10-mans match, from signup to report, and of a guild's TDM lobby.
+
+Each lobby has its own `MatchSession`, registered in `bot.sessions` under its
+match channel, so several lobbies can queue, vote and report in parallel.
+Views hold the session they belong to; commands look it up by the channel
+they're run in, or by the player running them, within the command's guild.
+A session also holds its guild's `GuildStats`, which its views rate players by.
+TDM keeps one `TDMLobby` per guild, created on first use by `bot.tdm_lobby`.
+"""
+
+import re
+
+import discord
+
+# Names of the roles and channels created for lobbies; channels may carry a
+# status suffix, e.g. "match-0042《7∕10》"
+LOBBY_NAME = re.compile(r"(match|tdm)-\d{4}(《[^》]*》)?")
+
+
+class MatchSession:
+    def __init__(self, match_name: str, guild_stats):
+        self.match_name = match_name
+        self.guild_id = None
+        self.guild_stats = guild_stats
+        self.signup_active = True
+        self.match_ongoing = False
+        self.match_not_reported = False
+
+        self.queue = []
+        self.team1 = []
+        self.team2 = []
+        self.captain1 = None
+        self.captain2 = None
+        self.chosen_mode = None
+        self.selected_map = None
+
+        self.match_channel = None
+        self.match_role = None
+        self.current_signup_message = None
+        self.signup_view = None
+        self.origin_ctx = None
+        # The vote or draft view currently running, stopped when the session ends
+        self.active_view = None
+
+    def has_player(self, player_id) -> bool:
+        return any(str(p["id"]) == str(player_id) for p in self.queue)
+
+    async def release_resources(self):
+        """Delete the match channel, role and signup message."""
+        if self.match_channel:
+            try:
+                await self.match_channel.delete()
+            except discord.NotFound:
+                print("[DEBUG] Match channel already deleted")
+            except discord.Forbidden:
+                print("[DEBUG] Missing permissions to delete match channel")
+            finally:
+                self.match_channel = None
+
+        if self.match_role:
+            try:
+                for member in self.match_role.members:
+                    await member.remove_roles(self.match_role)
+            except discord.HTTPException:
+                print("[DEBUG] Error removing roles from members")
+
+            # delete the role
+            try:
+                await self.match_role.delete()
+            except discord.NotFound:
+                print("[DEBUG] Match role already deleted")
+            except discord.Forbidden:
+                print("[DEBUG] Missing permissions to delete match role")
+            finally:
+                self.match_role = None
+
+        self.signup_active = False
+        self.match_not_reported = False
+        self.match_ongoing = False
+        self.queue.clear()
+
+        if self.current_signup_message:
+            try:
+                await self.current_signup_message.delete()
+            except discord.NotFound:
+                pass
+            finally:
+                self.current_signup_message = None
+
+
+class MatchSessions:
+    """Live match sessions, by the id of the channel they're played from."""
+
+    def __init__(self):
+        self._by_channel: dict[int, MatchSession] = {}
+
+    def __iter__(self):
+        return iter(list(self._by_channel.values()))
+
+    def __len__(self):
+        return len(self._by_channel)
+
+    def add(self, session: MatchSession, channel):
+        session.guild_id = channel.guild.id
+        self._by_channel[channel.id] = session
+
+    def in_guild(self, guild) -> list[MatchSession]:
+        return [session for session in self if session.guild_id == guild.id]
+
+    def for_channel(self, channel) -> MatchSession | None:
+        return self._by_channel.get(getattr(channel, "id", None))
+
+    def of_player(self, player_id) -> MatchSession | None:
+        """The session whose queue `player_id` is in, if any."""
+        return next((s for s in self if s.has_player(player_id)), None)
+
+    def for_context(self, ctx) -> MatchSession | None:
+        """
+        The session a command is about: the one played from its channel, else
+        the author's, else the only live session of the command's guild.
+        """
+        guild_sessions = self.in_guild(ctx.guild)
+        session = self.for_channel(ctx.channel) or next(
+            (s for s in guild_sessions if s.has_player(ctx.author.id)), None
+        )
+        if session is None and len(guild_sessions) == 1:
+            session = guild_sessions[0]
+        return session
+
+    def names(self) -> set[str]:
+        return {session.match_name for session in self}
+
+    def remove(self, session: MatchSession):
+        for channel_id, registered in list(self._by_channel.items()):
+            if registered is session:
+                del self._by_channel[channel_id]
+
+    async def end(self, session: MatchSession):
+        """Unregister `session` and delete its Discord resources."""
+        self.remove(session)
+        for view in (session.signup_view, session.active_view):
+            if view is not None:
+                view.stop()
+        session.signup_view = session.active_view = None
+        await session.release_resources()
+
+
+class TDMLobby:
+    """The 3v3 TDM signup or match of one guild."""
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.signup_active = False
+        self.match_ongoing = False
+        self.match_name = None
+        self.queue = []
+        self.team1 = []
+        self.team2 = []
+        self.selected_map = None
+        self.match_channel = None
+        self.match_role = None
+        self.current_message = None
+
+
+def is_lobby_resource(name: str) -> bool:
+    """Whether a role or channel name is one the bot creates for lobbies."""
+    return LOBBY_NAME.fullmatch(name.lower()) is not None
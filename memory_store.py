@@ -0,0 +1,661 @@
+"""
+In-memory stand-in for the subset of pymongo's async API used by the bot.
+
+Selected with `storage_backend=memory` (see `database.py`), so the report
+pipeline, leaderboards and season logic can run, be benchmarked and be
+load-tested without a MongoDB cluster. Documents live in plain lists and are
+deep-copied on the way in and out, like a real round trip. Every collection
+counts the operations it serves (`MemoryClient.op_counts`).
+"""
+
+import copy
+from collections import Counter
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+_MISSING = object()
+
+# Type aliases accepted by $type
+_BSON_TYPES = {
+    "string": str,
+    "int": int,
+    "double": float,
+    "number": (int, float),
+    "bool": bool,
+    "object": dict,
+    "array": list,
+}
+
+
+# Document paths
+def _get_path(doc, path: str):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+    return value
+
+
+def _parent(doc: dict, path: str, create: bool = True):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        if part not in doc:
+            if not create:
+                return None, parts[-1]
+            doc[part] = {}
+        doc = doc[part]
+    return doc, parts[-1]
+
+
+def _set_path(doc: dict, path: str, value):
+    parent, key = _parent(doc, path)
+    parent[key] = value
+
+
+def _unset_path(doc: dict, path: str):
+    parent, key = _parent(doc, path, create=False)
+    if isinstance(parent, dict):
+        parent.pop(key, None)
+
+
+# Query matching
+def _compare(value, other, op) -> bool:
+    if value is _MISSING or value is None or other is None:
+        return False
+    try:
+        return op(value, other)
+    except TypeError:
+        return False
+
+
+def _equals(value, expected) -> bool:
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def _match_operators(value, condition: dict) -> bool:
+    for op, arg in condition.items():
+        if op == "$eq":
+            ok = _equals(value, arg)
+        elif op == "$ne":
+            ok = not _equals(value, arg)
+        elif op == "$gt":
+            ok = _compare(value, arg, lambda a, b: a > b)
+        elif op == "$gte":
+            ok = _compare(value, arg, lambda a, b: a >= b)
+        elif op == "$lt":
+            ok = _compare(value, arg, lambda a, b: a < b)
+        elif op == "$lte":
+            ok = _compare(value, arg, lambda a, b: a <= b)
+        elif op == "$in":
+            ok = any(_equals(value, candidate) for candidate in arg)
+        elif op == "$nin":
+            ok = not any(_equals(value, candidate) for candidate in arg)
+        elif op == "$exists":
+            ok = (value is not _MISSING) == bool(arg)
+        elif op == "$type":
+            ok = isinstance(value, _BSON_TYPES[arg])
+        else:
+            raise OperationFailure(f"unsupported query operator {op}")
+        if not ok:
+            return False
+    return True
+
+
+def _is_operator_doc(condition) -> bool:
+    return isinstance(condition, dict) and any(k.startswith("$") for k in condition)
+
+
+def matches(doc: dict, query: dict | None) -> bool:
+    """True when `doc` satisfies the Mongo-style `query`."""
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            ok = any(matches(doc, sub) for sub in condition)
+        elif key == "$and":
+            ok = all(matches(doc, sub) for sub in condition)
+        elif key == "$nor":
+            ok = not any(matches(doc, sub) for sub in condition)
+        elif _is_operator_doc(condition):
+            ok = _match_operators(_get_path(doc, key), condition)
+        else:
+            ok = _equals(_get_path(doc, key), condition)
+        if not ok:
+            return False
+    return True
+
+
+# Sorting / projection
+def _normalize_sort(key_or_list, direction=None) -> list:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return list(key_or_list)
+
+
+def _sort_docs(docs: list, spec: list) -> list:
+    # Stable sorts from the least significant key; missing/None sort lowest
+    for key, direction in reversed(spec):
+        docs.sort(
+            key=lambda d, k=key: (
+                (0, 0) if _get_path(d, k) in (_MISSING, None) else (1, _get_path(d, k))
+            ),
+            reverse=direction < 0,
+        )
+    return docs
+
+
+def _project(doc: dict, projection) -> dict:
+    if not projection:
+        return doc
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        out = {}
+        for path in include:
+            value = _get_path(doc, path)
+            if value is not _MISSING:
+                _set_path(out, path, value)
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+# Updates
+def _apply_update(doc: dict, update: dict, inserting: bool) -> bool:
+    """Apply update operators in place; return True if the document changed."""
+    before = copy.deepcopy(doc)
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, arg in fields.items():
+            if op in ("$set", "$setOnInsert"):
+                _set_path(doc, path, copy.deepcopy(arg))
+            elif op == "$unset":
+                _unset_path(doc, path)
+            elif op == "$inc":
+                current = _get_path(doc, path)
+                _set_path(doc, path, (0 if current is _MISSING else current) + arg)
+            elif op in ("$addToSet", "$push"):
+                current = _get_path(doc, path)
+                items = current if isinstance(current, list) else []
+                values = arg["$each"] if _is_operator_doc(arg) else [arg]
+                for value in values:
+                    if op == "$push" or value not in items:
+                        items.append(copy.deepcopy(value))
+                _set_path(doc, path, items)
+            elif op == "$pull":
+                current = _get_path(doc, path)
+                if isinstance(current, list):
+                    _set_path(doc, path, [v for v in current if v != arg])
+            else:
+                raise OperationFailure(f"unsupported update operator {op}")
+    return doc != before
+
+
+def _upsert_seed(query: dict) -> dict:
+    """Equality fields of a filter, which Mongo copies into an upserted doc."""
+    seed = {}
+    for key, condition in (query or {}).items():
+        if key.startswith("$") or _is_operator_doc(condition):
+            continue
+        _set_path(seed, key, copy.deepcopy(condition))
+    return seed
+
+
+class MemoryCursor:
+    """Lazy cursor supporting sort/skip/limit, async iteration and to_list."""
+
+    def __init__(self, load, projection=None):
+        self._load = load
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _results(self) -> list:
+        docs = self._load()
+        if self._sort:
+            docs = _sort_docs(docs, self._sort)
+        docs = docs[self._skip :]
+        if self._limit:
+            docs = docs[: self._limit]
+        return [copy.deepcopy(_project(d, self._projection)) for d in docs]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+    async def to_list(self, length: int | None = None) -> list:
+        docs = self._results()
+        return docs if not length else docs[:length]
+
+
+class _BulkOps:
+    """Receives pymongo write models through their `_add_to_bulk` protocol."""
+
+    def __init__(self):
+        self.ops = []
+
+    def add_insert(self, document):
+        self.ops.append(("insert", document))
+
+    def add_update(self, selector, update, multi, upsert, **kwargs):
+        self.ops.append(("update", selector, update, multi, upsert))
+
+    def add_replace(self, selector, replacement, upsert, **kwargs):
+        self.ops.append(("replace", selector, replacement, upsert))
+
+    def add_delete(self, selector, limit, **kwargs):
+        self.ops.append(("delete", selector, limit))
+
+
+class MemoryCollection:
+    """One collection: a list of documents plus declared indexes."""
+
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.ops = Counter()
+        self._docs: list[dict] = []
+        self._indexes: dict[str, dict] = {"_id_": {"key": [("_id", 1)]}}
+
+    def __repr__(self):
+        return f"MemoryCollection({self.name!r}, {len(self._docs)} docs)"
+
+    # Internals
+    def _matching(self, query, sort=None) -> list[dict]:
+        docs = [d for d in self._docs if matches(d, query)]
+        if sort:
+            docs = _sort_docs(docs, _normalize_sort(sort))
+        return docs
+
+    @staticmethod
+    def _index_key(index: dict, doc: dict):
+        """Key of `doc` in a unique index, or None if the index excludes it."""
+        partial = index.get("partialFilterExpression")
+        if partial and not matches(doc, partial):
+            return None
+        return tuple(_get_path(doc, field) for field, _ in index["key"])
+
+    def _unique_indexes(self):
+        for name, index in self._indexes.items():
+            if index.get("unique") or name == "_id_":
+                yield name, index
+
+    def _duplicate(self, name: str) -> DuplicateKeyError:
+        return DuplicateKeyError(
+            f"E11000 duplicate key error collection: {self.name} index: {name}",
+            11000,
+        )
+
+    def _check_unique(self, doc: dict, ignore: dict | None = None):
+        """Raise DuplicateKeyError if `doc` (replacing `ignore`) breaks an index."""
+        for name, index in self._unique_indexes():
+            key = self._index_key(index, doc)
+            if key is None or (
+                ignore is not None and self._index_key(index, ignore) == key
+            ):
+                continue
+            for other in self._docs:
+                if other is not ignore and self._index_key(index, other) == key:
+                    raise self._duplicate(name)
+
+    def _insert(self, document: dict) -> dict:
+        doc = copy.deepcopy(document)
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self._docs.append(doc)
+        # pymongo sets the generated _id on the caller's document too
+        document.setdefault("_id", doc["_id"])
+        return doc
+
+    def _update(self, query, update, *, multi, upsert, sort=None) -> dict:
+        targets = self._matching(query, sort)
+        if not multi:
+            targets = targets[:1]
+        result = {"n": len(targets), "nModified": 0, "upserted": None}
+        for doc in targets:
+            updated = copy.deepcopy(doc)
+            if _apply_update(updated, update, inserting=False):
+                self._check_unique(updated, ignore=doc)
+                doc.clear()
+                doc.update(updated)
+                result["nModified"] += 1
+        if not targets and upsert:
+            doc = _upsert_seed(query)
+            _apply_update(doc, update, inserting=True)
+            result["upserted"] = self._insert(doc)["_id"]
+        return result
+
+    def _replace(self, query, replacement, *, upsert) -> dict:
+        targets = self._matching(query)[:1]
+        result = {"n": len(targets), "nModified": 0, "upserted": None}
+        if targets:
+            doc = targets[0]
+            new = {"_id": doc["_id"], **copy.deepcopy(replacement)}
+            self._check_unique(new, ignore=doc)
+            if new != doc:
+                doc.clear()
+                doc.update(new)
+                result["nModified"] = 1
+        elif upsert:
+            result["upserted"] = self._insert(replacement)["_id"]
+        return result
+
+    def _delete(self, query, limit: int) -> int:
+        targets = self._matching(query)
+        if limit:
+            targets = targets[:limit]
+        ids = {id(d) for d in targets}
+        self._docs = [d for d in self._docs if id(d) not in ids]
+        return len(targets)
+
+    @staticmethod
+    def _update_result(raw: dict) -> UpdateResult:
+        raw_result = {"n": raw["n"], "nModified": raw["nModified"]}
+        if raw["upserted"] is not None:
+            raw_result.update(n=1, upserted=raw["upserted"])
+        return UpdateResult(raw_result, True)
+
+    # Reads
+    def find(self, filter=None, projection=None, *, sort=None, skip=0, limit=0):
+        self.ops["find"] += 1
+        cursor = MemoryCursor(lambda: self._matching(filter), projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    async def find_one(self, filter=None, projection=None, *, sort=None):
+        self.ops["find_one"] += 1
+        docs = self._matching(filter, sort)
+        return copy.deepcopy(_project(docs[0], projection)) if docs else None
+
+    async def count_documents(self, filter=None) -> int:
+        self.ops["count_documents"] += 1
+        return len(self._matching(filter))
+
+    async def estimated_document_count(self) -> int:
+        self.ops["estimated_document_count"] += 1
+        return len(self._docs)
+
+    async def distinct(self, key: str, filter=None) -> list:
+        self.ops["distinct"] += 1
+        values = []
+        for doc in self._matching(filter):
+            value = _get_path(doc, key)
+            if value is not _MISSING and value not in values:
+                values.append(value)
+        return values
+
+    async def aggregate(self, pipeline: list):
+        self.ops["aggregate"] += 1
+        docs = self._matching({})
+        for stage in pipeline:
+            ((op, arg),) = stage.items()
+            if op == "$match":
+                docs = [d for d in docs if matches(d, arg)]
+            elif op == "$sort":
+                docs = _sort_docs(list(docs), _normalize_sort(arg))
+            elif op == "$skip":
+                docs = docs[arg:]
+            elif op == "$limit":
+                docs = docs[:arg]
+            elif op == "$project":
+                docs = [_project(d, arg) for d in docs]
+            elif op == "$lookup":
+                docs = self._lookup(docs, arg)
+            elif op == "$unwind":
+                docs = self._unwind(docs, arg)
+            elif op == "$count":
+                docs = [{arg: len(docs)}]
+            else:
+                raise OperationFailure(f"unsupported pipeline stage {op}")
+        return MemoryCursor(lambda: docs)
+
+    def _lookup(self, docs: list, spec: dict) -> list:
+        foreign = self.database[spec["from"]]
+        out = []
+        for doc in docs:
+            local = _get_path(doc, spec["localField"])
+            joined = [
+                copy.deepcopy(other)
+                for other in foreign._docs
+                if _get_path(other, spec["foreignField"]) == local
+            ]
+            out.append({**doc, spec["as"]: joined})
+        return out
+
+    @staticmethod
+    def _unwind(docs: list, spec) -> list:
+        if isinstance(spec, str):
+            spec = {"path": spec}
+        field = spec["path"].lstrip("$")
+        keep_empty = spec.get("preserveNullAndEmptyArrays", False)
+        out = []
+        for doc in docs:
+            values = _get_path(doc, field)
+            if isinstance(values, list) and values:
+                out.extend({**doc, field: value} for value in values)
+            elif values not in (_MISSING, None) and not isinstance(values, list):
+                out.append(doc)
+            elif keep_empty:
+                out.append({k: v for k, v in doc.items() if k != field})
+        return out
+
+    # Writes
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        self.ops["insert_one"] += 1
+        return InsertOneResult(self._insert(document)["_id"], True)
+
+    async def insert_many(self, documents, ordered: bool = True) -> InsertManyResult:
+        self.ops["insert_many"] += 1
+        return InsertManyResult([self._insert(d)["_id"] for d in documents], True)
+
+    async def update_one(self, filter, update, upsert: bool = False, *, sort=None):
+        self.ops["update_one"] += 1
+        raw = self._update(filter, update, multi=False, upsert=upsert, sort=sort)
+        return self._update_result(raw)
+
+    async def update_many(self, filter, update, upsert: bool = False):
+        self.ops["update_many"] += 1
+        raw = self._update(filter, update, multi=True, upsert=upsert)
+        return self._update_result(raw)
+
+    async def replace_one(self, filter, replacement, upsert: bool = False):
+        self.ops["replace_one"] += 1
+        return self._update_result(self._replace(filter, replacement, upsert=upsert))
+
+    async def delete_one(self, filter) -> DeleteResult:
+        self.ops["delete_one"] += 1
+        return DeleteResult({"n": self._delete(filter, 1)}, True)
+
+    async def delete_many(self, filter) -> DeleteResult:
+        self.ops["delete_many"] += 1
+        return DeleteResult({"n": self._delete(filter, 0)}, True)
+
+    async def find_one_and_update(
+        self,
+        filter,
+        update,
+        projection=None,
+        sort=None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+    ):
+        self.ops["find_one_and_update"] += 1
+        docs = self._matching(filter, sort)
+        before = copy.deepcopy(docs[0]) if docs else None
+        raw = self._update(filter, update, multi=False, upsert=upsert, sort=sort)
+        if return_document == ReturnDocument.BEFORE:
+            doc = before
+        elif docs:
+            doc = docs[0]
+        elif raw["upserted"] is not None:
+            doc = self._matching({"_id": raw["upserted"]})[0]
+        else:
+            doc = None
+        return None if doc is None else copy.deepcopy(_project(doc, projection))
+
+    def _bulk_apply(self, index: int, op: tuple, result: dict):
+        kind, *args = op
+        if kind == "insert":
+            self._insert(args[0])
+            result["nInserted"] += 1
+            return
+        if kind == "delete":
+            result["nRemoved"] += self._delete(*args)
+            return
+        if kind == "update":
+            selector, update, multi, upsert = args
+            raw = self._update(selector, update, multi=multi, upsert=upsert)
+        else:
+            selector, replacement, upsert = args
+            raw = self._replace(selector, replacement, upsert=upsert)
+        if raw["upserted"] is not None:
+            result["nUpserted"] += 1
+            result["upserted"].append({"index": index, "_id": raw["upserted"]})
+        else:
+            result["nMatched"] += raw["n"]
+            result["nModified"] += raw["nModified"]
+
+    async def bulk_write(self, requests, ordered: bool = True) -> BulkWriteResult:
+        self.ops["bulk_write"] += 1
+        bulk = _BulkOps()
+        for request in requests:
+            request._add_to_bulk(bulk)
+
+        result = {
+            "nInserted": 0,
+            "nUpserted": 0,
+            "nMatched": 0,
+            "nModified": 0,
+            "nRemoved": 0,
+            "upserted": [],
+            "writeErrors": [],
+            "writeConcernErrors": [],
+        }
+        for index, op in enumerate(bulk.ops):
+            try:
+                self._bulk_apply(index, op, result)
+            except DuplicateKeyError as e:
+                result["writeErrors"].append(
+                    {"index": index, "code": e.code, "errmsg": str(e)}
+                )
+                if ordered:
+                    break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    # Indexes
+    async def create_index(self, keys, *, name: str | None = None, **kwargs) -> str:
+        self.ops["create_index"] += 1
+        spec = _normalize_sort(keys, 1)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in spec)
+        index = {"key": spec, **kwargs}
+        if kwargs.get("unique"):
+            seen = set()
+            for doc in self._docs:
+                key = self._index_key(index, doc)
+                if key is not None and repr(key) in seen:
+                    raise self._duplicate(name)
+                seen.add(repr(key))
+        self._indexes[name] = index
+        return name
+
+    async def drop_index(self, name: str):
+        self.ops["drop_index"] += 1
+        self._indexes.pop(name, None)
+
+    async def index_information(self) -> dict:
+        return copy.deepcopy(self._indexes)
+
+    async def drop(self):
+        self._docs.clear()
+        self._indexes = {"_id_": {"key": [("_id", 1)]}}
+
+
+class MemoryDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    async def list_collection_names(self) -> list[str]:
+        return [name for name, c in self._collections.items() if c._docs]
+
+    async def command(self, command, *args, **kwargs) -> dict:
+        if command == "ping":
+            return {"ok": 1.0}
+        raise OperationFailure(f"unsupported command {command}")
+
+
+class MemoryClient:
+    """Drop-in for `AsyncMongoClient` backed by process memory."""
+
+    def __init__(self):
+        self._databases: dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(name)
+        return self._databases[name]
+
+    @property
+    def admin(self) -> MemoryDatabase:
+        return self["admin"]
+
+    def op_counts(self) -> Counter:
+        """Operations served per `db.collection.op`, for benchmarks."""
+        counts = Counter()
+        for db in self._databases.values():
+            for collection in db._collections.values():
+                for op, n in collection.ops.items():
+                    counts[f"{db.name}.{collection.name}.{op}"] += n
+        return counts
+
+    def reset_op_counts(self):
+        for db in self._databases.values():
+            for collection in db._collections.values():
+                collection.ops.clear()
+
+    async def close(self):
+        pass
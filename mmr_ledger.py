@@ -0,0 +1,175 @@
+"""
+Append-only ledger of per-match stat changes, with periodic full snapshots.
+
+Every reported match appends one entry per player holding the numeric deltas
+(`inc`) and replaced values (`set`) the match caused. Numeric stats telescope,
+so a player's value at any time is the value in the latest snapshot before it
+plus the deltas recorded since. Snapshots are taken every `SNAPSHOT_EVERY`
+entries, at startup when none exists yet, and after season resets, which keeps
+a rebuild to one snapshot read and one range scan of the ledger. Entries and
+snapshots belong to one guild; each guild's `GuildStats` has its own ledger.
+
+The replay helpers (`stat_changes`, `apply_entry`, `replay`) are plain
+functions over dicts, so DebugTools can use them with a synchronous client.
+"""
+
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from database import mmr_ledger, mmr_snapshots
+
+# Ledger entries between automatic snapshots
+SNAPSHOT_EVERY = 500
+
+
+def stat_changes(before: dict, after: dict) -> dict:
+    """{"inc": numeric deltas, "set": other changed values} from before to after."""
+    inc, set_ = {}, {}
+    for key, value in after.items():
+        old = before.get(key)
+        if value == old:
+            continue
+        numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if numeric and (old is None or isinstance(old, (int, float))):
+            inc[key] = value - (old or 0)
+        else:
+            set_[key] = value
+    return {"inc": inc, "set": set_}
+
+
+def apply_entry(state: dict, entry: dict) -> dict:
+    for key, delta in (entry.get("inc") or {}).items():
+        state[key] = (state.get(key) or 0) + delta
+    state.update(entry.get("set") or {})
+    return state
+
+
+def replay(players: dict, entries) -> dict:
+    """Apply ledger entries (in order) on top of snapshot player states."""
+    states = {pid: dict(stats) for pid, stats in players.items()}
+    for entry in entries:
+        apply_entry(states.setdefault(entry["player_id"], {}), entry)
+    return states
+
+
+def _stats_dict(record) -> dict:
+    return {} if record is None else record.to_dict()
+
+
+class MmrLedger:
+    def __init__(self, guild_id: str, ledger=mmr_ledger, snapshots=mmr_snapshots):
+        self.guild_id = guild_id
+        self._ledger = ledger
+        self._snapshots = snapshots
+        self._since_snapshot = 0
+
+    async def load(self, store):
+        """Count entries since the last snapshot, taking a baseline if none exists."""
+        latest = await self._snapshots.find_one(
+            {"guild_id": self.guild_id},
+            sort=[("taken_at", DESCENDING)],
+            projection={"last_entry_id": 1},
+        )
+        if latest is None:
+            await self.snapshot(store, reason="baseline")
+            return
+        query = {"guild_id": self.guild_id}
+        if latest["last_entry_id"] is not None:
+            query["_id"] = {"$gt": latest["last_entry_id"]}
+        self._since_snapshot = await self._ledger.count_documents(query)
+
+    async def record(self, match_id, mode: str, before, store, player_ids):
+        """
+        Append the changes a match made to `player_ids`.
+
+        `before` is the `PlayerStatsStore.snapshot` taken before the update.
+        Raises if the entries could not be stored, after removing any that were.
+        """
+        now = datetime.now(timezone.utc)
+        entries = []
+        for player_id in dict.fromkeys(str(p) for p in player_ids):
+            changes = stat_changes(
+                _stats_dict(before.get(player_id)), _stats_dict(store.get(player_id))
+            )
+            if not changes["inc"] and not changes["set"]:
+                continue
+            entries.append(
+                {
+                    "_id": ObjectId(),
+                    "guild_id": self.guild_id,
+                    "match_id": match_id,
+                    "mode": mode,
+                    "player_id": player_id,
+                    "recorded_at": now,
+                    **changes,
+                }
+            )
+        if not entries:
+            return
+        try:
+            await self._ledger.insert_many(entries, ordered=True)
+        except Exception:
+            # The caller rolls the match back; leave none of its entries behind
+            await self._ledger.delete_many(
+                {"guild_id": self.guild_id, "match_id": match_id, "mode": mode}
+            )
+            raise
+        self._since_snapshot += len(entries)
+        if self._since_snapshot >= SNAPSHOT_EVERY:
+            try:
+                await self.snapshot(store, reason="periodic")
+            except Exception as e:
+                # The entries are stored; the next record retries the snapshot
+                print(f"[DEBUG] Periodic MMR ledger snapshot failed: {e}")
+
+    async def snapshot(self, store, reason: str):
+        """Store every player's full state, covering all entries so far."""
+        last = await self._ledger.find_one(
+            {"guild_id": self.guild_id}, sort=[("_id", DESCENDING)]
+        )
+        await self._snapshots.insert_one(
+            {
+                "guild_id": self.guild_id,
+                "taken_at": datetime.now(timezone.utc),
+                "reason": reason,
+                "last_entry_id": last["_id"] if last else None,
+                "players": {pid: stats.to_dict() for pid, stats in store.items()},
+            }
+        )
+        self._since_snapshot = 0
+        print(
+            f"[DEBUG] MMR ledger snapshot taken for guild {self.guild_id} "
+            f"({reason}, {len(store)} players)"
+        )
+
+    async def _latest_snapshot(self, at: datetime | None = None) -> dict | None:
+        query = {"guild_id": self.guild_id}
+        if at:
+            query["taken_at"] = {"$lte": at}
+        return await self._snapshots.find_one(query, sort=[("taken_at", DESCENDING)])
+
+    async def rebuild(self, at: datetime | None = None, player_ids=None) -> dict:
+        """
+        Player states as of `at` (default: now), for `player_ids` or everyone.
+
+        Nothing is written; callers decide what to do with the result.
+        """
+        snapshot = await self._latest_snapshot(at)
+        if snapshot is None:
+            raise LookupError("No MMR ledger snapshot exists at or before that time")
+
+        players = snapshot["players"]
+        query = {"guild_id": self.guild_id}
+        if snapshot["last_entry_id"] is not None:
+            query["_id"] = {"$gt": snapshot["last_entry_id"]}
+        if at:
+            query["recorded_at"] = {"$lte": at}
+        if player_ids is not None:
+            ids = [str(p) for p in player_ids]
+            players = {pid: players[pid] for pid in ids if pid in players}
+            query["player_id"] = {"$in": ids}
+
+        entries = self._ledger.find(query).sort("_id", ASCENDING)
+        return replay(players, [entry async for entry in entries])
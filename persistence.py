@@ -0,0 +1,93 @@
+"""Batched persistence of player stats to the mmr_data / tdm_mmr_data collections."""
+
+from typing import Iterable
+
+from pymongo import UpdateOne
+
+from database import mmr_collection, tdm_mmr_collection
+from user_directory import directory
+
+
+def _display_name(user_data) -> str:
+    if not user_data:
+        return "Unknown"
+    return f"{user_data.get('name', 'Unknown')}#{user_data.get('tag', 'Unknown')}"
+
+
+def mmr_fields(stats: dict) -> dict:
+    """10-mans stats as stored in mmr_data."""
+    return {
+        "mmr": stats.get("mmr", 1000),
+        "wins": stats.get("wins", 0),
+        "losses": stats.get("losses", 0),
+        "total_combat_score": stats.get("total_combat_score", 0),
+        "total_kills": stats.get("total_kills", 0),
+        "total_deaths": stats.get("total_deaths", 0),
+        "matches_played": stats.get("matches_played", 0),
+        "total_rounds_played": stats.get("total_rounds_played", 0),
+        "average_combat_score": stats.get("average_combat_score", 0),
+        "kill_death_ratio": stats.get("kill_death_ratio", 0),
+    }
+
+
+def tdm_mmr_fields(stats: dict) -> dict | None:
+    """TDM stats as stored in tdm_mmr_data, or None for players without TDM stats."""
+    if "tdm_mmr" not in stats:
+        return None
+    wins = stats.get("tdm_wins", 0)
+    losses = stats.get("tdm_losses", 0)
+    return {
+        "tdm_mmr": stats["tdm_mmr"],
+        "tdm_wins": wins,
+        "tdm_losses": losses,
+        "tdm_total_kills": stats.get("tdm_total_kills", 0),
+        "tdm_total_deaths": stats.get("tdm_total_deaths", 0),
+        "tdm_matches_played": stats.get("tdm_matches_played", wins + losses),
+        "tdm_avg_kills": stats.get("tdm_avg_kills", 0),
+        "tdm_kd_ratio": stats.get("tdm_kd_ratio", 0),
+    }
+
+
+async def _bulk_save(collection, guild_id, player_mmr, player_ids, build):
+    ids = list(player_mmr) if player_ids is None else [str(p) for p in player_ids]
+    linked = directory.get_many(ids)
+
+    ops = []
+    for player_id in ids:
+        stats = player_mmr.get(player_id)
+        if stats is None:
+            continue
+        fields = build(stats)
+        if fields is None:
+            continue
+        fields["name"] = _display_name(linked.get(player_id))
+        key = {"guild_id": guild_id, "player_id": player_id}
+        ops.append(UpdateOne(key, {"$set": fields}, upsert=True))
+
+    if not ops:
+        return None
+    result = await collection.bulk_write(ops, ordered=True)
+    print(
+        f"[DEBUG] {collection.name}: bulk saved {len(ops)} players "
+        f"(matched={result.matched_count}, upserted={result.upserted_count})"
+    )
+    return result
+
+
+async def save_mmr(guild_id: str, player_mmr, player_ids: Iterable | None = None):
+    """
+    Persist one guild's 10-mans stats in one ordered bulk_write.
+
+    Only `player_ids` are written when given (e.g. the ten players of a
+    match); otherwise every player in `player_mmr` is written.
+    """
+    return await _bulk_save(
+        mmr_collection, guild_id, player_mmr, player_ids, mmr_fields
+    )
+
+
+async def save_tdm_mmr(guild_id: str, player_mmr, player_ids: Iterable | None = None):
+    """Persist one guild's TDM stats in one ordered bulk_write (see `save_mmr`)."""
+    return await _bulk_save(
+        tdm_mmr_collection, guild_id, player_mmr, player_ids, tdm_mmr_fields
+    )
@@ -0,0 +1,243 @@
+"""In-memory store of per-player 10-mans and TDM stats with dirty tracking."""
+
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field, fields
+
+# Stats fields belong to one of two groups, persisted to different collections
+MMR = "mmr"
+TDM = "tdm"
+
+
+def _group_of(key: str) -> str:
+    return TDM if "tdm_" in key else MMR
+
+
+@dataclass(slots=True)
+class PlayerStats:
+    """
+    Compact stats record for one player.
+
+    Fields are None until a value is known, so records also behave like the
+    dicts they replace: `"tdm_mmr" in stats` is False for players who never
+    played TDM and `stats.get("mmr", 1000)` falls back to the default.
+    """
+
+    # 10-mans
+    mmr: int | None = None
+    wins: int | None = None
+    losses: int | None = None
+    total_combat_score: float | None = None
+    total_kills: int | None = None
+    total_deaths: int | None = None
+    matches_played: int | None = None
+    total_rounds_played: int | None = None
+    average_combat_score: float | None = None
+    kill_death_ratio: float | None = None
+
+    # TDM
+    tdm_mmr: int | None = None
+    tdm_wins: int | None = None
+    tdm_losses: int | None = None
+    tdm_total_kills: int | None = None
+    tdm_total_deaths: int | None = None
+    tdm_matches_played: int | None = None
+    tdm_avg_kills: float | None = None
+    tdm_kd_ratio: float | None = None
+    tdm_streak: int | None = None
+    tdm_performance_history: list | None = None
+    latest_tdm_mmr_change: float | None = None
+
+    # Owning store, notified on every change
+    _store: "PlayerStatsStore | None" = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _player_id: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, key, value):
+        object.__setattr__(self, key, value)
+        if key[0] != "_":
+            store = getattr(self, "_store", None)
+            if store is not None:
+                store.mark_dirty(self._player_id, _group_of(key))
+
+    # Dict-style access, kept for the existing call sites
+    def _check_key(self, key):
+        if key not in STAT_KEYS:
+            raise KeyError(key)
+
+    def __getitem__(self, key):
+        self._check_key(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._check_key(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in STAT_KEYS and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in STAT_KEYS else None
+        return default if value is None else value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return getattr(self, key)
+
+    def update(self, values=(), **kwargs):
+        for key, value in dict(values, **kwargs).items():
+            self[key] = value
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in STAT_KEYS if key in self]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def copy(self) -> "PlayerStats":
+        """Detached copy (not bound to a store)."""
+        values = self.to_dict()
+        if values.get("tdm_performance_history") is not None:
+            values["tdm_performance_history"] = list(values["tdm_performance_history"])
+        return PlayerStats(**values)
+
+
+STAT_KEYS = frozenset(f.name for f in fields(PlayerStats) if not f.name.startswith("_"))
+
+
+class StatsSnapshot:
+    """Pre-update state of a set of players, see `PlayerStatsStore.snapshot`."""
+
+    __slots__ = ("records", "dirty")
+
+    def __init__(self, records: dict, dirty: dict):
+        self.records: dict[str, PlayerStats | None] = records
+        self.dirty: dict[str, frozenset] = dirty
+
+    def get(self, player_id, default=None):
+        record = self.records.get(str(player_id))
+        return default if record is None else record
+
+
+class PlayerStatsStore(MutableMapping):
+    """
+    Player id -> PlayerStats, with ids normalised to str.
+
+    Every change to a record marks the player dirty for the group (10-mans or
+    TDM) the field belongs to, so saves only write players that changed.
+    `snapshot` / `rollback` capture and restore the state of a few players
+    (e.g. the ten in a match) without copying the whole population.
+    Watchers registered with `watch` are told about every changed player id
+    (None when the whole store is cleared).
+    """
+
+    def __init__(self):
+        self._records: dict[str, PlayerStats] = {}
+        self._dirty: dict[str, set[str]] = {MMR: set(), TDM: set()}
+        self._watchers = []
+
+    def watch(self, callback):
+        self._watchers.append(callback)
+
+    def _notify(self, player_id):
+        for callback in self._watchers:
+            callback(player_id)
+
+    def _bind(self, player_id: str, record: PlayerStats) -> PlayerStats:
+        object.__setattr__(record, "_store", self)
+        object.__setattr__(record, "_player_id", player_id)
+        return record
+
+    # Mapping protocol
+    def __getitem__(self, player_id) -> PlayerStats:
+        return self._records[str(player_id)]
+
+    def __setitem__(self, player_id, value):
+        player_id = str(player_id)
+        record = value.copy() if isinstance(value, PlayerStats) else PlayerStats()
+        if not isinstance(value, PlayerStats):
+            record.update(value)
+        self._records[player_id] = self._bind(player_id, record)
+        for key in record.to_dict():
+            self.mark_dirty(player_id, _group_of(key))
+        self._notify(player_id)
+
+    def __delitem__(self, player_id):
+        del self._records[str(player_id)]
+        self._notify(str(player_id))
+
+    def __contains__(self, player_id):
+        return str(player_id) in self._records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def clear(self):
+        self._records.clear()
+        for ids in self._dirty.values():
+            ids.clear()
+        self._notify(None)
+
+    # Loading (does not mark dirty)
+    def load(self, player_id, values: dict) -> PlayerStats:
+        """Merge stored values into a player's record without marking it dirty."""
+        player_id = str(player_id)
+        record = self._records.get(player_id)
+        if record is None:
+            record = self._records[player_id] = self._bind(player_id, PlayerStats())
+        for key, value in values.items():
+            if key in STAT_KEYS:
+                object.__setattr__(record, key, value)
+        self._notify(player_id)
+        return record
+
+    # Dirty tracking
+    def mark_dirty(self, player_id, group: str = MMR):
+        self._dirty[group].add(str(player_id))
+        self._notify(str(player_id))
+
+    def dirty(self, group: str = MMR) -> set[str]:
+        return set(self._dirty[group])
+
+    def take_dirty(self, group: str = MMR) -> list[str]:
+        """Return and clear the players with unsaved changes in `group`."""
+        ids = sorted(self._dirty[group])
+        self._dirty[group].clear()
+        return ids
+
+    def mark_clean(self, player_ids, group: str = MMR):
+        self._dirty[group].difference_update(str(p) for p in player_ids)
+
+    # Snapshot / rollback
+    def snapshot(self, player_ids) -> StatsSnapshot:
+        ids = [str(p) for p in player_ids]
+        records = {
+            pid: (self._records[pid].copy() if pid in self._records else None)
+            for pid in ids
+        }
+        dirty = {
+            group: frozenset(pid for pid in ids if pid in marked)
+            for group, marked in self._dirty.items()
+        }
+        return StatsSnapshot(records, dirty)
+
+    def rollback(self, snapshot: StatsSnapshot):
+        """Restore the players in `snapshot`, including their dirty state."""
+        for pid, record in snapshot.records.items():
+            if record is None:
+                self._records.pop(pid, None)
+            else:
+                self._records[pid] = self._bind(pid, record.copy())
+            for group, marked in self._dirty.items():
+                if pid in snapshot.dirty[group]:
+                    marked.add(pid)
+                else:
+                    marked.discard(pid)
+            self._notify(pid)
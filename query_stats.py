@@ -0,0 +1,139 @@
+"""Per-query-shape timings from pymongo command monitoring, for the slow query report."""
+
+import copy
+from dataclasses import dataclass, field
+
+from pymongo import monitoring
+
+from globals import SLOW_QUERY_MS
+
+# Commands that carry a filter, and where it lives in the command document
+_FILTER_PATHS = {
+    "find": ("filter",),
+    "count": ("query",),
+    "distinct": ("query",),
+    "findAndModify": ("query",),
+    "update": ("updates", 0, "q"),
+    "delete": ("deletes", 0, "q"),
+    "aggregate": ("pipeline", 0, "$match"),
+}
+
+# Bound on distinct shapes kept, so unusual ad-hoc queries can't grow it forever
+_MAX_SHAPES = 256
+
+
+def _extract_filter(command_name: str, command: dict) -> dict:
+    value = command
+    for part in _FILTER_PATHS[command_name]:
+        try:
+            value = value[part]
+        except (KeyError, IndexError, TypeError):
+            return {}
+    return value if isinstance(value, dict) else {}
+
+
+def query_shape(query) -> str:
+    """The filter with every value replaced by 1, e.g. {player_id: 1}."""
+    if isinstance(query, dict):
+        parts = []
+        for key, value in query.items():
+            if key in ("$or", "$and", "$nor"):
+                inner = ", ".join(query_shape(sub) for sub in value)
+                parts.append(f"{key}: [{inner}]")
+            elif isinstance(value, dict):
+                parts.append(f"{key}: {query_shape(value)}")
+            else:
+                parts.append(f"{key}: 1")
+        return "{" + ", ".join(parts) + "}"
+    return "1"
+
+
+@dataclass(slots=True)
+class QueryStats:
+    collection: str
+    command: str
+    shape: str
+    # First filter seen with this shape, used to explain the query plan
+    sample: dict = field(repr=False)
+    count: int = 0
+    slow: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """
+    Aggregates driver command timings by (collection, command, filter shape).
+
+    Registered on the Mongo client in `database.py`; the listener callbacks
+    run inline in the driver, so they only do dictionary bookkeeping.
+    """
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._pending: dict[tuple, tuple] = {}
+        self._stats: dict[tuple, QueryStats] = {}
+
+    def started(self, event):
+        if event.command_name not in _FILTER_PATHS:
+            return
+        collection = event.command.get(event.command_name)
+        query = _extract_filter(event.command_name, event.command)
+        key = (collection, event.command_name, query_shape(query))
+        if key not in self._stats:
+            if len(self._stats) >= _MAX_SHAPES:
+                return
+            self._stats[key] = QueryStats(*key, sample=copy.deepcopy(query))
+        self._pending[(event.connection_id, event.request_id)] = key
+
+    def succeeded(self, event):
+        key = self._pending.pop((event.connection_id, event.request_id), None)
+        if key is not None:
+            self.record(key, event.duration_micros / 1000)
+
+    def failed(self, event):
+        self._pending.pop((event.connection_id, event.request_id), None)
+
+    def record(self, key: tuple, duration_ms: float):
+        stats = self._stats[key]
+        stats.count += 1
+        stats.total_ms += duration_ms
+        stats.max_ms = max(stats.max_ms, duration_ms)
+        if duration_ms >= self.slow_ms:
+            stats.slow += 1
+            print(
+                f"[DEBUG] Slow query ({duration_ms:.0f}ms): "
+                f"{stats.collection}.{stats.command} {stats.shape}"
+            )
+
+    def report(self, limit: int = 10) -> list[QueryStats]:
+        """Query shapes with the most total time first."""
+        seen = [s for s in self._stats.values() if s.count]
+        ranked = sorted(seen, key=lambda s: s.total_ms, reverse=True)
+        return ranked[:limit]
+
+    def reset(self):
+        self._stats.clear()
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    for child in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(child), dict):
+            yield from _plan_stages(plan[child])
+    for child in plan.get("inputStages") or []:
+        yield from _plan_stages(child)
+
+
+async def is_unindexed(collection, query: dict) -> bool:
+    """True when the winning plan for `query` scans the whole collection."""
+    explain = await collection.find(query).explain()
+    plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    return "COLLSCAN" in set(_plan_stages(plan))
+
+
+profiler = QueryProfiler()
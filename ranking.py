@@ -0,0 +1,114 @@
+"""Incrementally maintained rank indexes over the player stats store."""
+
+from bisect import bisect_left, insort
+
+
+class RankingIndex:
+    """
+    Players ordered by one stat, highest first.
+
+    Entries are kept in a sorted list of (-value, player_id), so rank lookup
+    is a bisect and top-k / page slicing is a list slice. Ties are broken by
+    player id to keep pages stable.
+    """
+
+    def __init__(self, key: str, include=None):
+        self.key = key
+        self._include = include or (lambda stats: key in stats)
+        self._entries: list[tuple[float, str]] = []
+        self._by_player: dict[str, tuple[float, str]] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_player.clear()
+
+    def update(self, player_id: str, stats):
+        """Re-position one player; `stats` of None removes them."""
+        self.remove(player_id)
+        if stats is None or not self._include(stats):
+            return
+        entry = (-float(stats.get(self.key, 0) or 0), player_id)
+        insort(self._entries, entry)
+        self._by_player[player_id] = entry
+
+    def remove(self, player_id: str):
+        entry = self._by_player.pop(player_id, None)
+        if entry is not None:
+            del self._entries[bisect_left(self._entries, entry)]
+
+    def rank(self, player_id: str) -> int | None:
+        """1-based position of the player, or None if not ranked."""
+        entry = self._by_player.get(player_id)
+        if entry is None:
+            return None
+        return bisect_left(self._entries, entry) + 1
+
+    def value(self, player_id: str):
+        entry = self._by_player.get(player_id)
+        return None if entry is None else -entry[0]
+
+    def page(self, start: int, stop: int) -> list[str]:
+        return [pid for _, pid in self._entries[start:stop]]
+
+    def top(self, k: int = 1) -> list[str]:
+        return self.page(0, k)
+
+    def leaders(self) -> list[str]:
+        """Every player tied for first place."""
+        if not self._entries:
+            return []
+        best = self._entries[0][0]
+        stop = bisect_left(self._entries, (best, chr(0x10FFFF)))
+        return self.page(0, stop)
+
+
+class Rankings:
+    """
+    Rank indexes for one PlayerStatsStore.
+
+    The store reports every changed player; they are re-positioned lazily on
+    the next query, so a reported match costs ten index updates rather than a
+    full sort of the population.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._stale: set[str] = set()
+        self._rebuild = True
+
+        # !stats / !tdmstats rank and top-player checks: every rated player
+        self._indexes = {
+            "mmr": RankingIndex("mmr"),
+            "tdm_mmr": RankingIndex("tdm_mmr"),
+        }
+
+        store.watch(self._on_change)
+
+    def _on_change(self, player_id):
+        if player_id is None:
+            self._rebuild = True
+            self._stale.clear()
+        elif not self._rebuild:
+            self._stale.add(player_id)
+
+    def _refresh(self):
+        if self._rebuild:
+            for index in self._indexes.values():
+                index.clear()
+            self._stale = set(self._store)
+            self._rebuild = False
+        if not self._stale:
+            return
+        for player_id in self._stale:
+            stats = self._store.get(player_id)
+            for index in self._indexes.values():
+                index.update(player_id, stats)
+        self._stale.clear()
+
+    def rated(self, key: str = "mmr") -> RankingIndex:
+        """Up-to-date index of every player with a `key` rating."""
+        self._refresh()
+        return self._indexes[key]
@@ -0,0 +1,336 @@
+"""
+Everything `!report` does with a fetched match, independent of Discord.
+
+`run_report` takes the reported `MatchSession` and a match payload, and either
+applies the match to the session's guild stats (stats, MMR, persistence,
+ledger, archive) or raises `ReportRejected` with the message to show the
+reporter. The report command and the report benchmark
+(DebugTools/tools/benchmark_report.py) both run it.
+"""
+
+from database import seasons, raw_matches
+from globals import ARCHIVE_RAW_MATCHES
+from match_archive import lean_match, raw_archive_doc
+from match_ingest import claim_match, is_match_processed, match_id_of, release_match
+from guild_stats import current_season_id
+from stats_helper import update_stats
+from timing import StageTimer
+from user_directory import directory
+from write_queue import write_queue
+
+
+class ReportRejected(Exception):
+    """The match can't be reported; the message is shown to the reporter."""
+
+
+class MatchRoster:
+    """
+    Riot IDs of every queued player, resolved with one directory lookup and
+    reused by each stage of the report.
+    """
+
+    def __init__(self, queue, team1, team2):
+        linked = directory.get_many(p["id"] for p in [*queue, *team1, *team2])
+        self.riot_ids: dict[str, tuple[str, str]] = {
+            discord_id: (
+                (user.get("name") or "").lower(),
+                (user.get("tag") or "").lower(),
+            )
+            for discord_id, user in linked.items()
+        }
+        self.discord_ids = {riot: pid for pid, riot in self.riot_ids.items()}
+
+        self.queue_riot_ids = set(self._riot_ids_of(queue))
+        self.team1_order = self._riot_ids_of(team1)
+        self.team2_order = self._riot_ids_of(team2)
+        self.team1_riot_ids = set(self.team1_order)
+        self.team2_riot_ids = set(self.team2_order)
+
+        self.team_labels = {riot: "team1" for riot in self.team1_order}
+        self.team_labels.update({riot: "team2" for riot in self.team2_order})
+
+    def _riot_ids_of(self, players) -> list[tuple[str, str]]:
+        return [
+            self.riot_ids[str(p["id"])]
+            for p in players
+            if str(p["id"]) in self.riot_ids
+        ]
+
+    @staticmethod
+    def api_color(riot_ids, riot_to_api_color):
+        """Return the API team colour of the first player found in the match."""
+        for riot in riot_ids:
+            if riot in riot_to_api_color:
+                return riot_to_api_color[riot]
+        return None
+
+
+def total_rounds_of(match) -> int:
+    """Total rounds played, from the match metadata or the round list."""
+    if not match.get("teams", []):
+        raise ReportRejected("No team data found in match data.")
+    metadata = match.get("metadata") or {}
+    total_rounds = metadata.get("rounds_played") or metadata.get("total_rounds")
+    if not total_rounds:
+        rounds_data = match.get("rounds") or []
+        total_rounds = len(rounds_data)
+    return int(total_rounds)
+
+
+def _mismatch_message(missing_players) -> str:
+    mismatch_message = "The most recent match does not match the 10-man's match.\n\n"
+    mismatch_message += "The following players' Riot IDs don't match the game data:\n"
+
+    for name, tag in missing_players:
+        mismatch_message += f"• {name}#{tag}\n"
+
+    mismatch_message += "\nPossible reasons:\n"
+    mismatch_message += "1. Did you or someone make a change to their Riot name/tag?\n"
+    mismatch_message += "2. Are you trying to report the correct match?\n\n"
+    mismatch_message += "If you changed your Riot ID, please use `!linkriot NewName#NewTag` to update it."
+    return mismatch_message
+
+
+async def run_report(
+    session,
+    match,
+    timer: StageTimer,
+    *,
+    total_rounds: int | None = None,
+) -> list[str]:
+    """
+    Apply a fetched match to the 10-mans match of `session`.
+
+    Stages are marked on `timer`: roster, teams, stats, persist, rankings and
+    record. Returns the ids of players who newly reached first place.
+    """
+    if total_rounds is None:
+        total_rounds = total_rounds_of(match)
+
+    match_players = match.get("players", [])
+    if not match_players:
+        raise ReportRejected("No players found in match data.")
+
+    if await is_match_processed(match_id_of(match)):
+        raise ReportRejected("This match has already been reported.")
+
+    # Links made outside this process since startup are picked up here, so the
+    # roster and the per-player Riot ID lookups below see every linked player
+    await directory.fetch_many(
+        p["id"] for p in [*session.queue, *session.team1, *session.team2]
+    )
+    await directory.fetch_many_by_riot(
+        (p.get("name"), p.get("tag")) for p in match_players
+    )
+    roster = MatchRoster(session.queue, session.team1, session.team2)
+    queue_riot_ids = roster.queue_riot_ids
+
+    print(f"[DEBUG] Queued players RIOT ID's: {queue_riot_ids}")
+
+    # get the list of players in the match
+    match_player_names = set()
+    for player in match_players:
+        player_name = player.get("name", "").lower()
+        player_tag = player.get("tag", "").lower()
+        match_player_names.add((player_name, player_tag))
+
+    print(f"[DEBUG] match_player_names from API: {match_player_names}")
+
+    if not queue_riot_ids.issubset(match_player_names):
+        # Find which players don't match
+        raise ReportRejected(_mismatch_message(queue_riot_ids - match_player_names))
+    timer.mark("roster")
+
+    # Determine which team won
+    teams = match.get("teams", [])
+    if not teams:
+        raise ReportRejected("No team data found in match data.")
+
+    winning_team_id = None
+    for team in teams:
+        if team.get("won"):
+            winning_team_id = team.get("team_id", "").lower()
+            break
+
+    print(f"[DEBUG]: Winning team: {winning_team_id}")
+    if not winning_team_id:
+        raise ReportRejected("Could not determine the winning team.")
+
+    match_team_players = {"red": set(), "blue": set()}
+    for player_info in match_players:
+        raw_team_id = player_info.get("team_id", "").lower()  # "red" or "blue"
+        p_name = player_info.get("name", "").lower()
+        p_tag = player_info.get("tag", "").lower()
+        if raw_team_id in match_team_players:
+            match_team_players[raw_team_id].add((p_name, p_tag))
+
+    team1_riot_ids = roster.team1_riot_ids
+    team2_riot_ids = roster.team2_riot_ids
+
+    print(f"[DEBUG] team1_riot_ids: {team1_riot_ids}")
+    print(f"[DEBUG] team2_riot_ids: {team2_riot_ids}")
+
+    winning_match_team_players = match_team_players.get(winning_team_id, set())
+    print(f"[DEBUG] Winning team Riot ID's: {winning_match_team_players}")
+
+    if winning_match_team_players == team1_riot_ids:
+        winning_team = session.team1
+        losing_team = session.team2
+    elif winning_match_team_players == team2_riot_ids:
+        winning_team = session.team2
+        losing_team = session.team1
+    else:
+        raise ReportRejected("Could not match the winning team to our teams.")
+
+    guild_stats = session.guild_stats
+    for player in winning_team + losing_team:
+        player_id = str(player["id"])
+        guild_stats.ensure_player_mmr(player_id, guild_stats.player_names)
+
+    team1_ids = [str(p["id"]) for p in session.team1]
+    team2_ids = [str(p["id"]) for p in session.team2]
+
+    # Only this match's players change, so only they are snapshotted
+    pre_update_mmr = guild_stats.player_mmr.snapshot(team1_ids + team2_ids)
+
+    # Get top players
+    top_players_before = guild_stats.rankings.rated("mmr").leaders()
+
+    riot_to_teamlabel = roster.team_labels
+
+    def _mmr_of(pid):
+        d = pre_update_mmr.get(pid)
+        if d is not None:
+            return int(d.get("mmr", 1000))
+        return 1000
+
+    team1_mmr = sum(_mmr_of(pid) for pid in team1_ids)
+    team2_mmr = sum(_mmr_of(pid) for pid in team2_ids)
+
+    riot_to_api_color = {}
+    for p in match_players:
+        nm = (p.get("name") or "").lower()
+        tg = (p.get("tag") or "").lower()
+        color = (p.get("team_id") or "").lower()
+        riot_to_api_color[(nm, tg)] = color
+
+    team1_api_color = roster.api_color(roster.team1_order, riot_to_api_color)
+    team2_api_color = roster.api_color(roster.team2_order, riot_to_api_color)
+
+    api_rounds = {}
+    for t in teams:
+        tid = (t.get("team_id") or "").lower()
+        rw_raw = t.get("rounds_won", t.get("rounds", 0))
+        rw = rounds_to_int(rw_raw)
+        api_rounds[tid] = rw
+
+    team1_rounds = int(api_rounds.get(team1_api_color, 0))
+    team2_rounds = int(api_rounds.get(team2_api_color, 0))
+    round_diff_val = abs(team1_rounds - team2_rounds)
+    winning_label = "team1" if winning_match_team_players == team1_riot_ids else "team2"
+    timer.mark("teams")
+
+    # Record the match before any MMR changes, so it can only be applied once
+    record = lean_match(match, roster.discord_ids)
+    if not await claim_match(record, guild_id=guild_stats.guild_id):
+        raise ReportRejected("This match has already been reported.")
+
+    # Update stats for each player
+    try:
+        for player_stats in match_players:
+            p_name = (player_stats.get("name") or "").lower()
+            p_tag = (player_stats.get("tag") or "").lower()
+            team_label = riot_to_teamlabel.get((p_name, p_tag))
+            if not team_label:
+                continue
+
+            update_stats(
+                player_stats,
+                total_rounds,
+                guild_stats.player_mmr,
+                guild_stats.player_names,
+                team_sum_mmr=(team1_mmr if team_label == "team1" else team2_mmr),
+                opp_sum_mmr=(team2_mmr if team_label == "team1" else team1_mmr),
+                team_won=(winning_label == team_label),
+                round_diff=round_diff_val,
+                discord_id=roster.discord_ids.get((p_name, p_tag)),
+            )
+
+        # Part of the update: a match without its ledger entry is rolled back
+        await guild_stats.ledger.record(
+            record["metadata"]["match_id"],
+            "normal",
+            pre_update_mmr,
+            guild_stats.player_mmr,
+            team1_ids + team2_ids,
+        )
+    except Exception as e:
+        # Leave no half-applied match behind
+        guild_stats.player_mmr.rollback(pre_update_mmr)
+        await release_match(record)
+        print(f"[DEBUG] Stats update failed, rolled back: {e}")
+        raise ReportRejected(
+            "Failed to update stats for this match; nothing was saved."
+        ) from e
+    print("[DEBUG] Basic stats updated")
+    timer.mark("stats")
+
+    # Only the players of this match changed; write them in one bulk_write
+    await guild_stats.save_mmr_data()
+    print("[DEBUG] MMR data saved")
+    timer.mark("persist")
+
+    top_players_after = guild_stats.rankings.rated("mmr").leaders()
+    new_top_players = [
+        pid for pid in top_players_after if pid not in top_players_before
+    ]
+    timer.mark("rankings")
+
+    # The lean record was stored by claim_match; raw payload to cold storage
+    raw_doc = raw_archive_doc(match)
+    if ARCHIVE_RAW_MATCHES and raw_doc["_id"]:
+        write_queue.insert_one(raw_matches, raw_doc)
+
+    # Increment Current Season Match Count, once per match even if the write
+    # is replayed: a counted match is in match_ids, so the filter skips it
+    match_id = record["metadata"]["match_id"]
+    write_queue.update_one(
+        seasons,
+        {
+            "_id": current_season_id(guild_stats.guild_id),
+            "match_ids": {"$ne": match_id},
+        },
+        {"$inc": {"matches_played": 1}, "$push": {"match_ids": match_id}},
+        upsert=True,
+        idempotent=True,
+    )
+    timer.mark("record")
+    return new_top_players
+
+
+def rounds_to_int(value):
+    if isinstance(value, dict):
+        for key in ("won", "w", "value", "wins", "count"):
+            v = value.get(key)
+            if isinstance(v, (int, float, str)):
+                try:
+                    return int(v)
+                except Exception:
+                    pass
+        numeric_vals = [v for v in value.values() if isinstance(v, (int, float))]
+        if numeric_vals:
+            return int(max(numeric_vals))
+        return 0
+
+    if isinstance(value, (list, tuple)):
+        if value:
+            try:
+                return int(value[0])
+            except Exception:
+                return 0
+        return 0
+
+    try:
+        return int(value)
+    except Exception:
+        return 0
@@ -2,24 +2,320 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, Tuple
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
 from urllib.parse import quote
 
-import requests
 import aiohttp
 
-from globals import API_KEY
+from globals import API_KEY, HENRIK_RATE_LIMIT
 
 # Base API
 HENRIK_BASE = "https://api.henrikdev.xyz/valorant"
 
+# Errors raised by the client when the API can't be reached at all
+HENRIK_NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
 
 def _headers() -> Dict[str, str]:
     """Return auth headers if API key is present, else empty dict."""
     return {"Authorization": API_KEY} if API_KEY else {}
 
 
-def _normalize_account_payload(payload: Dict[str, Any]) -> Dict[str, Optional[str]]:
+class HenrikAPIError(Exception):
+    """Raised when the HenrikDev API answers with an unexpected status."""
+
+    def __init__(self, status: int):
+        super().__init__(f"HenrikDev API returned status {status}")
+        self.status = status
+
+
+class HenrikResponse(NamedTuple):
+    status: int
+    data: Any
+    headers: Dict[str, str]
+
+
+def _header_number(headers: Dict[str, str], name: str) -> Optional[float]:
+    for key, value in headers.items():
+        if key.lower() == name:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+class TokenBucket:
+    """
+    Client-side model of the API key's quota.
+
+    Tokens refill continuously at `capacity` per `period` seconds. Callers wait
+    in FIFO order for a token instead of being rejected, and the bucket is
+    corrected from the rate-limit headers HenrikDev sends back.
+    """
+
+    def __init__(self, capacity: int, period: float = 60.0):
+        self.capacity = max(1, int(capacity))
+        self.period = period
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(
+            float(self.capacity),
+            self.tokens + elapsed * self.capacity / self.period,
+        )
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                if wait <= 0:
+                    wait = (1 - self.tokens) * self.period / self.capacity
+                await asyncio.sleep(wait)
+
+    def update_from_response(self, status: int, headers: Dict[str, str]) -> None:
+        now = time.monotonic()
+        self._refill(now)
+
+        limit = _header_number(headers, "x-ratelimit-limit")
+        remaining = _header_number(headers, "x-ratelimit-remaining")
+        reset = _header_number(headers, "x-ratelimit-reset")
+        retry_after = _header_number(headers, "retry-after")
+
+        if limit and int(limit) != self.capacity:
+            self.capacity = max(1, int(limit))
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+
+        if status == 429:
+            self.tokens = 0.0
+            backoff = retry_after or reset or self.period / self.capacity
+            self.blocked_until = max(self.blocked_until, now + backoff)
+        elif remaining is not None and remaining <= 0 and reset:
+            self.blocked_until = max(self.blocked_until, now + reset)
+
+
+# Returned by AccountCache lookups when nothing (not even a 404) is cached
+CACHE_MISS = object()
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> Any:
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class AccountCache:
+    """
+    Recently verified Riot accounts, keyed by puuid and by name#tag.
+
+    Accounts that returned 404 are cached as None for a shorter time, so a
+    mistyped ID doesn't hit the API on every click either.
+    """
+
+    def __init__(
+        self, *, ttl: float = 1800, negative_ttl: float = 300, maxsize: int = 1024
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache = TTLCache(maxsize)
+
+    @staticmethod
+    def _riot_key(name: str, tag: str) -> str:
+        return f"riot:{(name or '').strip().lower()}#{(tag or '').strip().lower()}"
+
+    @staticmethod
+    def _puuid_key(puuid: str) -> str:
+        return f"puuid:{(puuid or '').strip()}"
+
+    def get_by_riot_id(self, name: str, tag: str) -> Any:
+        return self._cache.get(self._riot_key(name, tag), CACHE_MISS)
+
+    def get_by_puuid(self, puuid: str) -> Any:
+        return self._cache.get(self._puuid_key(puuid), CACHE_MISS)
+
+    def store(
+        self,
+        account: Dict[str, Any],
+        *,
+        name: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> None:
+        """Cache a normalized account, optionally also under the name#tag that was asked for."""
+        if account.get("puuid"):
+            self._cache.set(self._puuid_key(account["puuid"]), account, self.ttl)
+        if account.get("gameName") and account.get("tagLine"):
+            key = self._riot_key(account["gameName"], account["tagLine"])
+            self._cache.set(key, account, self.ttl)
+        if name and tag:
+            self._cache.set(self._riot_key(name, tag), account, self.ttl)
+
+    def store_not_found(
+        self,
+        *,
+        name: Optional[str] = None,
+        tag: Optional[str] = None,
+        puuid: Optional[str] = None,
+    ) -> None:
+        if puuid:
+            self._cache.set(self._puuid_key(puuid), None, self.negative_ttl)
+        if name and tag:
+            self._cache.set(self._riot_key(name, tag), None, self.negative_ttl)
+
+    def invalidate(
+        self,
+        *,
+        name: Optional[str] = None,
+        tag: Optional[str] = None,
+        puuid: Optional[str] = None,
+    ) -> None:
+        """Drop everything cached for this account under any of its keys."""
+        dropped = []
+        if puuid:
+            dropped.append(self._cache.pop(self._puuid_key(puuid)))
+        if name and tag:
+            dropped.append(self._cache.pop(self._riot_key(name, tag)))
+
+        for account in dropped:
+            if not account:
+                continue
+            if account.get("puuid"):
+                self._cache.pop(self._puuid_key(account["puuid"]))
+            if account.get("gameName") and account.get("tagLine"):
+                self._cache.pop(self._riot_key(account["gameName"], account["tagLine"]))
+
+
+class HenrikClient:
+    """
+    Long-lived HenrikDev client.
+
+    One pooled aiohttp session is shared by every lookup, so connections are
+    kept alive between calls and the number of in-flight requests is bounded.
+    Requests are paced by a token bucket (429s are waited out and retried) and
+    identical in-flight GETs share one upstream call.
+    The bot owns the client: `start()` in `setup_hook`, `close()` on shutdown.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 10,
+        max_concurrency: int = 4,
+        timeout: int = 10,
+        keepalive_timeout: int = 60,
+        rate_limit: int = HENRIK_RATE_LIMIT,
+        max_retries: int = 3,
+    ):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_limit, period=60.0)
+        self.accounts = AccountCache()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=_headers(),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get(self, url: str, *, timeout: Optional[int] = None) -> HenrikResponse:
+        """
+        GET a HenrikDev endpoint and return its status, decoded JSON and headers.
+
+        Concurrent calls for the same URL are coalesced into one request.
+        Network failures raise one of HENRIK_NETWORK_ERRORS.
+        """
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._fetch(url, timeout or self.timeout))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str, timeout: int) -> HenrikResponse:
+        await self.start()
+        request_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            async with self._semaphore:
+                async with self._session.get(url, timeout=request_timeout) as r:
+                    headers = dict(r.headers)
+                    self.bucket.update_from_response(r.status, headers)
+                    if r.status == 429 and attempt < self.max_retries:
+                        attempt += 1
+                        print(
+                            f"[HENRIK] 429 on {url}, queued for retry ({attempt}/{self.max_retries})"
+                        )
+                        continue
+                    try:
+                        data = await r.json(content_type=None)
+                    except ValueError:
+                        data = None
+                    return HenrikResponse(r.status, data, headers)
+
+
+def normalize_account_payload(payload: Dict[str, Any]) -> Dict[str, Optional[str]]:
     """
     Normalize Henrik account payloads into a consistent shape.
 
@@ -45,67 +341,112 @@ def _normalize_account_payload(payload: Dict[str, Any]) -> Dict[str, Optional[st
     }
 
 
+def account_url(name: str, tag: str, *, version: str = "v2") -> str:
+    safe_name = quote((name or "").strip(), safe="")
+    safe_tag = quote((tag or "").strip(), safe="")
+    return f"{HENRIK_BASE}/{version}/account/{safe_name}/{safe_tag}"
+
+
+def matches_url(
+    name: str, tag: str, *, region: str = "na", platform: str = "pc"
+) -> str:
+    safe_name = quote((name or "").strip(), safe="")
+    safe_tag = quote((tag or "").strip(), safe="")
+    return f"{HENRIK_BASE}/v4/matches/{region}/{platform}/{safe_name}/{safe_tag}"
+
+
 # async helper functions
 async def get_account_by_riot_id(
-    session: aiohttp.ClientSession,
+    client: HenrikClient,
     name: str,
     tag: str,
     *,
     timeout: int = 10,
 ) -> Optional[Dict[str, Any]]:
-    safe_name = quote((name or "").strip(), safe="")
-    safe_tag = quote((tag or "").strip(), safe="")
-    url = f"{HENRIK_BASE}/v1/account/{safe_name}/{safe_tag}"
+    cached = client.accounts.get_by_riot_id(name, tag)
+    if cached is not CACHE_MISS:
+        return cached
 
-    async with session.get(url, headers=_headers(), timeout=timeout) as r:
-        if r.status == 404:
-            return None
-        r.raise_for_status()
-        data = await r.json()
-        return _normalize_account_payload(data)
+    r = await client.get(account_url(name, tag, version="v1"), timeout=timeout)
+    if r.status == 404:
+        client.accounts.store_not_found(name=name, tag=tag)
+        return None
+    if r.status != 200 or not isinstance(r.data, dict):
+        raise HenrikAPIError(r.status)
+    account = normalize_account_payload(r.data)
+    client.accounts.store(account, name=name, tag=tag)
+    return account
 
 
 async def get_account_by_puuid(
-    session: aiohttp.ClientSession,
+    client: HenrikClient,
     puuid: str,
     *,
     timeout: int = 10,
 ) -> Optional[Dict[str, Any]]:
 
     puuid = (puuid or "").strip()
+    cached = client.accounts.get_by_puuid(puuid)
+    if cached is not CACHE_MISS:
+        return cached
+
     url = f"{HENRIK_BASE}/v1/by-puuid/account/{puuid}"
 
-    async with session.get(url, headers=_headers(), timeout=timeout) as r:
-        if r.status == 404:
-            return None
-        r.raise_for_status()
-        data = await r.json()
-        return _normalize_account_payload(data)
+    r = await client.get(url, timeout=timeout)
+    if r.status == 404:
+        client.accounts.store_not_found(puuid=puuid)
+        return None
+    if r.status != 200 or not isinstance(r.data, dict):
+        raise HenrikAPIError(r.status)
+    account = normalize_account_payload(r.data)
+    client.accounts.store(account)
+    return account
 
 
-# requests
-def verify_riot_account(name: str, tag: str) -> Tuple[bool, str]:
+async def get_recent_matches(
+    client: HenrikClient,
+    name: str,
+    tag: str,
+    *,
+    region: str = "na",
+    platform: str = "pc",
+    timeout: int = 30,
+) -> HenrikResponse:
+    url = matches_url(name, tag, region=region, platform=platform)
+    return await client.get(url, timeout=timeout)
+
+
+async def verify_riot_account(
+    client: HenrikClient, name: str, tag: str
+) -> Tuple[bool, str]:
     name = (name or "").strip()
     tag = (tag or "").strip()
 
     if not name or not tag:
         return (False, "Missing Riot name or tag.")
 
-    url = f"{HENRIK_BASE}/v2/account/{quote(name, safe='')}/{quote(tag, safe='')}"
+    cached = client.accounts.get_by_riot_id(name, tag)
+    if cached is not CACHE_MISS:
+        if cached is None:
+            return (False, f"Account `{name}#{tag}` not found.")
+        return (True, "ok")
 
     try:
-        r = requests.get(url, headers=_headers(), timeout=10)
-    except requests.RequestException as e:
+        r = await client.get(account_url(name, tag), timeout=10)
+    except HENRIK_NETWORK_ERRORS as e:
         # Network issues: DNS, timeouts, TLS, etc.
         return (False, f"Network error: {e.__class__.__name__}")
 
-    if r.status_code == 200:
+    if r.status == 200:
+        if isinstance(r.data, dict):
+            client.accounts.store(normalize_account_payload(r.data), name=name, tag=tag)
         return (True, "ok")
 
-    if r.status_code == 404:
+    if r.status == 404:
+        client.accounts.store_not_found(name=name, tag=tag)
         return (False, f"Account `{name}#{tag}` not found.")
 
-    if r.status_code in (401, 403):
+    if r.status in (401, 403):
         return (
             False,
             "Riot lookup failed: API key missing or invalid. Ask an admin to set env `api_key`.",
@@ -114,5 +455,5 @@ def verify_riot_account(name: str, tag: str) -> Tuple[bool, str]:
     # fallback
     return (
         False,
-        f"Riot API error ({r.status_code}). Try again in a few seconds or relink your account with `!linkriot`.",
+        f"Riot API error ({r.status}). Try again in a few seconds or relink your account with `!linkriot`.",
     )
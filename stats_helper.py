@@ -1,6 +1,6 @@
 """This file provides functions for updating players stats."""
 
-from database import users, mmr_collection
+from user_directory import directory
 
 
 def _calc_mmr_delta(
@@ -55,17 +55,28 @@ def update_stats(
     opp_sum_mmr=None,
     team_won=None,
     round_diff=None,
+    discord_id=None,
 ):
-    """Update player stats with proper initialization and error handling"""
+    """
+    Update player stats with proper initialization and error handling.
+
+    Callers that already resolved the player (e.g. from a match roster) can
+    pass `discord_id` to skip the Riot ID lookup.
+
+    Only `player_mmr` is updated; callers persist the changed players
+    afterwards (see `persistence.save_mmr`).
+    """
     name = player_stats.get("name", "").lower()
     tag = player_stats.get("tag", "").lower()
 
-    user_entry = users.find_one({"name": name, "tag": tag})
-    if not user_entry:
-        print(f"Player {name}#{tag} not linked to any Discord account.")
-        return
+    if discord_id is None:
+        user_entry = directory.by_riot(name, tag)
+        if not user_entry:
+            print(f"Player {name}#{tag} not linked to any Discord account.")
+            return
+        discord_id = user_entry.get("discord_id")
 
-    discord_id = str(user_entry.get("discord_id"))
+    discord_id = str(discord_id)
 
     # Get the stats with proper defaults
     stats = player_stats.get("stats", {})
@@ -140,26 +151,6 @@ def update_stats(
                     player_mmr[discord_id].get("losses", 0) + 1
                 )
 
-        # Update database with all fields
-        mmr_collection.update_one(
-            {"player_id": discord_id},
-            {
-                "$set": {
-                    "mmr": player_mmr[discord_id].get("mmr", 1000),
-                    "wins": player_mmr[discord_id].get("wins", 0),
-                    "losses": player_mmr[discord_id].get("losses", 0),
-                    "total_combat_score": total_combat_score,
-                    "total_rounds_played": total_rounds_played,
-                    "matches_played": total_matches,
-                    "average_combat_score": average_combat_score,
-                    "kill_death_ratio": kill_death_ratio,
-                    "total_kills": total_kills,
-                    "total_deaths": total_deaths,
-                }
-            },
-            upsert=True,
-        )
-
     else:
         # Initialize new player stats
         total_matches = 1
@@ -213,24 +204,3 @@ def update_stats(
             else:
                 player_mmr[discord_id]["wins"] = 0
                 player_mmr[discord_id]["losses"] = 1
-
-        # Insert new player into database with all fields
-        mmr_collection.update_one(
-            {"player_id": discord_id},
-            {
-                "$set": {
-                    "mmr": player_mmr[discord_id]["mmr"],
-                    "wins": 0,
-                    "losses": 0,
-                    "name": name,
-                    "total_combat_score": total_combat_score,
-                    "total_kills": total_kills,
-                    "total_deaths": total_deaths,
-                    "matches_played": total_matches,
-                    "total_rounds_played": total_rounds_played,
-                    "average_combat_score": average_combat_score,
-                    "kill_death_ratio": kill_death_ratio,
-                }
-            },
-            upsert=True,
-        )
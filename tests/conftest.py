@@ -0,0 +1,4 @@
+import os
+
+# Tests run against memory_store; must be set before database is imported
+os.environ["storage_backend"] = "memory"
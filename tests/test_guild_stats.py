@@ -0,0 +1,107 @@
+import asyncio
+
+import discord
+import pytest
+
+from bot import CustomBot
+from database import all_matches, mmr_collection, mmr_ledger, mmr_snapshots, seasons
+from database import tdm_mmr_collection
+from guild_stats import adopt_legacy_data
+from leaderboard_queries import count_leaderboard
+from match_ingest import claim_match
+
+
+async def reset_collections():
+    for collection in (
+        mmr_collection,
+        tdm_mmr_collection,
+        mmr_ledger,
+        mmr_snapshots,
+        seasons,
+    ):
+        await collection.drop()
+
+
+def stats_doc(guild_id: str, mmr: int) -> dict:
+    return {
+        "guild_id": guild_id,
+        "player_id": "1",
+        "mmr": mmr,
+        "wins": 1,
+        "losses": 0,
+        "matches_played": 1,
+    }
+
+
+def test_guilds_load_on_first_use_and_keep_separate_ladders():
+    async def scenario():
+        await reset_collections()
+        await mmr_collection.insert_many([stats_doc("10", 1200), stats_doc("20", 900)])
+        bot = CustomBot(command_prefix="!", intents=discord.Intents.default())
+
+        first = await bot.stats_for(10)
+        loaded_before_second = set(bot.guild_stats)
+        first.player_mmr["1"]["mmr"] = 1300
+        await first.save_mmr_data()
+
+        second = await bot.stats_for(20)
+        stored = await mmr_collection.find_one({"guild_id": "20", "player_id": "1"})
+        counts = [await count_leaderboard(g, "normal") for g in ("10", "20", "30")]
+        current = await seasons.find_one({"_id": "20:current"})
+        return loaded_before_second, second, stored, counts, current
+
+    loaded_before_second, second, stored, counts, current = asyncio.run(scenario())
+    assert loaded_before_second == {10}
+    assert second.player_mmr["1"]["mmr"] == 900
+    assert stored["mmr"] == 900
+    assert counts == [1, 1, 0]
+    assert current["guild_id"] == "20"
+
+
+def test_legacy_data_is_assigned_to_the_home_guild_once():
+    async def scenario():
+        await reset_collections()
+        legacy = stats_doc("10", 1100)
+        del legacy["guild_id"]
+        await mmr_collection.insert_one(legacy)
+        await seasons.insert_one(
+            {"_id": "current", "season_number": 3, "matches_played": 12}
+        )
+
+        await adopt_legacy_data("10")
+        await adopt_legacy_data("10")
+
+        stored = await mmr_collection.find_one({"player_id": "1"})
+        current = await seasons.find_one({"_id": "10:current"})
+        legacy_current = await seasons.find_one({"_id": "current"})
+        return stored, current, legacy_current
+
+    stored, current, legacy_current = asyncio.run(scenario())
+    assert stored["guild_id"] == "10"
+    assert current["season_number"] == 3
+    assert current["matches_played"] == 12
+    assert current["guild_id"] == "10"
+    assert legacy_current is None
+
+
+def test_startup_is_refused_for_legacy_data_without_a_home_guild():
+    async def scenario():
+        await reset_collections()
+        legacy = stats_doc("10", 1100)
+        del legacy["guild_id"]
+        await mmr_collection.insert_one(legacy)
+        await adopt_legacy_data(None)
+
+    with pytest.raises(SystemExit, match="mmr_data"):
+        asyncio.run(scenario())
+
+
+def test_claimed_matches_carry_their_guild():
+    async def scenario():
+        await all_matches.drop()
+        claimed = await claim_match({"metadata": {"match_id": "m-1"}}, guild_id=10)
+        return claimed, await all_matches.find_one({"metadata.match_id": "m-1"})
+
+    claimed, stored = asyncio.run(scenario())
+    assert claimed
+    assert stored["guild_id"] == "10"
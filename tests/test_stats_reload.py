@@ -0,0 +1,37 @@
+import asyncio
+
+from database import mmr_collection, tdm_mmr_collection
+from guild_stats import GuildStats
+
+
+def test_signup_reload_keeps_tdm_stats():
+    async def scenario():
+        await mmr_collection.drop()
+        await tdm_mmr_collection.drop()
+        await tdm_mmr_collection.insert_one(
+            {
+                "guild_id": "10",
+                "player_id": "1",
+                "tdm_mmr": 1450,
+                "tdm_wins": 7,
+                "tdm_losses": 2,
+            }
+        )
+        guild_stats = GuildStats(10)
+        await guild_stats.ensure_loaded()
+
+        # !signup reloads 10-mans stats while no lobby is live
+        await guild_stats.load_mmr_data()
+
+        # A following TDM signup must not reset the player to defaults
+        guild_stats.ensure_tdm_player_mmr("1")
+        await guild_stats.save_tdm_mmr_data(["1"])
+        return guild_stats.player_mmr["1"], await tdm_mmr_collection.find_one(
+            {"guild_id": "10", "player_id": "1"}
+        )
+
+    stats, stored = asyncio.run(scenario())
+    assert stats["tdm_mmr"] == 1450
+    assert stats["tdm_wins"] == 7
+    assert stored["tdm_mmr"] == 1450
+    assert stored["tdm_wins"] == 7
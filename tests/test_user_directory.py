@@ -0,0 +1,25 @@
+import asyncio
+
+from database import users
+from user_directory import UserDirectory
+
+
+def test_fetch_falls_back_to_database_for_links_made_elsewhere():
+    async def scenario():
+        await users.drop()
+        directory = UserDirectory()
+        await directory.load()
+
+        # Linked by another process after this directory was loaded
+        await users.insert_one({"discord_id": "42", "name": "duck", "tag": "na1"})
+        assert directory.by_riot("Duck", "NA1") is None
+
+        by_riot = await directory.fetch_many_by_riot([("Duck", "NA1"), ("x", "y")])
+        by_id = await directory.fetch_many(["42"])
+        return directory, by_riot, by_id
+
+    directory, by_riot, by_id = asyncio.run(scenario())
+    assert list(by_riot) == [("duck", "na1")]
+    assert by_riot[("duck", "na1")]["discord_id"] == "42"
+    assert by_id["42"]["name"] == "duck"
+    assert directory.by_riot("duck", "na1")["discord_id"] == "42"
@@ -0,0 +1,131 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from write_queue import WriteBehindQueue
+
+
+class FlakyCollection:
+    """Collection whose first bulk_write fails with `details`."""
+
+    name = "flaky"
+
+    def __init__(self, details: dict):
+        self.details = details
+        self.calls = 0
+
+    async def bulk_write(self, ops, ordered=True):
+        self.calls += 1
+        if self.calls == 1:
+            raise BulkWriteError(self.details)
+
+
+class RecordingCollection:
+    name = "recording"
+
+    def __init__(self):
+        self.written = []
+
+    async def bulk_write(self, ops, ordered=True):
+        self.written.extend(ops)
+
+
+def run_queue(*collections, writes: int = 3) -> WriteBehindQueue:
+    """Queue `writes` updates per collection, in one batch, and drain it."""
+
+    async def scenario():
+        queue = WriteBehindQueue(linger=0)
+        for collection in collections:
+            for n in range(writes):
+                queue.update_one(collection, {"_id": n}, {"$inc": {"count": 1}})
+        await asyncio.wait_for(queue.close(), timeout=5)
+        return queue
+
+    return asyncio.run(scenario())
+
+
+def test_write_concern_only_error_does_not_fail_the_batch():
+    collection = FlakyCollection(
+        {
+            "writeErrors": [],
+            "writeConcernErrors": [{"code": 64, "errmsg": "waiting for replication"}],
+        }
+    )
+    other = RecordingCollection()
+    queue = run_queue(collection, other)
+    assert collection.calls == 1
+    assert queue.failed == []
+    # The rest of the batch still goes out
+    assert len(other.written) == 3
+
+
+def test_rejected_write_is_dropped_and_the_rest_retried():
+    collection = FlakyCollection(
+        {"writeErrors": [{"index": 1, "code": 2, "errmsg": "bad update"}]}
+    )
+    queue = run_queue(collection)
+    assert collection.calls == 2
+    assert [(name, msg) for name, _, msg in queue.failed] == [("flaky", "bad update")]
+
+
+class DisconnectingCollection(RecordingCollection):
+    """Collection whose first bulk_write applies nothing and loses the connection."""
+
+    name = "disconnecting"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def bulk_write(self, ops, ordered=True):
+        self.calls += 1
+        if self.calls == 1:
+            raise AutoReconnect("connection reset")
+        await super().bulk_write(ops, ordered)
+
+
+def test_connection_failure_retries_only_idempotent_writes():
+    collection = DisconnectingCollection()
+
+    async def scenario():
+        queue = WriteBehindQueue(linger=0, backoff=0)
+        queue.insert_one(collection, {"name": "raw"})
+        queue.update_one(collection, {"_id": 1}, {"$inc": {"count": 1}})
+        queue.update_one(collection, {"_id": 2}, {"$set": {"name": "x"}})
+        queue.update_one(
+            collection,
+            {"_id": 3, "seen": {"$ne": "m1"}},
+            {"$inc": {"count": 1}, "$push": {"seen": "m1"}},
+            idempotent=True,
+        )
+        await asyncio.wait_for(queue.close(), timeout=5)
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert collection.calls == 2
+    # The bare $inc could already have been applied, so it is not replayed
+    assert [op._doc for _, op, _ in queue.failed] == [{"$inc": {"count": 1}}]
+    assert len(collection.written) == 3
+
+
+def test_replayed_season_count_is_applied_once():
+    from database import seasons
+
+    async def scenario():
+        await seasons.insert_one({"_id": "7:current", "matches_played": 0})
+        queue = WriteBehindQueue(linger=0)
+        for _ in range(2):
+            queue.update_one(
+                seasons,
+                {"_id": "7:current", "match_ids": {"$ne": "m1"}},
+                {"$inc": {"matches_played": 1}, "$push": {"match_ids": "m1"}},
+                upsert=True,
+                idempotent=True,
+            )
+        await asyncio.wait_for(queue.close(), timeout=5)
+        return queue, await seasons.find_one({"_id": "7:current"})
+
+    queue, season = asyncio.run(scenario())
+    assert season["matches_played"] == 1
+    assert season["match_ids"] == ["m1"]
+    assert queue.failed == []
@@ -0,0 +1,41 @@
+"""Lightweight stage timing for multi-step command pipelines."""
+
+import time
+
+
+class StageTimer:
+    """
+    Record how long each named stage of a pipeline takes.
+
+    Call `mark(label)` at the end of each stage; the time since the previous
+    mark (or since the timer was created) is attributed to that label.
+
+        timer = StageTimer("report")
+        ...fetch...
+        timer.mark("fetch")
+        ...update...
+        timer.mark("update")
+        print(timer.summary())
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: dict[str, float] = {}
+        self._started = self._last = time.perf_counter()
+
+    def mark(self, label: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self.stages[label] = self.stages.get(label, 0.0) + elapsed
+        self._last = now
+        return elapsed
+
+    @property
+    def total(self) -> float:
+        return self._last - self._started
+
+    def summary(self) -> str:
+        parts = " ".join(
+            f"{label}={secs * 1000:.1f}ms" for label, secs in self.stages.items()
+        )
+        return f"[TIMING] {self.name} total={self.total * 1000:.1f}ms {parts}"
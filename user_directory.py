@@ -0,0 +1,165 @@
+"""In-memory directory of linked Riot accounts (discord_id <-> name/tag/puuid)."""
+
+from typing import Iterable
+
+from database import users
+from write_queue import write_queue
+
+# Only the identity fields are kept in memory
+_FIELDS = ("discord_id", "name", "tag", "puuid")
+
+
+def _riot_key(name, tag) -> tuple[str, str]:
+    return ((name or "").lower().strip(), (tag or "").lower().strip())
+
+
+class UserDirectory:
+    """
+    Mirror of the `users` collection kept in memory with bidirectional indexes.
+
+    The directory is loaded once at startup and updated write-through by
+    `upsert`, so the synchronous lookups used on hot paths (embeds,
+    leaderboards) never touch the database and only see links known to this
+    process. The async `fetch*` variants fall back to a single batched query
+    for misses, which also picks up links written by out-of-process tools;
+    paths that must not miss a player (reports, stats lookups) use them, or
+    warm the directory with them before the synchronous lookups.
+    """
+
+    def __init__(self, collection=users):
+        self._collection = collection
+        self._by_discord: dict[str, dict] = {}
+        self._by_riot: dict[tuple[str, str], str] = {}
+        self._by_puuid: dict[str, str] = {}
+
+    def __len__(self):
+        return len(self._by_discord)
+
+    async def load(self):
+        """(Re)load every linked user from the database."""
+        self._by_discord.clear()
+        self._by_riot.clear()
+        self._by_puuid.clear()
+        projection = {field: 1 for field in _FIELDS}
+        async for doc in self._collection.find({}, projection):
+            self._index(doc)
+        print(f"[DEBUG] Loaded {len(self._by_discord)} linked users into directory")
+
+    def _index(self, doc: dict):
+        discord_id = str(doc.get("discord_id") or "")
+        if not discord_id:
+            return
+        entry = {field: doc.get(field) for field in _FIELDS}
+        entry["discord_id"] = discord_id
+        if "_id" in doc:
+            entry["_id"] = doc["_id"]
+
+        self._unindex(discord_id)
+        self._by_discord[discord_id] = entry
+        if entry.get("name") and entry.get("tag"):
+            self._by_riot[_riot_key(entry["name"], entry["tag"])] = discord_id
+        if entry.get("puuid"):
+            self._by_puuid[entry["puuid"]] = discord_id
+
+    def _unindex(self, discord_id: str):
+        old = self._by_discord.pop(discord_id, None)
+        if not old:
+            return
+        key = _riot_key(old.get("name"), old.get("tag"))
+        if self._by_riot.get(key) == discord_id:
+            del self._by_riot[key]
+        if old.get("puuid") and self._by_puuid.get(old["puuid"]) == discord_id:
+            del self._by_puuid[old["puuid"]]
+
+    def get(self, discord_id) -> dict | None:
+        """Return a copy of the linked user for `discord_id`, or None."""
+        entry = self._by_discord.get(str(discord_id))
+        return dict(entry) if entry else None
+
+    def get_many(self, discord_ids: Iterable) -> dict[str, dict]:
+        """Batch lookup of linked users, keyed by str discord id."""
+        ids = [str(i) for i in discord_ids]
+        return {i: dict(self._by_discord[i]) for i in ids if i in self._by_discord}
+
+    async def fetch(self, discord_id) -> dict | None:
+        return (await self.fetch_many([discord_id])).get(str(discord_id))
+
+    async def fetch_many(self, discord_ids: Iterable) -> dict[str, dict]:
+        """Like `get_many`, but ids missing from memory are fetched in one query."""
+        ids = [str(i) for i in discord_ids]
+        missing = [i for i in ids if i not in self._by_discord]
+        if missing:
+            query = {"discord_id": {"$in": missing}}
+            async for doc in self._collection.find(query):
+                self._index(doc)
+        return self.get_many(ids)
+
+    async def fetch_by_riot(self, name, tag) -> dict | None:
+        return (await self.fetch_many_by_riot([(name, tag)])).get(_riot_key(name, tag))
+
+    async def fetch_many_by_riot(self, riot_ids: Iterable) -> dict[tuple, dict]:
+        """
+        Linked users by (name, tag), keyed by the lowercased pair; pairs
+        missing from memory are fetched in one query.
+        """
+        keys = list(dict.fromkeys(_riot_key(name, tag) for name, tag in riot_ids))
+        missing = [key for key in keys if key not in self._by_riot and all(key)]
+        if missing:
+            query = {"$or": [{"name": name, "tag": tag} for name, tag in missing]}
+            async for doc in self._collection.find(query):
+                self._index(doc)
+        found = {}
+        for key in keys:
+            user = self.by_riot(*key)
+            if user:
+                found[key] = user
+        return found
+
+    def by_riot(self, name, tag) -> dict | None:
+        """Look up a linked user by Riot name/tag (case-insensitive)."""
+        discord_id = self._by_riot.get(_riot_key(name, tag))
+        if discord_id is None:
+            return None
+        return dict(self._by_discord[discord_id])
+
+    def by_puuid(self, puuid) -> dict | None:
+        discord_id = self._by_puuid.get(puuid)
+        if discord_id is None:
+            return None
+        return dict(self._by_discord[discord_id])
+
+    def riot_id(self, discord_id, default: str = "Unknown") -> tuple[str, str]:
+        """Return (name, tag) for a linked user, or (default, default)."""
+        entry = self._by_discord.get(str(discord_id))
+        if not entry:
+            return default, default
+        return entry.get("name") or default, entry.get("tag") or default
+
+    async def upsert(self, discord_id, **fields):
+        """Write fields for `discord_id` to the database and to the directory."""
+        discord_id = str(discord_id)
+        await self._collection.update_one(
+            {"discord_id": discord_id},
+            {"$set": {"discord_id": discord_id, **fields}},
+            upsert=True,
+        )
+        self._remember(discord_id, fields)
+
+    def upsert_later(self, discord_id, **fields):
+        """Like `upsert`, but the database write goes through the write-behind queue."""
+        discord_id = str(discord_id)
+        write_queue.update_one(
+            self._collection,
+            {"discord_id": discord_id},
+            {"$set": {"discord_id": discord_id, **fields}},
+            upsert=True,
+        )
+        self._remember(discord_id, fields)
+
+    def _remember(self, discord_id: str, fields: dict):
+        entry = dict(self._by_discord.get(discord_id) or {"discord_id": discord_id})
+        entry.update(fields)
+        self._index(entry)
+
+
+directory = UserDirectory()
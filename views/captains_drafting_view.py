@@ -5,17 +5,27 @@ import discord
 from discord.ui import Select
 from urllib.parse import quote
 
-from database import users
+from user_directory import directory
+from views import safe_reply
+from views.countdown import MessageEditor, countdown, deadline_in, editor_for
+from views.serialized_view import SerializedView
 
+# Seconds the second captain has to choose the draft type, and each captain per pick
+CHOICE_SECONDS = 120
+PICK_SECONDS = 120
 
-class SecondCaptainChoiceView(discord.ui.View):
-    def __init__(self, ctx, bot):
-        super().__init__(timeout=None)
+
+class SecondCaptainChoiceView(SerializedView):
+    def __init__(self, ctx, bot, session):
+        super().__init__()
         self.ctx = ctx
         self.bot = bot
+        self.session = session
+        session.active_view = self
         self.view_message = None
-        self.decision_time_remaining = 120
-        self.timeout_timer_task = asyncio.create_task(self.timeout_timer())
+        self.decision_deadline = deadline_in(CHOICE_SECONDS)
+        self.editor = MessageEditor()
+        self.start_task(self.timeout_timer())
 
         # Buttons
         self.first_pick_button = discord.ui.Button(
@@ -37,52 +47,46 @@ class SecondCaptainChoiceView(discord.ui.View):
 
     async def send_view(self):
         await self.ctx.send(
-            f"Captains Chosen: <@{self.bot.captain1['id']}> and <@{self.bot.captain2['id']}>"
+            f"Captains Chosen: <@{self.session.captain1['id']}> and <@{self.session.captain2['id']}>"
         )
         self.view_message = await self.ctx.send(
-            f"<@{self.bot.captain2['id']}>, choose draft type: ({self.decision_time_remaining}s)",
+            f"<@{self.session.captain2['id']}>, choose draft type: ends {countdown(self.decision_deadline)}",
             view=self,
         )
-
-    async def _validate_second_captain(self, interaction: discord.Interaction) -> bool:
-        if str(interaction.user.id) != str(self.bot.captain2["id"]):
-            await interaction.response.send_message(
-                "Only the second captain can make this choice!", ephemeral=True
-            )
-            return False
-        return True
+        self.editor = editor_for(self.view_message)
 
     async def first_pick_callback(self, interaction: discord.Interaction):
-        if not await self._validate_second_captain(interaction):
-            return
-
-        self.cancel_timeout_timer()
-        self.first_pick_button.disabled = True
-        self.double_pick_button.disabled = True
-        await interaction.message.edit(view=self)
-
-        await interaction.response.send_message("First pick selected!", ephemeral=True)
-        await self.start_draft(single_pick=True)
+        await self.serialize(interaction, self.choose_draft_type, True)
 
     async def double_pick_callback(self, interaction: discord.Interaction):
-        if not await self._validate_second_captain(interaction):
+        await self.serialize(interaction, self.choose_draft_type, False)
+
+    async def choose_draft_type(self, interaction: discord.Interaction, single_pick):
+        if str(interaction.user.id) != str(self.session.captain2["id"]):
+            await safe_reply(
+                interaction,
+                "Only the second captain can make this choice!",
+                ephemeral=True,
+            )
             return
 
-        self.cancel_timeout_timer()
+        # Stops the timeout and drops any other click still queued
+        self.stop()
         self.first_pick_button.disabled = True
         self.double_pick_button.disabled = True
-        await interaction.message.edit(view=self)
+        await self.editor.close(view=self)
 
-        await interaction.response.send_message(
-            "2nd + 3rd pick selected!", ephemeral=True
-        )
-        await self.start_draft(single_pick=False)
+        message = "First pick selected!" if single_pick else "2nd + 3rd pick selected!"
+        await safe_reply(interaction, message, ephemeral=True)
+        await self.start_draft(single_pick=single_pick)
 
     async def start_draft(self, single_pick: bool):
         mode_name = "Single Pick" if single_pick else "Double Pick"
         await self.ctx.send(f"**{mode_name}** chosen! Starting draft phase...")
 
-        drafting_view = CaptainsDraftingView(self.ctx, self.bot, single_pick)
+        drafting_view = CaptainsDraftingView(
+            self.ctx, self.bot, self.session, single_pick
+        )
 
         await drafting_view.send_current_draft_view()
 
@@ -91,123 +95,98 @@ class SecondCaptainChoiceView(discord.ui.View):
             child.disabled = True
 
     async def timeout_timer(self):
-        for _ in range(120):
-            await asyncio.sleep(1)
-            self.decision_time_remaining -= 1
-            if self.view_message:
-                await self.view_message.edit(
-                    content=f"<@{self.bot.captain2['id']}>, choose draft type: ({self.decision_time_remaining}s)",
-                    view=self,
-                )
+        # The countdown is shown by Discord itself; nothing to edit until the end
+        await asyncio.sleep(CHOICE_SECONDS)
+        await self.run_serialized(self.choice_timed_out)
+
+    async def choice_timed_out(self):
         # Cancel Signup
         await self.ctx.send("The captain took too long. Match will be cancelled...")
-        self.bot.signup_active = False
-        self.bot.match_ongoing = False
-        self.bot.match_not_reported = False
-        self.bot.queue.clear()
-        self.bot.team1 = []
-        self.bot.team2 = []
-        self.bot.captain1 = None
-        self.bot.captain2 = None
-        self.bot.chosen_mode = None
-        self.bot.selected_map = None
+        self.stop()
+        await self.bot.sessions.end(self.session)
 
-        try:
-            if getattr(self.bot, "match_channel", None):
-                await self.bot.match_channel.delete()
-        except discord.NotFound:
-            pass
-        finally:
-            self.bot.match_channel = None
 
-        try:
-            if getattr(self.bot, "match_role", None):
-                await self.bot.match_role.delete()
-        except discord.NotFound:
-            pass
-        finally:
-            self.bot.match_role = None
-
-        try:
-            self.stop()
-        except Exception:
-            pass
-
-    def cancel_timeout_timer(self):
-        if self.timeout_timer_task:
-            self.timeout_timer_task.cancel()
-            self.timeout_timer_task = None
-
-
-class CaptainsDraftingView(discord.ui.View):
-    def __init__(self, ctx, bot, single_pick: bool):
-        super().__init__(timeout=None)
+class CaptainsDraftingView(SerializedView):
+    def __init__(self, ctx, bot, session, single_pick: bool):
+        super().__init__()
         self.ctx = ctx
         self.bot = bot
+        self.session = session
+        session.active_view = self
 
         # Build remaining pool
-        cap1_id = str(self.bot.captain1["id"])
-        cap2_id = str(self.bot.captain2["id"])
+        cap1_id = str(self.session.captain1["id"])
+        cap2_id = str(self.session.captain2["id"])
         self.remaining_players = [
-            p for p in self.bot.queue if str(p["id"]) not in {cap1_id, cap2_id}
+            p for p in self.session.queue if str(p["id"]) not in {cap1_id, cap2_id}
         ]
 
         # Pick order patterns
         if single_pick:
             self.pick_order = [
-                self.bot.captain2,
-                self.bot.captain1,
-                self.bot.captain1,
-                self.bot.captain2,
-                self.bot.captain2,
-                self.bot.captain1,
-                self.bot.captain1,
-                self.bot.captain2,
+                self.session.captain2,
+                self.session.captain1,
+                self.session.captain1,
+                self.session.captain2,
+                self.session.captain2,
+                self.session.captain1,
+                self.session.captain1,
+                self.session.captain2,
             ]
         else:
             self.pick_order = [
-                self.bot.captain1,
-                self.bot.captain2,
-                self.bot.captain2,
-                self.bot.captain1,
-                self.bot.captain1,
-                self.bot.captain2,
-                self.bot.captain2,
-                self.bot.captain1,
+                self.session.captain1,
+                self.session.captain2,
+                self.session.captain2,
+                self.session.captain1,
+                self.session.captain1,
+                self.session.captain2,
+                self.session.captain2,
+                self.session.captain1,
             ]
 
         self.pick_count = 0
         self.draft_finished = False
 
-        self.draft_time_remaining = 120
-        self.draft_timer_task = None
+        self.pick_deadline = None
+        self.pick_timer_task = None
 
         self.remaining_players_message = None
         self.drafting_message = None
         self.captain_pick_message = None
 
-        if not getattr(self.bot, "team1", None):
-            self.bot.team1 = []
-        if not getattr(self.bot, "team2", None):
-            self.bot.team2 = []
-        if not self.bot.team1 or self.bot.team1[0].get("id") != self.bot.captain1["id"]:
-            if not any(p.get("id") == self.bot.captain1["id"] for p in self.bot.team1):
-                self.bot.team1.insert(0, self.bot.captain1)
-        if not self.bot.team2 or self.bot.team2[0].get("id") != self.bot.captain2["id"]:
-            if not any(p.get("id") == self.bot.captain2["id"] for p in self.bot.team2):
-                self.bot.team2.insert(0, self.bot.captain2)
-
-        c1_data = users.find_one({"discord_id": str(self.bot.captain1["id"])})
-        c2_data = users.find_one({"discord_id": str(self.bot.captain2["id"])})
+        if not getattr(self.session, "team1", None):
+            self.session.team1 = []
+        if not getattr(self.session, "team2", None):
+            self.session.team2 = []
+        if (
+            not self.session.team1
+            or self.session.team1[0].get("id") != self.session.captain1["id"]
+        ):
+            if not any(
+                p.get("id") == self.session.captain1["id"] for p in self.session.team1
+            ):
+                self.session.team1.insert(0, self.session.captain1)
+        if (
+            not self.session.team2
+            or self.session.team2[0].get("id") != self.session.captain2["id"]
+        ):
+            if not any(
+                p.get("id") == self.session.captain2["id"] for p in self.session.team2
+            ):
+                self.session.team2.insert(0, self.session.captain2)
+
+        c1_data = directory.get(self.session.captain1["id"])
+        c2_data = directory.get(self.session.captain2["id"])
         self.captain1_name = (
             f"{c1_data.get('name','Unknown')}#{c1_data.get('tag','Unknown')}"
             if c1_data
-            else self.bot.captain1["name"]
+            else self.session.captain1["name"]
         )
         self.captain2_name = (
             f"{c2_data.get('name','Unknown')}#{c2_data.get('tag','Unknown')}"
             if c2_data
-            else self.bot.captain2["name"]
+            else self.session.captain2["name"]
         )
 
         # component for picking players
@@ -229,8 +208,8 @@ class CaptainsDraftingView(discord.ui.View):
         """
         cap = self._team_cap()
 
-        team1_len = len(self.bot.team1)
-        team2_len = len(self.bot.team2)
+        team1_len = len(self.session.team1)
+        team2_len = len(self.session.team2)
 
         out_of_turns = self.pick_count >= len(self.pick_order)
         teams_full = (team1_len >= cap) and (team2_len >= cap)
@@ -247,10 +226,6 @@ class CaptainsDraftingView(discord.ui.View):
             return
         self.draft_finished = True
 
-        if self.draft_timer_task:
-            self.draft_timer_task.cancel()
-            self.draft_timer_task = None
-
         try:
             self.player_select.disabled = True
         except Exception:
@@ -258,9 +233,9 @@ class CaptainsDraftingView(discord.ui.View):
 
         while self.remaining_players:
             target = (
-                self.bot.team1
-                if len(self.bot.team1) <= len(self.bot.team2)
-                else self.bot.team2
+                self.session.team1
+                if len(self.session.team1) <= len(self.session.team2)
+                else self.session.team2
             )
             target.append(self.remaining_players.pop(0))
 
@@ -278,7 +253,7 @@ class CaptainsDraftingView(discord.ui.View):
                 setattr(self, msg_attr, None)
 
         # final teams embed
-        map_name = getattr(self.bot, "selected_map", "Map")
+        map_name = getattr(self.session, "selected_map", "Map")
         teams_embed = discord.Embed(
             title=f"Teams on {map_name}",
             description="Good luck!",
@@ -286,12 +261,10 @@ class CaptainsDraftingView(discord.ui.View):
         )
 
         attackers = []
-        for p in self.bot.team1:
-            ud = users.find_one({"discord_id": str(p["id"])})
-            mmr = (
-                getattr(self.bot, "player_mmr", {})
-                .get(str(p["id"]), {})
-                .get("mmr", 1000)
+        for p in self.session.team1:
+            ud = directory.get(p["id"])
+            mmr = self.session.guild_stats.player_mmr.get(str(p["id"]), {}).get(
+                "mmr", 1000
             )
             if ud:
                 rn = ud.get("name", "Unknown")
@@ -301,12 +274,10 @@ class CaptainsDraftingView(discord.ui.View):
                 attackers.append(f"{p['name']} (MMR:{mmr})")
 
         defenders = []
-        for p in self.bot.team2:
-            ud = users.find_one({"discord_id": str(p["id"])})
-            mmr = (
-                getattr(self.bot, "player_mmr", {})
-                .get(str(p["id"]), {})
-                .get("mmr", 1000)
+        for p in self.session.team2:
+            ud = directory.get(p["id"])
+            mmr = self.session.guild_stats.player_mmr.get(str(p["id"]), {}).get(
+                "mmr", 1000
             )
             if ud:
                 rn = ud.get("name", "Unknown")
@@ -325,24 +296,26 @@ class CaptainsDraftingView(discord.ui.View):
         await self.ctx.send(embed=teams_embed)
         await self.ctx.send("Start match and use `!report` to finalize results.")
 
-        self.bot.match_ongoing = True
-        self.bot.match_not_reported = True
-        await self.bot.match_channel.edit(name=f"{self.bot.match_name}《in-game》")
+        self.session.match_ongoing = True
+        self.session.match_not_reported = True
+        # Simulated lobbies play in an existing channel, which is left as is
+        if self.session.match_channel:
+            await self.session.match_channel.edit(
+                name=f"{self.session.match_name}《in-game》"
+            )
 
         # prevent further callbacks
-        try:
-            self.stop()
-        except Exception:
-            pass
+        self.stop()
 
     async def finish_draft(self, *args, **kwargs):
         await self.finalize_draft()
 
     async def select_callback(self, interaction: discord.Interaction):
+        await self.serialize(interaction, self.handle_pick)
+
+    async def handle_pick(self, interaction: discord.Interaction):
         if self.draft_finished:
-            await interaction.response.send_message(
-                "Draft is already complete!", ephemeral=True
-            )
+            await safe_reply(interaction, "Draft is already complete!", ephemeral=True)
             return
 
         if self._picks_exhausted():
@@ -352,24 +325,23 @@ class CaptainsDraftingView(discord.ui.View):
         # Enforce turn taking
         current_captain_id = str(self.pick_order[self.pick_count]["id"])
         if str(interaction.user.id) != current_captain_id:
-            await interaction.response.send_message("Not your turn.", ephemeral=True)
+            await safe_reply(interaction, "Not your turn.", ephemeral=True)
             return
 
-        selected_id = str(self.player_select.values[0])
+        # Read from the interaction; the select's values belong to the latest one
+        selected_id = str(interaction.data["values"][0])
         player_dict = next(
             (p for p in self.remaining_players if str(p["id"]) == selected_id), None
         )
         if not player_dict:
-            await interaction.response.send_message(
-                "Player not available.", ephemeral=True
-            )
+            await safe_reply(interaction, "Player not available.", ephemeral=True)
             return
 
         # Assign to current captain's team
-        if current_captain_id == str(self.bot.captain1["id"]):
-            self.bot.team1.append(player_dict)
+        if current_captain_id == str(self.session.captain1["id"]):
+            self.session.team1.append(player_dict)
         else:
-            self.bot.team2.append(player_dict)
+            self.session.team2.append(player_dict)
 
         self.pick_count += 1
         try:
@@ -377,14 +349,6 @@ class CaptainsDraftingView(discord.ui.View):
         except ValueError:
             pass
 
-        self.draft_time_remaining = 120
-        if self.draft_timer_task:
-            self.draft_timer_task.cancel()
-            self.draft_timer_task = None
-
-        if not interaction.response.is_done():
-            await interaction.response.defer(ephemeral=True)
-
         await self.draft_next_player()
 
     async def draft_next_player(self):
@@ -393,37 +357,6 @@ class CaptainsDraftingView(discord.ui.View):
             return
         await self.send_current_draft_view()
 
-    def start_draft_timer(self):
-        if self.draft_timer_task:
-            self.draft_timer_task.cancel()
-        self.draft_timer_task = asyncio.create_task(self.draft_timeout_timer())
-
-    async def draft_timeout_timer(self):
-        for _ in range(120):
-            await asyncio.sleep(1)
-            if self.draft_finished:
-                return
-            self.draft_time_remaining -= 1
-            if self.captain_pick_message:
-                current_captain_id = self.pick_order[self.pick_count]["id"]
-                ud = users.find_one({"discord_id": str(current_captain_id)})
-                if ud:
-                    curr_captain_name = (
-                        f"{ud.get('name','Unknown')}#{ud.get('tag','Unknown')}"
-                    )
-                else:
-                    c = (
-                        self.bot.captain1
-                        if self.bot.captain1["id"] == current_captain_id
-                        else self.bot.captain2
-                    )
-                    curr_captain_name = c["name"]
-                message = f"**{curr_captain_name}**, pick a player: ({self.draft_time_remaining}s)"
-                try:
-                    await self.captain_pick_message.edit(content=message, view=self)
-                except discord.NotFound:
-                    pass
-
     async def send_current_draft_view(self):
         if self.draft_finished:
             return
@@ -436,7 +369,7 @@ class CaptainsDraftingView(discord.ui.View):
         # Rebuild select options from remaining players
         options = []
         for player in self.remaining_players:
-            user_data = users.find_one({"discord_id": str(player["id"])})
+            user_data = directory.get(player["id"])
             if user_data:
                 label = f"{user_data.get('name', 'Unknown')}#{user_data.get('tag', 'Unknown')}"
             else:
@@ -450,7 +383,7 @@ class CaptainsDraftingView(discord.ui.View):
             {}
         )  # Maps player names to tracker.gg links
         for player in self.remaining_players:
-            user_data = users.find_one({"discord_id": str(player["id"])})
+            user_data = directory.get(player["id"])
             if user_data:
                 user_name = quote(f"{user_data.get('name','Unknown')}")
                 user_tag = quote(f"{user_data.get('tag','Unknown')}")
@@ -482,7 +415,7 @@ class CaptainsDraftingView(discord.ui.View):
         def list_names(team):
             out = []
             for p in team:
-                ud = users.find_one({"discord_id": str(p["id"])})
+                ud = directory.get(p["id"])
                 if ud:
                     out.append(f"{ud.get('name','Unknown')}#{ud.get('tag','Unknown')}")
                 else:
@@ -494,31 +427,30 @@ class CaptainsDraftingView(discord.ui.View):
         )
         drafting_embed.add_field(
             name=f"{self.captain1_name}'s Team",
-            value=list_names(self.bot.team1),
+            value=list_names(self.session.team1),
             inline=False,
         )
         drafting_embed.add_field(
             name=f"{self.captain2_name}'s Team",
-            value=list_names(self.bot.team2),
+            value=list_names(self.session.team2),
             inline=False,
         )
 
         # Prompt for current captain
         current_captain_id = self.pick_order[self.pick_count]["id"]
-        ud = users.find_one({"discord_id": str(current_captain_id)})
+        ud = directory.get(current_captain_id)
         if ud:
             curr_captain_name = f"{ud.get('name','Unknown')}#{ud.get('tag','Unknown')}"
         else:
             c = (
-                self.bot.captain1
-                if self.bot.captain1["id"] == current_captain_id
-                else self.bot.captain2
+                self.session.captain1
+                if self.session.captain1["id"] == current_captain_id
+                else self.session.captain2
             )
             curr_captain_name = c["name"]
 
-        message = (
-            f"**{curr_captain_name}**, pick a player: ({self.draft_time_remaining}s)"
-        )
+        self.pick_deadline = deadline_in(PICK_SECONDS)
+        message = f"**{curr_captain_name}**, pick a player: ends {countdown(self.pick_deadline)}"
 
         if (
             self.captain_pick_message
@@ -544,67 +476,36 @@ class CaptainsDraftingView(discord.ui.View):
             self.drafting_message = await self.ctx.send(embed=drafting_embed)
             self.captain_pick_message = await self.ctx.send(content=message, view=self)
 
-        self.start_draft_timer()
-
         if not self.draft_finished:
             # If only one player left, auto-assign and finalize
             if len(self.remaining_players) == 1:
                 player_dict = self.remaining_players[0]
-                if str(current_captain_id) == str(self.bot.captain1["id"]):
-                    self.bot.team1.append(player_dict)
+                if str(current_captain_id) == str(self.session.captain1["id"]):
+                    self.session.team1.append(player_dict)
                 else:
-                    self.bot.team2.append(player_dict)
+                    self.session.team2.append(player_dict)
                 self.pick_count += 1
                 self.remaining_players.clear()
                 await self.finalize_draft()
                 return
-            try:
-                await self.bot.wait_for(
-                    "interaction",
-                    check=lambda i: i.data.get("component_type") == 3
-                    and str(i.user.id) == str(current_captain_id),
-                    timeout=120,
-                )
-            except asyncio.TimeoutError:
-                if not self.draft_finished:
-                    await self.ctx.send(
-                        f"{curr_captain_name} took too long. Match will be cancelled..."
-                    )
-                    await asyncio.sleep(2)
-
-                    # Reset state
-                    self.bot.signup_active = False
-                    self.bot.match_ongoing = False
-                    self.bot.match_not_reported = False
-                    self.bot.queue.clear()
-                    self.bot.team1 = []
-                    self.bot.team2 = []
-                    self.bot.captain1 = None
-                    self.bot.captain2 = None
-                    self.bot.chosen_mode = None
-                    self.bot.selected_map = None
-
-                    try:
-                        if getattr(self.bot, "match_channel", None):
-                            await self.bot.match_channel.delete()
-                    except discord.NotFound:
-                        pass
-                    finally:
-                        self.bot.match_channel = None
-
-                    try:
-                        if getattr(self.bot, "match_role", None):
-                            await self.bot.match_role.delete()
-                    except discord.NotFound:
-                        pass
-                    finally:
-                        self.bot.match_role = None
-
-                    try:
-                        self.stop()
-                    except Exception:
-                        pass
-
-                    if self.draft_timer_task:
-                        self.draft_timer_task.cancel()
-                        self.draft_timer_task = None
+            self.start_pick_timer(curr_captain_name)
+
+    def start_pick_timer(self, captain_name: str):
+        if self.pick_timer_task:
+            self.pick_timer_task.cancel()
+        self.pick_timer_task = self.start_task(
+            self.pick_timeout_timer(self.pick_count, captain_name)
+        )
+
+    async def pick_timeout_timer(self, pick_count: int, captain_name: str):
+        await asyncio.sleep(PICK_SECONDS)
+        await self.run_serialized(self.pick_timed_out, pick_count, captain_name)
+
+    async def pick_timed_out(self, pick_count: int, captain_name: str):
+        if self.draft_finished or self.pick_count != pick_count:
+            return
+        await self.ctx.send(f"{captain_name} took too long. Match will be cancelled...")
+        await asyncio.sleep(2)
+
+        self.stop()
+        await self.bot.sessions.end(self.session)
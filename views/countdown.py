@@ -0,0 +1,108 @@
+"""
+Vote and draft countdowns without per-second message edits.
+
+A countdown is rendered as a Discord relative timestamp (`<t:...:R>`), which
+every client counts down on its own, so a message only needs editing when its
+buttons or result change. Those edits go through a `MessageEditor`, shared
+per message via `editor_for`, which merges bursts (e.g. a flurry of vote or
+signup clicks) into one edit and sends the final result edit straight away
+instead of behind pending label updates.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+
+def deadline_in(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def countdown(deadline: datetime) -> str:
+    """Relative timestamp markup, shown as e.g. "in 25 seconds"."""
+    return f"<t:{int(deadline.timestamp())}:R>"
+
+
+class MessageEditor:
+    """
+    Coalesces edits to one message.
+
+    `request` edits (button labels, vote counts) wait `window` seconds for the
+    rest of a click burst, are merged, and are sent at most once per
+    `min_interval`. `edit_now` (vote results, disabled buttons) goes
+    out immediately with any pending fields, cancelling a queued or in-flight
+    request edit so it never waits behind one, e.g. during 429 back-off.
+    After `close`, further requests are dropped.
+    """
+
+    def __init__(
+        self, message=None, *, window: float = 0.25, min_interval: float = 1.0
+    ):
+        self.message = message
+        self.window = window
+        self.min_interval = min_interval
+        self._pending: dict = {}
+        self._in_flight: dict = {}
+        self._flush_task: asyncio.Task | None = None
+        self._last_edit = float("-inf")
+        self._closed = False
+
+    def request(self, **fields):
+        if self._closed or self.message is None:
+            return
+        self._pending.update(fields)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        loop = asyncio.get_running_loop()
+        next_edit = self._last_edit + self.min_interval - loop.time()
+        await asyncio.sleep(max(self.window, next_edit))
+        self._in_flight, self._pending = self._pending, {}
+        try:
+            await self._apply(self._in_flight)
+        finally:
+            self._in_flight = {}
+
+    async def edit_now(self, **fields):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        fields = {**self._in_flight, **self._pending, **fields}
+        self._in_flight, self._pending = {}, {}
+        if self.message is not None:
+            await self._apply(fields)
+
+    async def close(self, **fields):
+        """Apply the final edit and ignore any later requests."""
+        self._closed = True
+        self._unregister()
+        await self.edit_now(**fields)
+
+    def _unregister(self):
+        if self.message is not None and _editors.get(self.message.id) is self:
+            del _editors[self.message.id]
+
+    async def _apply(self, fields: dict):
+        if not fields:
+            return
+        self._last_edit = asyncio.get_running_loop().time()
+        try:
+            await self.message.edit(**fields)
+        except discord.NotFound:
+            # The message is gone; nothing left to edit
+            self._closed = True
+            self._unregister()
+
+
+# Open editors by message id, so every code path editing a message shares one
+_editors: dict[int, MessageEditor] = {}
+
+
+def editor_for(message, **options) -> MessageEditor:
+    """The editor of `message`, created with `options` on first use."""
+    editor = _editors.get(message.id)
+    if editor is None:
+        editor = _editors[message.id] = MessageEditor(message, **options)
+    return editor
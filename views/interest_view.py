@@ -1,8 +1,10 @@
 # views/interest_view.py
 import discord
 from discord.ui import View, Button
+from pymongo import ReturnDocument
 
-from database import interests, users
+from database import interests
+from user_directory import directory
 from globals import TIME_ZONE_CST
 
 
@@ -35,22 +37,17 @@ class InterestView(View):
         self.add_item(self.refresh_button)
 
     # helper functions
-    def _slot_doc(self):
-        return interests.find_one({"scheduled_at_utc": self.scheduled_at_utc})
-
-    def _ensure_membership(self, user_id: str, add: bool):
-        if add:
-            return interests.find_one_and_update(
-                {"scheduled_at_utc": self.scheduled_at_utc},
-                {"$addToSet": {"interested_ids": user_id}},
-                return_document=True,
-            )
-        else:
-            return interests.find_one_and_update(
-                {"scheduled_at_utc": self.scheduled_at_utc},
-                {"$pull": {"interested_ids": user_id}},
-                return_document=True,
-            )
+    async def _slot_doc(self):
+        return await interests.find_one({"scheduled_at_utc": self.scheduled_at_utc})
+
+    async def _ensure_membership(self, user_id: str, add: bool):
+        """Apply a join/leave atomically and return the updated slot."""
+        return await interests.find_one_and_update(
+            {"scheduled_at_utc": self.scheduled_at_utc},
+            {("$addToSet" if add else "$pull"): {"interested_ids": user_id}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
 
     def _format_header(self):
         local = self.scheduled_at_utc.astimezone(TIME_ZONE_CST)
@@ -67,15 +64,15 @@ class InterestView(View):
 
         lines = []
         for uid in ids:
-            udoc = users.find_one({"discord_id": uid})
+            udoc = directory.get(uid)
             if udoc and udoc.get("name") and udoc.get("tag"):
                 lines.append(f"• **{udoc['name']}#{udoc['tag']}** (<@{uid}>)")
             else:
                 lines.append(f"• <@{uid}>")
         return "\n".join(lines)
 
-    async def _render(self, interaction: discord.Interaction):
-        doc = self._slot_doc() or {"interested_ids": []}
+    async def _render(self, interaction: discord.Interaction, doc=None):
+        doc = doc or await self._slot_doc() or {"interested_ids": []}
         count = len(doc.get("interested_ids") or [])
         body = self._format_list(doc)
         embed = discord.Embed(
@@ -91,15 +88,15 @@ class InterestView(View):
     # end of helpers, start of callback functions
     async def join_callback(self, interaction: discord.Interaction):
         user_id = str(interaction.user.id)
-        self._ensure_membership(user_id, add=True)
+        doc = await self._ensure_membership(user_id, add=True)
         await interaction.response.defer(thinking=False)
-        await self._render(interaction)
+        await self._render(interaction, doc)
 
     async def leave_callback(self, interaction: discord.Interaction):
         user_id = str(interaction.user.id)
-        self._ensure_membership(user_id, add=False)
+        doc = await self._ensure_membership(user_id, add=False)
         await interaction.response.defer(thinking=False)
-        await self._render(interaction)
+        await self._render(interaction, doc)
 
     async def refresh_callback(self, interaction: discord.Interaction):
         await interaction.response.defer(thinking=False)
@@ -1,26 +1,14 @@
 """This view allows users to see a stats leaderboard of all the users currently in the database."""
 
 import math
+from collections import OrderedDict
 
 import discord
 from discord.ui import View, Button
 from table2ascii import table2ascii as t2a, PresetStyle
 import wcwidth
 
-from database import users, mmr_collection, tdm_mmr_collection
-
-
-def _has_played_normal(doc: dict) -> bool:
-    # Normal mode
-    mp = doc.get("matches_played")
-    if isinstance(mp, (int, float)):
-        return mp > 0
-    return (doc.get("wins", 0) + doc.get("losses", 0)) > 0
-
-
-def _has_played_tdm(doc: dict) -> bool:
-    # TDM
-    return (doc.get("tdm_wins", 0) + doc.get("tdm_losses", 0)) > 0
+from leaderboard_queries import count_leaderboard, fetch_leaderboard_page
 
 
 def truncate_by_display_width(original_string, max_width=15, ellipsis=True):
@@ -45,36 +33,94 @@ def truncate_by_display_width(original_string, max_width=15, ellipsis=True):
     return truncated + end_str
 
 
+class LeaderboardCache:
+    """
+    Rendered leaderboard pages and page counts of one guild, for the current
+    data version.
+
+    Leaderboard data only changes when stats are saved, a season resets or a
+    Riot ID is relinked; those call `invalidate_leaderboards()`, which bumps
+    the version. Until then page flips and refreshes are served from here.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.version = 0
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._pages: OrderedDict = OrderedDict()
+        self._counts: dict = {}
+
+    def invalidate(self):
+        self.version += 1
+        self._pages.clear()
+        self._counts.clear()
+
+    async def count(self, mode: str, compute) -> int:
+        key = (mode, self.version)
+        if key not in self._counts:
+            self._counts[key] = await compute()
+        return self._counts[key]
+
+    async def page(self, key: tuple, render) -> str:
+        key = (*key, self.version)
+        content = self._pages.get(key)
+        if content is not None:
+            self.hits += 1
+            self._pages.move_to_end(key)
+            return content
+        self.misses += 1
+        content = await render()
+        self._pages[key] = content
+        if len(self._pages) > self.maxsize:
+            self._pages.popitem(last=False)
+        return content
+
+
+# One cache per guild, so a report in one guild keeps the others' pages
+page_caches: dict[str, LeaderboardCache] = {}
+
+
+def page_cache(guild_id) -> LeaderboardCache:
+    guild_id = str(guild_id)
+    cache = page_caches.get(guild_id)
+    if cache is None:
+        cache = page_caches[guild_id] = LeaderboardCache()
+    return cache
+
+
+def invalidate_leaderboards(guild_id=None):
+    """Drop the cached pages of `guild_id`, or of every guild when None."""
+    if guild_id is None:
+        for cache in page_caches.values():
+            cache.invalidate()
+    else:
+        page_cache(guild_id).invalidate()
+
+
 class LeaderboardView(View):
     def __init__(
         self,
         ctx,
         bot,
-        sorted_data,
         sort_by,
         players_per_page=10,
         timeout=None,
         mode="normal",
+        guild_id=None,
     ):
         super().__init__(timeout=timeout)
         self.ctx = ctx
         self.bot = bot
-        self.sorted_data = sorted_data
+        self.guild_id = str(guild_id if guild_id is not None else ctx.guild.id)
         self.sort_by = sort_by
         self.players_per_page = players_per_page
         self.current_page = 0
         self.mode = mode  # "normal" or "tdm"
 
-        # Hide users with zero matches
-        if self.mode == "tdm":
-            self.sorted_data = [d for d in self.sorted_data if _has_played_tdm(d)]
-        else:
-            self.sorted_data = [d for d in self.sorted_data if _has_played_normal(d)]
-
-        # compute pages after filtering
-        self.total_pages = max(
-            1, math.ceil(len(self.sorted_data) / self.players_per_page)
-        )
+        # Leaderboards only include users with at least one match;
+        # the page count is filled in by make_content
+        self.total_pages = 1
         self.previous_button = Button(
             style=discord.ButtonStyle.blurple,
             emoji="⏪",
@@ -104,10 +150,32 @@ class LeaderboardView(View):
         self.add_item(self.toggle_mode_button)
 
         print(
-            f"[LB] mode={self.mode} items={len(self.sorted_data)} per_page={self.players_per_page} pages={self.total_pages}"
+            f"[LB] mode={self.mode} sort={self.sort_key} per_page={self.players_per_page}"
         )
 
-    def make_content(self, data, mode, page_count):
+    @property
+    def sort_key(self) -> str:
+        return "tdm_mmr" if self.mode == "tdm" else self.sort_by
+
+    async def _count_pages(self) -> int:
+        items = await page_cache(self.guild_id).count(
+            self.mode, lambda: count_leaderboard(self.guild_id, self.mode)
+        )
+        return max(1, math.ceil(items / self.players_per_page))
+
+    async def make_content(self):
+        self.total_pages = await self._count_pages()
+        self.current_page = min(self.current_page, self.total_pages - 1)
+
+        # Update button states
+        self.previous_button.disabled = self.current_page == 0
+        self.next_button.disabled = self.current_page >= self.total_pages - 1
+
+        key = (self.mode, self.sort_key, self.current_page, self.players_per_page)
+        return await page_cache(self.guild_id).page(key, self._render_page)
+
+    async def _render_page(self):
+        mode = self.mode
         sort_by_to_title = {
             "mmr": "MMR",
             "average_combat_score": "ACS",
@@ -124,11 +192,12 @@ class LeaderboardView(View):
 
         leaderboard_data = []
         start_index = self.current_page * self.players_per_page
-        end_index = min((self.current_page + 1) * self.players_per_page, len(data))
+        page = await fetch_leaderboard_page(
+            self.guild_id, mode, self.sort_key, self.current_page, self.players_per_page
+        )
 
-        for idx, player_data in enumerate(data[start_index:end_index], start=1):
-            player_id = str(player_data["player_id"])
-            user_data = users.find_one({"discord_id": player_id})
+        for idx, player_data in enumerate(page, start=1):
+            user_data = player_data.get("user")
 
             if user_data:
                 name = f"{user_data.get('name', 'Unknown')}#{user_data.get('tag', 'Unknown')}"
@@ -190,51 +259,30 @@ class LeaderboardView(View):
                 f"## {title}\n_Play a match for leaderboard statistics to appear here._"
             )
 
-        content = f"## {title} (Page {self.current_page+1}/{page_count}) ##\n```\n{table_output}\n```"
+        content = f"## {title} (Page {self.current_page+1}/{self.total_pages}) ##\n```\n{table_output}\n```"
         return content
 
     async def on_toggle_mode(self, interaction: discord.Interaction):
         new_mode = "tdm" if self.mode == "normal" else "normal"
-        collection = tdm_mmr_collection if new_mode == "tdm" else mmr_collection
-
-        if new_mode == "tdm":
-            sorted_data = sorted(
-                collection.find(), key=lambda x: x.get("tdm_mmr", 0), reverse=True
-            )
-            sorted_data = [d for d in sorted_data if _has_played_tdm(d)]
-        else:
-            sorted_data = sorted(
-                collection.find(), key=lambda x: x.get(self.sort_by, 0), reverse=True
-            )
-            sorted_data = [d for d in sorted_data if _has_played_normal(d)]
-
         new_view = LeaderboardView(
             self.ctx,
             self.bot,
-            sorted_data,
             self.sort_by,
             self.players_per_page,
             timeout=None,
             mode=new_mode,
+            guild_id=self.guild_id,
         )
 
-        self.current_page = new_view.current_page
-
         # Update message
         await interaction.response.edit_message(
-            content=self.make_content(sorted_data, new_mode, new_view.total_pages),
+            content=await new_view.make_content(),
             view=new_view,
         )
 
     async def update_message(self, interaction: discord.Interaction):
-        # Update button states
-        self.previous_button.disabled = self.current_page == 0
-        self.next_button.disabled = self.current_page >= self.total_pages - 1
-
-        await interaction.response.edit_message(
-            content=self.make_content(self.sorted_data, self.mode, self.total_pages),
-            view=self,
-        )
+        content = await self.make_content()
+        await interaction.response.edit_message(content=content, view=self)
 
     async def on_previous(self, interaction: discord.Interaction):
         if self.current_page > 0:
@@ -247,22 +295,5 @@ class LeaderboardView(View):
         await self.update_message(interaction)
 
     async def on_refresh(self, interaction: discord.Interaction):
-        collection = tdm_mmr_collection if self.mode == "tdm" else mmr_collection
-
-        if self.mode == "tdm":
-            self.sorted_data = sorted(
-                collection.find(), key=lambda x: x.get("tdm_mmr", 0), reverse=True
-            )
-        else:
-            self.sorted_data = sorted(
-                collection.find(), key=lambda x: x.get(self.sort_by, 0), reverse=True
-            )
-        if self.mode == "tdm":
-            self.sorted_data = [d for d in self.sorted_data if _has_played_tdm(d)]
-        else:
-            self.sorted_data = [d for d in self.sorted_data if _has_played_normal(d)]
-
-        self.total_pages = math.ceil(len(self.sorted_data) / self.players_per_page)
-        if self.current_page >= self.total_pages:
-            self.current_page = max(0, self.total_pages - 1)
+        # make_content re-reads the page count and clamps the current page
         await self.update_message(interaction)
@@ -7,14 +7,20 @@ from discord.ui import Button
 
 from maps_service import get_competitive_maps, get_standard_maps
 from views import safe_reply
+from views.countdown import MessageEditor, countdown, deadline_in, editor_for
 from views.map_vote_view import MapVoteView
+from views.serialized_view import SerializedView
 
+VOTE_SECONDS = 25
 
-class MapTypeVoteView(discord.ui.View):
-    def __init__(self, ctx, bot):
-        super().__init__(timeout=None)
+
+class MapTypeVoteView(SerializedView):
+    def __init__(self, ctx, bot, session):
+        super().__init__()
         self.ctx = ctx
         self.bot = bot
+        self.session = session
+        session.active_view = self
 
         # Setup Interaction Buttons
         self.competitive_button = Button(
@@ -30,14 +36,7 @@ class MapTypeVoteView(discord.ui.View):
         )
         self.all_maps_button.callback = partial(self.vote_callback, mode="All")
 
-        # Setup Task Runners
-        self.interaction_request_queue = (
-            asyncio.Queue()
-        )  # Interaction Queue of (interaction, mode, future)
-        self.interaction_queue_task = asyncio.create_task(
-            self.process_interaction_queue()
-        )
-        self.timeout_timer_task = asyncio.create_task(self.timeout_timer())
+        self.start_task(self.timeout_timer())
 
         # Setup State
         self.map_pool_votes = {"Competitive": 0, "All": 0}
@@ -45,47 +44,19 @@ class MapTypeVoteView(discord.ui.View):
         self.voting_phase_ended = False
         self.timeout = False
         self.view_message = None
-        self.vote_lock = asyncio.Lock()
-        self.vote_time_remaining = 25
+        self.vote_deadline = deadline_in(VOTE_SECONDS)
+        self.editor = MessageEditor()
 
         print("Starting new map type vote...")
 
     async def send_view(self):
         self.view_message = await self.ctx.send(
-            f"Vote for the map pool: ({self.vote_time_remaining}s)", view=self
+            f"Vote for the map pool: ends {countdown(self.vote_deadline)}", view=self
         )
+        self.editor = editor_for(self.view_message)
 
     async def vote_callback(self, interaction: discord.Interaction, mode: str):
-        # Defer the interaction if not already done, to allow time for processing
-        if not interaction.response.is_done():
-            try:
-                await interaction.response.defer(ephemeral=True)
-            except discord.errors.NotFound:
-                # Interaction expired, do not queue
-                return
-
-        # Add the interaction to the interaction queue and wait for processing
-        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
-        fut: asyncio.Future[None] = loop.create_future()
-        await self.interaction_request_queue.put((interaction, mode, fut))
-        await fut  # Wait until this request is processed
-
-    async def process_interaction_queue(self):
-        while True:
-            # Wait for the next interaction request (blocks until available)
-            interaction, mode, fut = await self.interaction_request_queue.get()
-            try:
-                # Process the interaction for this interaction
-                await self.handle_map_type_vote(interaction, mode)
-            finally:
-                # Ensure the waiting coroutine is notified, even if an error occurs
-                if not fut.done():
-                    fut.set_result(None)
-
-    def cancel_interaction_queue_task(self):
-        if self.interaction_queue_task:
-            self.interaction_queue_task.cancel()
-            self.interaction_queue_task = None
+        await self.serialize(interaction, self.handle_map_type_vote, mode)
 
     async def handle_map_type_vote(
         self, interaction: discord.Interaction, map_type: str
@@ -96,7 +67,7 @@ class MapTypeVoteView(discord.ui.View):
                 interaction, "This voting phase has already ended", ephemeral=True
             )
             return
-        if str(interaction.user.id) not in [str(p["id"]) for p in self.bot.queue]:
+        if str(interaction.user.id) not in [str(p["id"]) for p in self.session.queue]:
             await safe_reply(interaction, "Must be in queue!", ephemeral=True)
             return
         if str(interaction.user.id) in self.voters:
@@ -114,7 +85,7 @@ class MapTypeVoteView(discord.ui.View):
             )
         else:
             self.all_maps_button.label = f"All Maps ({self.map_pool_votes['All']})"
-        await interaction.message.edit(view=self)
+        self.editor.request(view=self)
 
         # Reply and check for vote finish
         print(f"Recorded new vote. Current state: {self.map_pool_votes}")
@@ -122,44 +93,43 @@ class MapTypeVoteView(discord.ui.View):
         await self.check_for_winner()
 
     async def check_for_winner(self):
-        async with self.vote_lock:
-            if self.voting_phase_ended:
-                return
+        if self.voting_phase_ended:
+            return
+
+        competitive_votes = self.map_pool_votes["Competitive"]
+        all_votes = self.map_pool_votes["All"]
 
-            competitive_votes = self.map_pool_votes["Competitive"]
-            all_votes = self.map_pool_votes["All"]
+        # Check for majority winner
+        if competitive_votes > 5:
+            self.voting_phase_ended = True
+            await self.ctx.send("Competitive Maps wins by majority!")
+            chosen_map_type = "Competitive"
+            await self.close_vote(chosen_map_type)
+            return
+        elif all_votes > 5:
+            self.voting_phase_ended = True
+            await self.ctx.send("All Maps wins by majority!")
+            chosen_map_type = "All"
+            await self.close_vote(chosen_map_type)
+            return
 
-            # Check for majority winner
-            if competitive_votes > 5:
-                self.voting_phase_ended = True
-                await self.ctx.send("Competitive Maps wins by majority!")
+        # Check for timeout winner
+        if self.timeout:
+            self.voting_phase_ended = True
+            if competitive_votes > all_votes:
+                await self.ctx.send("Competitive Maps wins by timeout!")
                 chosen_map_type = "Competitive"
                 await self.close_vote(chosen_map_type)
-                return
-            elif all_votes > 5:
-                self.voting_phase_ended = True
-                await self.ctx.send("All Maps wins by majority!")
+            elif all_votes > competitive_votes:
+                await self.ctx.send("All Maps wins by timeout!")
                 chosen_map_type = "All"
                 await self.close_vote(chosen_map_type)
-                return
-
-            # Check for timeout winner
-            if self.timeout:
-                self.voting_phase_ended = True
-                if competitive_votes > all_votes:
-                    await self.ctx.send("Competitive Maps wins by timeout!")
-                    chosen_map_type = "Competitive"
-                    await self.close_vote(chosen_map_type)
-                elif all_votes > competitive_votes:
-                    await self.ctx.send("All Maps wins by timeout!")
-                    chosen_map_type = "All"
-                    await self.close_vote(chosen_map_type)
-                else:
-                    decision = "Competitive" if random.choice([True, False]) else "All"
-                    await self.ctx.send(f"Tie! {decision} wins by coin flip!")
-                    chosen_map_type = decision
-                    await self.close_vote(chosen_map_type)
-                return
+            else:
+                decision = "Competitive" if random.choice([True, False]) else "All"
+                await self.ctx.send(f"Tie! {decision} wins by coin flip!")
+                chosen_map_type = decision
+                await self.close_vote(chosen_map_type)
+            return
 
     async def close_vote(self, chosen_map_type):
         if self.timeout:
@@ -169,36 +139,24 @@ class MapTypeVoteView(discord.ui.View):
         for child in self.children:
             if isinstance(child, discord.ui.Button):
                 child.disabled = True
-        await self.view_message.edit(content="Vote for the map pool:", view=self)
+        await self.editor.close(content="Vote for the map pool:", view=self)
 
         if chosen_map_type == "Competitive":
             map_list: list[str] = get_competitive_maps()
         else:
             map_list: list[str] = get_standard_maps()
 
-        map_vote = MapVoteView(self.ctx, self.bot, map_list)
+        map_vote = MapVoteView(self.ctx, self.bot, self.session, map_list)
         await map_vote.setup()
         await map_vote.send_view()
         self.stop()
-        self.cancel_interaction_queue_task()
-        self.cancel_timeout_timer()
 
     async def timeout_timer(self):
-        for _ in range(25):
-            await asyncio.sleep(1)
-            if self.voting_phase_ended:
-                return
-            self.vote_time_remaining -= 1
-            if self.view_message:
-                await self.view_message.edit(
-                    content=f"Vote for the map pool: ({self.vote_time_remaining}s)",
-                    view=self,
-                )
+        # The countdown is shown by Discord itself; nothing to edit until the end
+        await asyncio.sleep(VOTE_SECONDS)
+        await self.run_serialized(self.vote_timed_out)
+
+    async def vote_timed_out(self):
         if not self.voting_phase_ended:
             self.timeout = True
             await self.check_for_winner()
-
-    def cancel_timeout_timer(self):
-        if self.timeout_timer_task:
-            self.timeout_timer_task.cancel()
-            self.timeout_timer_task = None
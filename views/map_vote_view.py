@@ -4,25 +4,24 @@ import random
 import discord
 from discord.ui import Button
 
-from database import users
+from user_directory import directory
 from views.captains_drafting_view import SecondCaptainChoiceView
 from views import safe_reply
+from views.countdown import MessageEditor, countdown, deadline_in, editor_for
+from views.serialized_view import SerializedView
 
+VOTE_SECONDS = 25
 
-class MapVoteView(discord.ui.View):
-    def __init__(self, ctx, bot, map_choices):
-        super().__init__(timeout=None)
+
+class MapVoteView(SerializedView):
+    def __init__(self, ctx, bot, session, map_choices):
+        super().__init__()
         self.ctx = ctx
         self.bot = bot
+        self.session = session
+        session.active_view = self
 
-        # Setup Task Runners
-        self.interaction_request_queue = (
-            asyncio.Queue()
-        )  # Interaction Queue of (interaction, map, future)
-        self.interaction_queue_task = asyncio.create_task(
-            self.process_interaction_queue()
-        )
-        self.timeout_timer_task = asyncio.create_task(self.timeout_timer())
+        self.start_task(self.timeout_timer())
 
         # Setup State
         self.map_choices = map_choices
@@ -33,8 +32,9 @@ class MapVoteView(discord.ui.View):
         self.voters = set()
         self.view_message = None
         self.voting_phase_ended = False
-        self.vote_lock = asyncio.Lock()
-        self.vote_time_remaining = 25
+        self.timeout = False
+        self.vote_deadline = deadline_in(VOTE_SECONDS)
+        self.editor = MessageEditor()
 
         print("Starting new map vote...")
 
@@ -45,26 +45,14 @@ class MapVoteView(discord.ui.View):
         for map in self.chosen_maps:
             # Dynamically setup buttons and callbacks for each map
             async def vote_callback(interaction: discord.Interaction, map=map):
-                # Defer the interaction if not already done, to allow time for processing
-                if not interaction.response.is_done():
-                    try:
-                        await interaction.response.defer(ephemeral=True)
-                    except discord.errors.NotFound:
-                        # Interaction expired, do not queue
-                        return
-
-                # Add the interaction to the interaction queue and wait for processing
-                loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
-                fut: asyncio.Future[None] = loop.create_future()
-                await self.interaction_request_queue.put((interaction, map, fut))
-                await fut  # Wait until this request is processed
+                await self.serialize(interaction, self.handle_map_vote, map)
 
             button = Button(label=f"{map} (0)", style=discord.ButtonStyle.secondary)
             button.callback = vote_callback
             self.map_buttons.append(button)
 
     async def send_view(self):
-        if not self.bot.chosen_mode:
+        if not self.session.chosen_mode:
             print("No mode selected at start of map vote.")
             await self.ctx.send(
                 "Error: Game mode not selected. Please start a new queue."
@@ -75,25 +63,9 @@ class MapVoteView(discord.ui.View):
             self.add_item(button)
 
         self.view_message = await self.ctx.send(
-            f"Vote for the map to play: ({self.vote_time_remaining}s)", view=self
+            f"Vote for the map to play: ends {countdown(self.vote_deadline)}", view=self
         )
-
-    async def process_interaction_queue(self):
-        while True:
-            # Wait for the next interaction request (blocks until available)
-            interaction, map, fut = await self.interaction_request_queue.get()
-            try:
-                # Process the interaction for this interaction
-                await self.handle_map_vote(interaction, map)
-            finally:
-                # Ensure the waiting coroutine is notified, even if an error occurs
-                if not fut.done():
-                    fut.set_result(None)
-
-    def cancel_interaction_queue_task(self):
-        if self.interaction_queue_task:
-            self.interaction_queue_task.cancel()
-            self.interaction_queue_task = None
+        self.editor = editor_for(self.view_message)
 
     async def handle_map_vote(self, interaction: discord.Interaction, map):
         # Ensure vote is valid
@@ -102,7 +74,7 @@ class MapVoteView(discord.ui.View):
                 interaction, "This voting phase has already ended", ephemeral=True
             )
             return
-        if str(interaction.user.id) not in [str(p["id"]) for p in self.bot.queue]:
+        if str(interaction.user.id) not in [str(p["id"]) for p in self.session.queue]:
             await safe_reply(interaction, "Must be in queue!", ephemeral=True)
             return
         if str(interaction.user.id) in self.voters:
@@ -117,7 +89,7 @@ class MapVoteView(discord.ui.View):
         for button in self.map_buttons:
             if button.label.startswith(map):
                 button.label = f"{map} ({self.map_votes[map]})"
-        await interaction.message.edit(view=self)
+        self.editor.request(view=self)
 
         # Reply and check for vote finish
         print(f"Recorded new vote. Current state: {self.map_votes}")
@@ -125,85 +97,82 @@ class MapVoteView(discord.ui.View):
         await self.check_for_winner()
 
     async def check_for_winner(self):
-        async with self.vote_lock:
-            if self.voting_phase_ended:
-                return
-            # Check for majority winner
-            highest_number_of_votes = max(self.map_votes.values())
-            if highest_number_of_votes > 5:
-                self.voting_phase_ended = True
-                # Find the winning map
-                winning_map: str = next(
-                    (
-                        map_name
-                        for map_name, num_votes in self.map_votes.items()
-                        if num_votes == highest_number_of_votes
-                    ),
-                    None,
-                )
-                message = f"{winning_map} wins by majority!"
+        if self.voting_phase_ended:
+            return
+        # Check for majority winner
+        highest_number_of_votes = max(self.map_votes.values())
+        if highest_number_of_votes > 5:
+            self.voting_phase_ended = True
+            # Find the winning map
+            winning_map: str = next(
+                (
+                    map_name
+                    for map_name, num_votes in self.map_votes.items()
+                    if num_votes == highest_number_of_votes
+                ),
+                None,
+            )
+            message = f"{winning_map} wins by majority!"
+            await self.ctx.send(message)
+            print(message)
+            await self.close_vote(winning_map)
+            return
+
+        # Check for timeout winner
+        if self.timeout:
+            self.voting_phase_ended = True
+            # Collect all maps that have the highest number of votes (handles ties)
+            winners = []
+            for map_name, vote_count in self.map_votes.items():
+                if vote_count == highest_number_of_votes:
+                    winners.append(map_name)
+            winning_map = random.choice(winners)
+            if len(winners) > 1:
+                message = f"Tie! Randomly selected: **{winning_map}**"
                 await self.ctx.send(message)
                 print(message)
-                await self.close_vote(winning_map)
-                return
-
-            # Check for timeout winner
-            if self.timeout:
-                self.voting_phase_ended = True
-                # Collect all maps that have the highest number of votes (handles ties)
-                winners = []
-                for map_name, vote_count in self.map_votes.items():
-                    if vote_count == highest_number_of_votes:
-                        winners.append(map_name)
-                winning_map = random.choice(winners)
-                if len(winners) > 1:
-                    message = f"Tie! Randomly selected: **{winning_map}**"
-                    await self.ctx.send(message)
-                    print(message)
-                else:
-                    message = f"{winning_map} wins by timeout!"
-                    await self.ctx.send(message)
-                    print(message)
-                await self.close_vote(winning_map)
-                return
+            else:
+                message = f"{winning_map} wins by timeout!"
+                await self.ctx.send(message)
+                print(message)
+            await self.close_vote(winning_map)
+            return
 
     async def close_vote(self, winning_map: str):
         self.winning_map = winning_map
-        self.bot.selected_map = winning_map
+        self.session.selected_map = winning_map
         for child in self.children:
             if isinstance(child, discord.ui.Button):
                 child.disabled = True
-        await self.view_message.edit(content="Vote for the map to play:", view=self)
+        await self.editor.close(content="Vote for the map to play:", view=self)
 
         # Finalize match setup
-        if self.bot.chosen_mode == "Balanced":
+        if self.session.chosen_mode == "Balanced":
             await self.finalize_match_setup()
-        elif self.bot.chosen_mode == "Captains":
+        elif self.session.chosen_mode == "Captains":
             # Set Captains
-            if not self.bot.captain1 or not self.bot.captain2:
+            if not self.session.captain1 or not self.session.captain2:
                 if not self.assign_captains():
                     await self.ctx.send(
                         "Error: Not enough players to assign captains. Please start a new queue."
                     )
                     self.stop()
-                    self.cancel_interaction_queue_task()
-                    self.cancel_timeout_timer()
                     return
 
-            choice_view = SecondCaptainChoiceView(self.ctx, self.bot)
+            choice_view = SecondCaptainChoiceView(self.ctx, self.bot, self.session)
             await choice_view.send_view()
         else:
             await self.ctx.send("Error: No game mode selected!")
 
         self.stop()
-        self.cancel_interaction_queue_task()
-        self.cancel_timeout_timer()
 
     def assign_captains(self) -> bool:
         # Assign 2 captains randomly from the top 5 MMR players, with a decreasing bias for lower MMR
         sorted_players = sorted(
-            self.bot.queue,
-            key=lambda p: self.bot.player_mmr.get(str(p["id"]), {}).get("mmr", 1000),
+            self.session.queue,
+            key=lambda p: self.session.guild_stats.player_mmr.get(str(p["id"]), {}).get(
+                "mmr", 1000
+            ),
             reverse=True,
         )
 
@@ -214,8 +183,8 @@ class MapVoteView(discord.ui.View):
             return False
         if len(sorted_players) < 5:
             print("Warning: Less than 5 players detected in queue. Continuing...")
-            self.bot.captain1 = sorted_players[0]
-            self.bot.captain2 = sorted_players[1]
+            self.session.captain1 = sorted_players[0]
+            self.session.captain2 = sorted_players[1]
             return True
 
         top_five_players = sorted_players[:5]
@@ -234,8 +203,8 @@ class MapVoteView(discord.ui.View):
                 if remaining_players
                 else captain1
             )
-        self.bot.captain1 = captain1
-        self.bot.captain2 = captain2
+        self.session.captain1 = captain1
+        self.session.captain2 = captain2
         return True
 
     async def finalize_match_setup(self):
@@ -246,10 +215,16 @@ class MapVoteView(discord.ui.View):
             color=discord.Color.blue(),
         )
 
+        linked = directory.get_many(
+            p["id"] for p in self.session.team1 + self.session.team2
+        )
+
         attackers = []
-        for p in self.bot.team1:
-            ud = users.find_one({"discord_id": str(p["id"])})
-            mmr = self.bot.player_mmr.get(str(p["id"]), {}).get("mmr", 1000)
+        for p in self.session.team1:
+            ud = linked.get(str(p["id"]))
+            mmr = self.session.guild_stats.player_mmr.get(str(p["id"]), {}).get(
+                "mmr", 1000
+            )
             if ud:
                 rn = ud.get("name", "Unknown")
                 rt = ud.get("tag", "Unknown")
@@ -258,9 +233,11 @@ class MapVoteView(discord.ui.View):
                 attackers.append(f"{p['name']} (MMR:{mmr})")
 
         defenders = []
-        for p in self.bot.team2:
-            ud = users.find_one({"discord_id": str(p["id"])})
-            mmr = self.bot.player_mmr.get(str(p["id"]), {}).get("mmr", 1000)
+        for p in self.session.team2:
+            ud = linked.get(str(p["id"]))
+            mmr = self.session.guild_stats.player_mmr.get(str(p["id"]), {}).get(
+                "mmr", 1000
+            )
             if ud:
                 rn = ud.get("name", "Unknown")
                 rt = ud.get("tag", "Unknown")
@@ -278,26 +255,20 @@ class MapVoteView(discord.ui.View):
         await self.ctx.send(embed=teams_embed)
         await self.ctx.send("Start match, then `!report` to finalize results.")
 
-        self.bot.match_ongoing = True
-        self.bot.match_not_reported = True
-        await self.bot.match_channel.edit(name=f"{self.bot.match_name}《in-game》")
+        self.session.match_ongoing = True
+        self.session.match_not_reported = True
+        # Simulated lobbies play in an existing channel, which is left as is
+        if self.session.match_channel:
+            await self.session.match_channel.edit(
+                name=f"{self.session.match_name}《in-game》"
+            )
 
     async def timeout_timer(self):
-        for _ in range(25):
-            await asyncio.sleep(1)
-            if self.voting_phase_ended:
-                return
-            self.vote_time_remaining -= 1
-            if self.view_message:
-                await self.view_message.edit(
-                    content=f"Vote for the map to play: ({self.vote_time_remaining}s)",
-                    view=self,
-                )
+        # The countdown is shown by Discord itself; nothing to edit until the end
+        await asyncio.sleep(VOTE_SECONDS)
+        await self.run_serialized(self.vote_timed_out)
+
+    async def vote_timed_out(self):
         if not self.voting_phase_ended:
             self.timeout = True
             await self.check_for_winner()
-
-    def cancel_timeout_timer(self):
-        if self.timeout_timer_task:
-            self.timeout_timer_task.cancel()
-            self.timeout_timer_task = None
@@ -6,14 +6,20 @@ import discord
 from discord.ui import Button
 
 from views import safe_reply
+from views.countdown import MessageEditor, countdown, deadline_in, editor_for
 from views.map_type_vote_view import MapTypeVoteView
+from views.serialized_view import SerializedView
 
+VOTE_SECONDS = 25
 
-class ModeVoteView(discord.ui.View):
-    def __init__(self, ctx, bot):
-        super().__init__(timeout=None)
+
+class ModeVoteView(SerializedView):
+    def __init__(self, ctx, bot, session):
+        super().__init__()
         self.ctx = ctx
         self.bot = bot
+        self.session = session
+        session.active_view = self
 
         # Setup Interaction Buttons
         self.balanced_button = Button(
@@ -27,14 +33,7 @@ class ModeVoteView(discord.ui.View):
         self.balanced_button.callback = partial(self.vote_callback, mode="Balanced")
         self.captains_button.callback = partial(self.vote_callback, mode="Captains")
 
-        # Start Task Runners
-        self.interaction_request_queue = (
-            asyncio.Queue()
-        )  # Interaction Queue of (interaction, mode, future)
-        self.interaction_queue_task = asyncio.create_task(
-            self.process_interaction_queue()
-        )
-        self.timeout_timer_task = asyncio.create_task(self.timeout_timer())
+        self.start_task(self.timeout_timer())
 
         # Setup State
         self.votes = {"Balanced": 0, "Captains": 0}
@@ -42,47 +41,20 @@ class ModeVoteView(discord.ui.View):
         self.voting_phase_ended = False
         self.timeout = False
         self.view_message = None
-        self.vote_lock = asyncio.Lock()
-        self.vote_time_remaining = 25
+        self.vote_deadline = deadline_in(VOTE_SECONDS)
+        self.editor = MessageEditor()
 
         print("Starting new mode vote...")
 
     async def send_view(self):
         self.view_message = await self.ctx.send(
-            f"Vote how teams should be chosen: ({self.vote_time_remaining}s)", view=self
+            f"Vote how teams should be chosen: ends {countdown(self.vote_deadline)}",
+            view=self,
         )
+        self.editor = editor_for(self.view_message)
 
     async def vote_callback(self, interaction: discord.Interaction, mode: str):
-        # Defer the interaction if not already done, to allow time for processing
-        if not interaction.response.is_done():
-            try:
-                await interaction.response.defer(ephemeral=True)
-            except discord.errors.NotFound:
-                # Interaction expired, do not queue
-                return
-
-        # Add the interaction to the interaction queue and wait for processing
-        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
-        fut: asyncio.Future[None] = loop.create_future()
-        await self.interaction_request_queue.put((interaction, mode, fut))
-        await fut  # Wait until this request is processed
-
-    async def process_interaction_queue(self):
-        while True:
-            # Wait for the next interaction request (blocks until available)
-            interaction, mode, fut = await self.interaction_request_queue.get()
-            try:
-                # Process the interaction for this interaction
-                await self.handle_mode_vote(interaction, mode)
-            finally:
-                # Ensure the waiting coroutine is notified, even if an error occurs
-                if not fut.done():
-                    fut.set_result(None)
-
-    def cancel_interaction_queue_task(self):
-        if self.interaction_queue_task:
-            self.interaction_queue_task.cancel()
-            self.interaction_queue_task = None
+        await self.serialize(interaction, self.handle_mode_vote, mode)
 
     async def handle_mode_vote(self, interaction: discord.Interaction, mode: str):
         # Ensure vote is valid
@@ -91,7 +63,7 @@ class ModeVoteView(discord.ui.View):
                 interaction, "This voting phase has already ended", ephemeral=True
             )
             return
-        if str(interaction.user.id) not in [str(p["id"]) for p in self.bot.queue]:
+        if str(interaction.user.id) not in [str(p["id"]) for p in self.session.queue]:
             await safe_reply(interaction, "Must be in queue!", ephemeral=True)
             return
         if str(interaction.user.id) in self.voters:
@@ -107,7 +79,7 @@ class ModeVoteView(discord.ui.View):
             self.balanced_button.label = f"Balanced Teams ({self.votes['Balanced']})"
         else:
             self.captains_button.label = f"Captains ({self.votes['Captains']})"
-        await interaction.message.edit(view=self)
+        self.editor.request(view=self)
 
         # Reply and check for vote finish
         print(f"Recorded new vote. Current state: {self.votes}")
@@ -115,80 +87,73 @@ class ModeVoteView(discord.ui.View):
         await self.check_for_winner()
 
     async def check_for_winner(self):
-        async with self.vote_lock:
-            if self.voting_phase_ended:
-                return
-
-            balanced_votes: int = self.votes["Balanced"]
-            captains_votes: int = self.votes["Captains"]
-
-            # Check for a majority winner
-            if balanced_votes > 5:
-                self.voting_phase_ended = True
-                await self.ctx.send("Balanced wins by majority!")
-                self.bot.chosen_mode = "Balanced"
+        if self.voting_phase_ended:
+            return
+
+        balanced_votes: int = self.votes["Balanced"]
+        captains_votes: int = self.votes["Captains"]
+
+        # Check for a majority winner
+        if balanced_votes > 5:
+            self.voting_phase_ended = True
+            await self.ctx.send("Balanced wins by majority!")
+            self.session.chosen_mode = "Balanced"
+            self.setup_balanced_teams()
+            await self.close_vote()
+            return
+        elif captains_votes > 5:
+            self.voting_phase_ended = True
+            await self.ctx.send("Captains wins by majority!")
+            self.session.chosen_mode = "Captains"
+            await self.close_vote()
+            return
+
+        # Check for a winner by timeout
+        if self.timeout:
+            self.voting_phase_ended = True
+            if balanced_votes > captains_votes:
+                await self.ctx.send("Balanced wins by timeout!")
+                self.session.chosen_mode = "Balanced"
                 self.setup_balanced_teams()
                 await self.close_vote()
-                return
-            elif captains_votes > 5:
-                self.voting_phase_ended = True
-                await self.ctx.send("Captains wins by majority!")
-                self.bot.chosen_mode = "Captains"
+            elif captains_votes > balanced_votes:
+                await self.ctx.send("Captains wins by timeout!")
+                self.session.chosen_mode = "Captains"
+                await self.close_vote()
+            else:
+                decision = "Balanced" if random.choice([True, False]) else "Captains"
+                await self.ctx.send(f"Tie! {decision} wins by coin flip!")
+                self.session.chosen_mode = decision
                 await self.close_vote()
-                return
-
-            # Check for a winner by timeout
-            if self.timeout:
-                self.voting_phase_ended = True
-                if balanced_votes > captains_votes:
-                    await self.ctx.send("Balanced wins by timeout!")
-                    self.bot.chosen_mode = "Balanced"
-                    self.setup_balanced_teams()
-                    await self.close_vote()
-                elif captains_votes > balanced_votes:
-                    await self.ctx.send("Captains wins by timeout!")
-                    self.bot.chosen_mode = "Captains"
-                    await self.close_vote()
-                else:
-                    decision = (
-                        "Balanced" if random.choice([True, False]) else "Captains"
-                    )
-                    await self.ctx.send(f"Tie! {decision} wins by coin flip!")
-                    self.bot.chosen_mode = decision
-                    await self.close_vote()
-                return
+            return
 
     async def close_vote(self):
         if self.timeout:
             print(
-                f"Mode vote ended by timeout. Setting bot mode to: {self.bot.chosen_mode}"
+                f"Mode vote ended by timeout. Setting bot mode to: {self.session.chosen_mode}"
             )
         else:
             print(
-                f"Mode vote ended by majority. Setting bot mode to: {self.bot.chosen_mode}"
+                f"Mode vote ended by majority. Setting bot mode to: {self.session.chosen_mode}"
             )
         for child in self.children:
             if isinstance(child, discord.ui.Button):
                 child.disabled = True
-        await self.view_message.edit(
-            content="Vote how teams should be chosen:", view=self
-        )
+        await self.editor.close(content="Vote how teams should be chosen:", view=self)
 
-        map_type_vote = MapTypeVoteView(self.ctx, self.bot)
+        map_type_vote = MapTypeVoteView(self.ctx, self.bot, self.session)
         await map_type_vote.send_view()
         self.stop()
-        self.cancel_interaction_queue_task()
-        self.cancel_timeout_timer()
 
     def setup_balanced_teams(self):
         print("Generating balanced teams...")
 
         # Sort players by MMR (highest to lowest)
-        players = self.bot.queue[:]
+        players = self.session.queue[:]
 
         def mmr_of(p):
             pid = str(p["id"])
-            return self.bot.player_mmr.get(pid, {}).get("mmr", 1000)
+            return self.session.guild_stats.player_mmr.get(pid, {}).get("mmr", 1000)
 
         players.sort(key=lambda p: mmr_of(p), reverse=True)
 
@@ -202,25 +167,15 @@ class ModeVoteView(discord.ui.View):
             else:
                 team2.append(player)
                 t2_mmr += mmr_of(player)
-        self.bot.team1 = team1
-        self.bot.team2 = team2
+        self.session.team1 = team1
+        self.session.team2 = team2
 
     async def timeout_timer(self):
-        for _ in range(25):
-            await asyncio.sleep(1)
-            if self.voting_phase_ended:
-                return
-            self.vote_time_remaining -= 1
-            if self.view_message:
-                await self.view_message.edit(
-                    content=f"Vote how teams should be chosen: ({self.vote_time_remaining}s)",
-                    view=self,
-                )
+        # The countdown is shown by Discord itself; nothing to edit until the end
+        await asyncio.sleep(VOTE_SECONDS)
+        await self.run_serialized(self.vote_timed_out)
+
+    async def vote_timed_out(self):
         if not self.voting_phase_ended:
             self.timeout = True
             await self.check_for_winner()
-
-    def cancel_timeout_timer(self):
-        if self.timeout_timer_task:
-            self.timeout_timer_task.cancel()
-            self.timeout_timer_task = None
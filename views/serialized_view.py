@@ -0,0 +1,122 @@
+"""
+Base view that applies interactions one at a time.
+
+Views of a match mutate shared bot state (queue, votes, teams) from button
+callbacks and timers that discord.py runs concurrently. A `SerializedView`
+funnels every such handler through one worker, in arrival order, while the
+interaction is acknowledged straight away so Discord's 3 second deadline never
+depends on queue position. Tasks the view owns are started with `start_task`
+and all cancelled by `stop()`.
+"""
+
+import asyncio
+import statistics
+from collections import deque
+
+import discord
+
+# How many recent requests the latency metrics are computed over
+_METRIC_WINDOW = 200
+
+
+class SerializedView(discord.ui.View):
+    def __init__(self, *, timeout: float | None = None):
+        super().__init__(timeout=timeout)
+        self._requests: asyncio.Queue = asyncio.Queue()
+        self._tasks: set[asyncio.Task] = set()
+        self.handled = 0
+        self.wait_times: deque[float] = deque(maxlen=_METRIC_WINDOW)
+        self.run_times: deque[float] = deque(maxlen=_METRIC_WINDOW)
+        self.start_task(self._process_requests())
+
+    def start_task(self, coro) -> asyncio.Task:
+        """Run `coro` as a task owned by this view, cancelled on `stop()`."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def serialize(self, interaction: discord.Interaction, handler, *args):
+        """
+        Acknowledge `interaction`, then run `handler(interaction, *args)` on the
+        worker and wait for it to finish.
+        """
+        if not interaction.response.is_done():
+            try:
+                await interaction.response.defer(ephemeral=True)
+            except discord.errors.NotFound:
+                # Interaction expired, do not queue
+                return
+        await self.run_serialized(handler, interaction, *args)
+
+    async def run_serialized(self, handler, *args):
+        """Run `handler(*args)` on the worker, after everything queued before it."""
+        if self.is_finished():
+            return
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future[None] = loop.create_future()
+        await self._requests.put((handler, args, fut, loop.time()))
+        await fut
+
+    async def _process_requests(self):
+        loop = asyncio.get_running_loop()
+        while not self.is_finished():
+            handler, args, fut, queued_at = await self._requests.get()
+            started = loop.time()
+            try:
+                await handler(*args)
+            except Exception as e:
+                print(f"[DEBUG] {type(self).__name__} handler {handler.__name__}: {e}")
+            finally:
+                self.wait_times.append(started - queued_at)
+                self.run_times.append(loop.time() - started)
+                self.handled += 1
+                # Ensure the waiting coroutine is notified, even if an error occurs
+                if not fut.done():
+                    fut.set_result(None)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._requests.qsize()
+
+    def metrics(self) -> dict:
+        """Requests handled, current queue depth and recent latencies in ms."""
+
+        def ms(values, pct):
+            if not values:
+                return 0.0
+            if len(values) < 2:
+                return values[0] * 1000
+            return (
+                statistics.quantiles(values, n=100, method="inclusive")[pct - 1] * 1000
+            )
+
+        waits, runs = list(self.wait_times), list(self.run_times)
+        return {
+            "handled": self.handled,
+            "queue_depth": self.queue_depth,
+            "wait_p50_ms": ms(waits, 50),
+            "wait_p95_ms": ms(waits, 95),
+            "run_p50_ms": ms(runs, 50),
+            "run_p95_ms": ms(runs, 95),
+        }
+
+    def stop(self):
+        """
+        Stop the view and cancel its tasks. When called from one of them (e.g.
+        a handler closing the vote), that task runs to completion instead.
+        """
+        if self.is_finished():
+            return
+        super().stop()
+        current = asyncio.current_task()
+        for task in list(self._tasks):
+            if task is not current:
+                task.cancel()
+        # Release callbacks still waiting in the queue; their handlers never run
+        while not self._requests.empty():
+            _, _, fut, _ = self._requests.get_nowait()
+            if not fut.done():
+                fut.set_result(None)
+        if self.handled:
+            print(f"[DEBUG] {type(self).__name__} stopped: {self.metrics()}")
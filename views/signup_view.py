@@ -5,27 +5,26 @@ import asyncio
 import discord
 from discord.ui import Button
 
-from database import users
+from user_directory import directory
 from riot_api import verify_riot_account
 from views import safe_reply
+from views.countdown import editor_for
 from views.mode_vote_view import ModeVoteView
+from views.serialized_view import SerializedView
 
 
-class SignupView(discord.ui.View):
-    def __init__(self, ctx, bot):
-        super().__init__(timeout=None)
+class SignupView(SerializedView):
+    def __init__(self, ctx, bot, session):
+        super().__init__()
         self.ctx = ctx
         self.bot = bot
-        self.bot.origin_ctx = ctx
+        self.session = session
+        self.session.origin_ctx = ctx
 
         # Start Task Runners
-        self.signup_request_queue = (
-            asyncio.Queue()
-        )  # Interaction Queue of (interaction, future)
-        self.signup_queue_task = asyncio.create_task(self.process_signup_queue())
-        self.refresh_signup_task = asyncio.create_task(self.refresh_signup_message())
-        self.channel_rename_task = asyncio.create_task(self.channel_rename_worker())
-        self.timeout_monitor_task = asyncio.create_task(self.monitor_queue())
+        self.start_task(self.refresh_signup_message())
+        self.start_task(self.channel_rename_worker())
+        self.start_task(self.monitor_queue())
 
         # Activity tracking
         self.last_activity_time = asyncio.get_event_loop().time()
@@ -47,40 +46,25 @@ class SignupView(discord.ui.View):
 
     async def sign_up_callback(self, interaction: discord.Interaction):
         print(f"Sign up requested by: {interaction.user.name}")
-
-        # Defer the interaction if not already done, to allow time for processing
-        if not interaction.response.is_done():
-            try:
-                await interaction.response.defer(ephemeral=True)
-            except discord.errors.NotFound:
-                # Interaction expired, do not queue
-                return
-
-        # Add the interaction to the signup queue and wait for processing
-        loop: asyncio.AbstractEventLoop = asyncio.get_event_loop()
-        fut: asyncio.Future[None] = loop.create_future()
-        await self.signup_request_queue.put((interaction, fut))
-        await fut  # Wait until this request is processed
+        await self.serialize(interaction, self.handle_signup)
 
     async def leave_queue_callback(self, interaction: discord.Interaction):
         print(f"Leave queue requested by: {interaction.user.name}")
+        await self.serialize(interaction, self.handle_leave_queue)
 
-        # Defer the interaction if not already done, to allow time for processing
-        if not interaction.response.is_done():
-            await interaction.response.defer(ephemeral=True)
-
+    async def handle_leave_queue(self, interaction: discord.Interaction):
         # Check if the user is in the queue
         player_id: str = str(interaction.user.id)
-        if player_id not in [p["id"] for p in self.bot.queue]:
+        if player_id not in [p["id"] for p in self.session.queue]:
             await interaction.followup.send("You're not in the queue!", ephemeral=True)
             return
 
         # Remove the user from the queue
         new_queue: list[dict] = []
-        for player in self.bot.queue:
+        for player in self.session.queue:
             if player["id"] != player_id:
                 new_queue.append(player)
-        self.bot.queue = new_queue
+        self.session.queue = new_queue
         riot_names: list[str] = self.get_riot_names()
         print(f"{interaction.user.name} left the queue successfully")
 
@@ -88,10 +72,9 @@ class SignupView(discord.ui.View):
         self.last_activity_time = asyncio.get_event_loop().time()
 
         # Edit the queue message and button label to reflect the new queue
-        self.sign_up_button.label = f"Sign Up ({len(self.bot.queue)}/10)"
-        await interaction.message.edit(
-            embed=self.get_signup_embed(),
-            view=self,
+        self.sign_up_button.label = f"Sign Up ({len(self.session.queue)}/10)"
+        editor_for(interaction.message).request(
+            embed=self.get_signup_embed(), view=self
         )
 
         # Notify the user that they have left the queue
@@ -105,24 +88,7 @@ class SignupView(discord.ui.View):
             interaction.user.id
         ) or await interaction.guild.fetch_member(interaction.user.id)
         if member:
-            await member.remove_roles(self.bot.match_role)
-
-    async def process_signup_queue(self):
-        while True:
-            # Wait for the next signup request (blocks until available)
-            interaction, fut = await self.signup_request_queue.get()
-            try:
-                # Process the signup for this interaction
-                await self.handle_signup(interaction)
-            finally:
-                # Ensure the waiting coroutine is notified, even if an error occurs
-                if not fut.done():
-                    fut.set_result(None)
-
-    def cancel_signup_queue_task(self):
-        if self.signup_queue_task:
-            self.signup_queue_task.cancel()
-            self.signup_queue_task = None
+            await member.remove_roles(self.session.match_role)
 
     async def monitor_queue(self):
         try:
@@ -130,7 +96,7 @@ class SignupView(discord.ui.View):
                 await asyncio.sleep(60)  # Check every minute
                 now = asyncio.get_event_loop().time()
 
-                if len(self.bot.queue) == 0:
+                if len(self.session.queue) == 0:
                     if self.empty_since_time is None:
                         self.empty_since_time = now
                     elif now - self.empty_since_time > 600:  # 10 minutes
@@ -149,11 +115,6 @@ class SignupView(discord.ui.View):
         except asyncio.CancelledError:
             pass
 
-    def cancel_timeout_monitor_task(self):
-        if self.timeout_monitor_task:
-            self.timeout_monitor_task.cancel()
-            self.timeout_monitor_task = None
-
     async def cancel_signup(self, reason):
         # Send message to original channel
         try:
@@ -162,53 +123,34 @@ class SignupView(discord.ui.View):
         except:
             pass  # In case channel is deleted or something
 
-        # Clear variables
-        self.bot.signup_active = False
-        self.bot.queue = []
-        self.bot.captain1 = None
-        self.bot.captain2 = None
-        self.bot.team1 = []
-        self.bot.team2 = []
-        self.bot.chosen_mode = None
-        self.bot.selected_map = None
-
-        # Delete role and channel
-        try:
-            await self.bot.match_role.delete()
-        except:
-            pass
-        try:
-            await self.bot.match_channel.delete()
-        except:
-            pass
-
-        # Cleanup view
-        self.stop()
-        self.cancel_refresh_signup_task()
-        self.cancel_channel_rename_task()
-        self.cancel_signup_queue_task()
-        self.cancel_timeout_monitor_task()
+        # Close the lobby; also stops this view
+        await self.bot.sessions.end(self.session)
 
-    async def handle_signup(self, interaction: discord.Interaction):
+    def queue_refusal(self, user_id: str) -> str | None:
+        """Why `user_id` can't join the queue right now, or None if they can."""
         # Only allow up to 10 players in the queue
-        if len(self.bot.queue) >= 10:
-            await safe_reply(
-                interaction,
-                "❌ The queue is already full! Please wait for the next game.",
-                ephemeral=True,
-            )
-            return
+        if len(self.session.queue) >= 10:
+            return "❌ The queue is already full! Please wait for the next game."
 
         # Check that the user is not already in the queue
+        if user_id in [p["id"] for p in self.session.queue]:
+            return "You're already in the queue!"
+
+        # Players can only be in one lobby at a time
+        other_session = self.bot.sessions.of_player(user_id)
+        if other_session is not None:
+            return f"You're already in the queue of {other_session.match_name}!"
+        return None
+
+    async def handle_signup(self, interaction: discord.Interaction):
         user_id: str = str(interaction.user.id)
-        if user_id in [p["id"] for p in self.bot.queue]:
-            await safe_reply(
-                interaction, "You're already in the queue!", ephemeral=True
-            )
+        refusal = self.queue_refusal(user_id)
+        if refusal:
+            await safe_reply(interaction, refusal, ephemeral=True)
             return
 
         # Verify the user has linked their Riot account
-        db_user: dict | None = users.find_one({"discord_id": str(interaction.user.id)})
+        db_user: dict | None = await directory.fetch(interaction.user.id)
         if not db_user:
             await safe_reply(
                 interaction,
@@ -220,7 +162,9 @@ class SignupView(discord.ui.View):
         # Verify the user's Riot account
         user_name: str = (db_user.get("name") or "").lower().strip()
         user_tag: str = (db_user.get("tag") or "").lower().strip()
-        is_successful, reason = verify_riot_account(user_name, user_tag)
+        is_successful, reason = await verify_riot_account(
+            self.bot.henrik, user_name, user_tag
+        )
         if not is_successful:
             await safe_reply(
                 interaction,
@@ -229,15 +173,22 @@ class SignupView(discord.ui.View):
             )
             return
 
+        # Check again: other lobbies may have changed while verifying
+        refusal = self.queue_refusal(user_id)
+        if refusal:
+            await safe_reply(interaction, refusal, ephemeral=True)
+            return
+
         # Add the user the queue, and create mmr data if not present
-        self.bot.queue.append({"id": user_id, "name": interaction.user.name})
-        if user_id not in self.bot.player_mmr:
-            self.bot.player_mmr[user_id] = {
+        self.session.queue.append({"id": user_id, "name": interaction.user.name})
+        guild_stats = self.session.guild_stats
+        if user_id not in guild_stats.player_mmr:
+            guild_stats.player_mmr[user_id] = {
                 "mmr": 1000,
                 "wins": 0,
                 "losses": 0,
             }
-        self.bot.player_names[user_id] = interaction.user.name
+        guild_stats.player_names[user_id] = interaction.user.name
         riot_names: list[str] = self.get_riot_names()
         print(f"{interaction.user.name} joined the queue successfully.")
 
@@ -249,13 +200,12 @@ class SignupView(discord.ui.View):
             interaction.user.id
         ) or await interaction.guild.fetch_member(interaction.user.id)
         if member:
-            await member.add_roles(self.bot.match_role)
+            await member.add_roles(self.session.match_role)
 
         # Update the message and the signup button
-        self.sign_up_button.label = f"Sign Up ({len(self.bot.queue)}/10)"
-        await interaction.message.edit(
-            embed=self.get_signup_embed(),
-            view=self,
+        self.sign_up_button.label = f"Sign Up ({len(self.session.queue)}/10)"
+        editor_for(interaction.message).request(
+            embed=self.get_signup_embed(), view=self
         )
         await interaction.followup.send(
             f"{interaction.user.name} added to the queue!",
@@ -263,7 +213,7 @@ class SignupView(discord.ui.View):
         )
 
         # Check if queue is full
-        if len(self.bot.queue) == 10:
+        if len(self.session.queue) == 10:
             await self.finalize_signup(interaction)
 
     async def finalize_signup(self, interaction: discord.Interaction):
@@ -278,52 +228,50 @@ class SignupView(discord.ui.View):
 
         # Ping all players
         await interaction.channel.send(
-            "__Players:__ " + " ".join([f"<@{p['id']}>" for p in self.bot.queue])
+            "__Players:__ " + " ".join([f"<@{p['id']}>" for p in self.session.queue])
         )
 
-        self.bot.signup_active = False
-        self.ctx.channel = self.bot.match_channel
+        self.session.signup_active = False
+        self.ctx.channel = self.session.match_channel
 
         for child in self.children:
             if isinstance(child, discord.ui.Button):
                 child.disabled = True
-        await self.bot.current_signup_message.edit(view=self)
+        await editor_for(self.session.current_signup_message).close(view=self)
 
-        self.bot.chosen_mode = None
-        mode_vote = ModeVoteView(self.ctx, self.bot)
+        self.session.chosen_mode = None
+        mode_vote = ModeVoteView(self.ctx, self.bot, self.session)
         await mode_vote.send_view()
         self.stop()
-        self.cancel_refresh_signup_task()
-        self.cancel_channel_rename_task()
-        self.cancel_signup_queue_task()
-        self.cancel_timeout_monitor_task()
 
     async def refresh_signup_message(self):
         try:
             await asyncio.sleep(60)
-            while self.bot.signup_active:
+            while self.session.signup_active:
                 riot_names: list[str] = self.get_riot_names()
 
-                if self.bot.current_signup_message:
+                if self.session.current_signup_message:
                     try:
-                        await self.bot.current_signup_message.edit(
+                        await self.session.current_signup_message.edit(
                             embed=self.get_signup_embed(),
                             view=self,
                         )
                     except discord.NotFound:
                         # Message deleted, recreate it
-                        self.bot.current_signup_message = (
-                            await self.bot.match_channel.send(
+                        self.session.current_signup_message = (
+                            await self.session.match_channel.send(
                                 embed=self.get_signup_embed(),
                                 view=self,
                                 silent=True,
                             )
                         )
                 else:
-                    self.bot.current_signup_message = await self.bot.match_channel.send(
-                        embed=self.get_signup_embed(),
-                        view=self,
-                        silent=True,
+                    self.session.current_signup_message = (
+                        await self.session.match_channel.send(
+                            embed=self.get_signup_embed(),
+                            view=self,
+                            silent=True,
+                        )
                     )
 
                 await asyncio.sleep(60)
@@ -333,8 +281,10 @@ class SignupView(discord.ui.View):
     def get_signup_embed(self) -> discord.Embed:
         # Construct a signup embed, listing players, in order of signup as <discord_name>(<Riot_id>)
 
+        linked = directory.get_many(p["id"] for p in self.session.queue)
+
         def get_user_data(player) -> tuple[str, str, str]:
-            user_data = users.find_one({"discord_id": str(player["id"])})
+            user_data = linked.get(str(player["id"]))
             member = self.ctx.guild.get_member(int(player["id"]))
             display_name = member.display_name if member else "Unknown"
             riot_name = user_data.get("name", "Unknown") if user_data else "Unknown"
@@ -343,7 +293,7 @@ class SignupView(discord.ui.View):
             return display_name, riot_name, riot_tag
 
         player_embed_lines = []
-        for player in self.bot.queue:
+        for player in self.session.queue:
             display_name, riot_name, riot_tag = get_user_data(player)
             player_embed_lines.append(f"{display_name} (`{riot_name}#{riot_tag}`)")
 
@@ -352,58 +302,47 @@ class SignupView(discord.ui.View):
             description="Click a button to manage your queue status!",
             color=discord.Color.yellow(),
         )
-        if len(self.bot.queue):
+        if len(self.session.queue):
             embed.add_field(
                 name="Players:",
                 value="\n".join(player_embed_lines),
                 inline=False,
             )
-        embed.set_footer(text=f"Total: {len(self.bot.queue)}/10")
+        embed.set_footer(text=f"Total: {len(self.session.queue)}/10")
         return embed
 
-    def cancel_refresh_signup_task(self):
-        if self.refresh_signup_task:
-            self.refresh_signup_task.cancel()
-            self.refresh_signup_task = None
-
     async def channel_rename_worker(self):
         await asyncio.sleep(720)
         try:
-            while self.bot.signup_active:
-                new_channel_name = f"{self.bot.match_name}《{len(self.bot.queue)}∕10》"
+            while self.session.signup_active:
+                new_channel_name = (
+                    f"{self.session.match_name}《{len(self.session.queue)}∕10》"
+                )
 
-                if self.bot.match_channel.name != new_channel_name:
+                if self.session.match_channel.name != new_channel_name:
                     try:
-                        await self.bot.match_channel.edit(name=new_channel_name)
+                        await self.session.match_channel.edit(name=new_channel_name)
                         print(f"Renamed channel to {new_channel_name}")
                     except discord.HTTPException:
-                        print(f"Failed to rename channel {self.bot.match_name}")
+                        print(f"Failed to rename channel {self.session.match_name}")
                     await asyncio.sleep(720)
                 else:
                     await asyncio.sleep(10)  # small delay to avoid busy loop
         except asyncio.CancelledError:
             pass
 
-    def cancel_channel_rename_task(self):
-        if self.channel_rename_task:
-            self.channel_rename_task.cancel()
-            self.channel_rename_task = None
-
     def get_riot_names(self) -> list[str]:
         riot_names: list[str] = []
-        for player in self.bot.queue:
-            discord_id = player["id"]
-            user_data = users.find_one({"discord_id": str(discord_id)})
+        linked = directory.get_many(p["id"] for p in self.session.queue)
+        for player in self.session.queue:
+            user_data = linked.get(str(player["id"]))
             riot_name = user_data.get("name", "Unknown") if user_data else "Unknown"
             riot_names.append(riot_name)
         return riot_names
 
     def cleanup(self):
         """Used to cleanup the signup externally"""
-        self.cancel_channel_rename_task()
-        self.cancel_refresh_signup_task()
-        self.cancel_signup_queue_task()
-        self.cancel_timeout_monitor_task()
+        self.stop()
 
         self.ctx = None
         self.bot = None
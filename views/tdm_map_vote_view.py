@@ -5,6 +5,8 @@ import discord
 from discord.ui import Button
 from maps_service import get_tdm_maps
 from views import safe_reply
+from views.countdown import editor_for
+from views.serialized_view import SerializedView
 
 
 class MapButton(discord.ui.Button):
@@ -37,19 +39,19 @@ class MapButton(discord.ui.Button):
         )
 
 
-class TDMMapVoteView(discord.ui.View):
-    def __init__(self, ctx, bot):
-        super().__init__(timeout=None)
+class TDMMapVoteView(SerializedView):
+    def __init__(self, ctx, bot, lobby):
+        super().__init__()
         self.ctx = ctx
         self.bot = bot
+        self.lobby = lobby
         self.map_buttons = []
         self.map_votes = {}
         self.chosen_maps = []
         self.winning_map = ""
         self.voters = set()
-        self.is_handling_vote = False
-        # Store direct reference to tdm_queue
-        self.tdm_queue = bot.tdm_queue
+        # Store direct reference to the lobby's queue
+        self.tdm_queue = lobby.queue
         print(f"[DEBUG] Queue at init: {self.tdm_queue}")
 
     async def setup(self):
@@ -62,58 +64,41 @@ class TDMMapVoteView(discord.ui.View):
         for m in random_maps:
             btn = Button(label=f"{m} (0)", style=discord.ButtonStyle.secondary)
 
-            async def make_callback(map_name=m):  # Note the default argument
-                async def callback(interaction: discord.Interaction):
-                    if not interaction.response.is_done():
-                        await interaction.response.defer(ephemeral=True)
-
-                    if self.is_handling_vote:
-                        await safe_reply(
-                            interaction,
-                            "Please wait a few seconds and try again!",
-                            ephemeral=True,
-                        )
-                        return
-                    self.is_handling_vote = True
-
-                    # Get current queue IDs at time of vote
-                    queue_ids = [str(p["id"]) for p in self.bot.tdm_queue]
-                    user_id = str(interaction.user.id)
-
-                    print(f"[DEBUG] User attempting vote: {user_id}")
-                    print(f"[DEBUG] Current queue IDs: {queue_ids}")
-
-                    if user_id not in queue_ids:
-                        await safe_reply(
-                            interaction, "You must be in queue to vote!", ephemeral=True
-                        )
-                        self.is_handling_vote = False
-                        return
-
-                    if user_id in self.voters:
-                        await safe_reply(interaction, "Already voted!", ephemeral=True)
-                        self.is_handling_vote = False
-                        return
-
-                    self.map_votes[map_name] += 1
-                    self.voters.add(user_id)
-
-                    for b in self.map_buttons:
-                        if b.label.startswith(map_name):
-                            b.label = f"{map_name} ({self.map_votes[map_name]})"
-
-                    await interaction.message.edit(view=self)
-                    await interaction.response.send_message(
-                        f"Voted for {map_name}!", ephemeral=True
-                    )
-                    self.is_handling_vote = False
-
-                return callback
-
-            btn.callback = await make_callback()
+            async def callback(interaction: discord.Interaction, map_name=m):
+                await self.serialize(interaction, self.handle_vote, map_name)
+
+            btn.callback = callback
             self.map_buttons.append(btn)
             self.add_item(btn)
 
+    async def handle_vote(self, interaction: discord.Interaction, map_name: str):
+        # Get current queue IDs at time of vote
+        queue_ids = [str(p["id"]) for p in self.lobby.queue]
+        user_id = str(interaction.user.id)
+
+        print(f"[DEBUG] User attempting vote: {user_id}")
+        print(f"[DEBUG] Current queue IDs: {queue_ids}")
+
+        if user_id not in queue_ids:
+            await safe_reply(
+                interaction, "You must be in queue to vote!", ephemeral=True
+            )
+            return
+
+        if user_id in self.voters:
+            await safe_reply(interaction, "Already voted!", ephemeral=True)
+            return
+
+        self.map_votes[map_name] += 1
+        self.voters.add(user_id)
+
+        for b in self.map_buttons:
+            if b.label.startswith(map_name):
+                b.label = f"{map_name} ({self.map_votes[map_name]})"
+
+        editor_for(interaction.message).request(view=self)
+        await safe_reply(interaction, f"Voted for {map_name}!", ephemeral=True)
+
     async def send_vote_view(self):
         embed = discord.Embed(
             title="TDM Map Vote",
@@ -127,7 +112,9 @@ class TDMMapVoteView(discord.ui.View):
 
         # Wait 25 seconds for voting
         await asyncio.sleep(25)
+        await self.run_serialized(self.close_vote, message)
 
+    async def close_vote(self, message):
         # Determine winning map
         max_votes = max(self.map_votes.values())
         winning_maps = [m for m, v in self.map_votes.items() if v == max_votes]
@@ -143,7 +130,7 @@ class TDMMapVoteView(discord.ui.View):
             await self.ctx.send(f"The winning map is: **{self.winning_map}**")
 
         # Store the selected map
-        self.bot.tdm_selected_map = self.winning_map
+        self.lobby.selected_map = self.winning_map
 
         # Update embed to show final votes
         final_embed = discord.Embed(
@@ -160,7 +147,8 @@ class TDMMapVoteView(discord.ui.View):
                 inline=True,
             )
 
-        await message.edit(embed=final_embed, view=None)
+        await editor_for(message).close(embed=final_embed, view=None)
+        self.stop()
         await self.ctx.send("Proceeding with team formation...")
 
         tdm_cog = self.bot.get_cog("TDMCommands")
@@ -0,0 +1,184 @@
+"""Background write-behind queue for non-critical database writes."""
+
+import asyncio
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure
+
+# Duplicate key on a queued insert means an earlier attempt already landed
+_DUPLICATE_KEY = 11000
+
+# Update operators that leave the document the same when applied twice
+_IDEMPOTENT_OPERATORS = {"$set", "$setOnInsert", "$unset", "$addToSet", "$max", "$min"}
+
+
+class WriteBehindQueue:
+    """
+    Queue writes that callers don't need to wait for, and apply them in batches.
+
+    One worker drains the queue in FIFO order, so writes to the same document
+    are applied in the order they were queued. Consecutive writes to the same
+    collection go out as one ordered `bulk_write`. Connection failures are
+    retried with exponential backoff (inserts carry their `_id`, so a replayed
+    insert shows up as a duplicate and is skipped). A failed batch may have been
+    partly applied, so only writes that are safe to replay are retried; others
+    (e.g. `$inc` without a guard in its filter) are logged and kept in `failed`.
+    A write the server rejects is logged, kept in `failed` and skipped so it
+    can't block the queue.
+    `close()` (called from `CustomBot.close`) flushes everything still queued
+    before the client is closed.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        linger: float = 0.05,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+    ):
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.failed: list[tuple] = []
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def __len__(self):
+        return self._queue.qsize() if self._queue else 0
+
+    # Enqueueing
+    def _put(self, collection, op, idempotent: bool):
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._worker = asyncio.create_task(self._run(), name="write-behind")
+        self._queue.put_nowait((collection, op, idempotent))
+
+    def insert_one(self, collection, document: dict):
+        # Assign the id now so a retried insert is recognised as a duplicate
+        document.setdefault("_id", ObjectId())
+        self._put(collection, InsertOne(document), True)
+
+    def update_one(
+        self,
+        collection,
+        filter: dict,
+        update: dict,
+        upsert=False,
+        idempotent: bool | None = None,
+    ):
+        """
+        Queue an update. `idempotent` says whether it may be replayed after a
+        connection failure; by default only updates made of operators that
+        can't apply twice are. Pass True when the filter guarantees it, e.g. an
+        `$inc` that also records its key and only matches documents without it.
+        """
+        if idempotent is None:
+            idempotent = set(update) <= _IDEMPOTENT_OPERATORS
+        self._put(collection, UpdateOne(filter, update, upsert=upsert), idempotent)
+
+    # Worker
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        if self.linger:
+            # Let a burst of writes (e.g. one report) share a round trip
+            await asyncio.sleep(self.linger)
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                start = 0
+                while start < len(batch):
+                    collection = batch[start][0]
+                    stop = start
+                    while stop < len(batch) and batch[stop][0] is collection:
+                        stop += 1
+                    ops = [(op, idempotent) for _, op, idempotent in batch[start:stop]]
+                    await self._write(collection, ops)
+                    start = stop
+            except Exception as e:
+                print(f"[ERROR] Write-behind batch failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, collection, ops: list[tuple]):
+        """Apply `ops`, a list of (write, idempotent) pairs, in order."""
+        attempt = 0
+        while ops:
+            try:
+                await collection.bulk_write([op for op, _ in ops], ordered=True)
+                return
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors") or []
+                if not write_errors:
+                    # Only the write concern failed: the writes were applied but
+                    # may not be replicated yet, and replaying them won't help
+                    print(
+                        f"[ERROR] {collection.name}: write concern not satisfied "
+                        f"for {len(ops)} queued writes: "
+                        f"{e.details.get('writeConcernErrors')}"
+                    )
+                    return
+                error = write_errors[0]
+                failed = ops[error["index"]][0]
+                if error.get("code") == _DUPLICATE_KEY:
+                    print(f"[DEBUG] {collection.name}: queued write already stored")
+                else:
+                    print(
+                        f"[ERROR] {collection.name}: dropped queued write "
+                        f"{failed}: {error.get('errmsg')}"
+                    )
+                    self.failed.append((collection.name, failed, error.get("errmsg")))
+                # Everything before the error landed; carry on after it
+                ops = ops[error["index"] + 1 :]
+            except (ConnectionFailure, OperationFailure) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    print(
+                        f"[ERROR] {collection.name}: giving up on {len(ops)} "
+                        f"queued writes after {self.max_retries} retries: {e}"
+                    )
+                    self.failed.extend((collection.name, op, str(e)) for op, _ in ops)
+                    return
+                # Any prefix of the batch may have landed; replay only what is safe
+                unsafe = [op for op, idempotent in ops if not idempotent]
+                if unsafe:
+                    print(
+                        f"[ERROR] {collection.name}: not retrying {len(unsafe)} "
+                        f"queued writes that may already be applied: {e}"
+                    )
+                    self.failed.extend((collection.name, op, str(e)) for op in unsafe)
+                    ops = [(op, idempotent) for op, idempotent in ops if idempotent]
+                    if not ops:
+                        return
+                delay = self.backoff * 2 ** (attempt - 1)
+                print(
+                    f"[DEBUG] {collection.name}: write-behind retry {attempt} "
+                    f"in {delay:.1f}s ({e})"
+                )
+                await asyncio.sleep(delay)
+
+    # Lifecycle
+    async def flush(self):
+        """Wait until every write queued so far has been applied (or dropped)."""
+        if self._queue is not None and self._worker is not None:
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+write_queue = WriteBehindQueue()